@@ -0,0 +1,151 @@
+"""
+Micro-benchmark de los backends de extracción HTML (workers/html_extract.py).
+
+Analiza cada página de benchmarks/fixtures/ con todos los backends
+instalados, comprueba que todos extraen las mismas URLs y muestra el tiempo
+medio por página. El motor de cada página se deduce del prefijo del nombre
+del archivo (google_*.html, bing_*.html).
+
+Las páginas incluidas son sintéticas, con la estructura de las reales. Se
+pueden regenerar con --write-fixtures o añadir páginas reales guardadas
+desde el navegador con el mismo esquema de nombres.
+
+Uso:
+    python benchmarks/bench_html_parsers.py [--repeat N] [--write-fixtures]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from workers.html_extract import (  # noqa: E402
+    available_backends, bing_image_urls, get_extractor, google_image_urls,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+EXTRACTORS = {"google": google_image_urls, "bing": bing_image_urls}
+
+
+# ── Páginas de ejemplo ───────────────────────────────────────────────
+def _filler(rng: random.Random, count: int) -> str:
+    """Marcado que no interesa: contenedores, enlaces y texto."""
+    parts = []
+    for i in range(count):
+        parts.append(
+            f'<div class="c{rng.randint(0, 99)}" data-ved="{rng.getrandbits(64):x}">'
+            f'<span>{"lorem ipsum " * rng.randint(1, 4)}</span>'
+            f'<a href="/url?q={i}" class="l">enlace {i}</a></div>'
+        )
+    return "\n".join(parts)
+
+
+def google_page(rng: random.Random, results: int = 100) -> str:
+    images = "\n".join(
+        f'<div class="isv-r"><img class="rg_i" data-src="https://encrypted-tbn0.gstatic.com/'
+        f'images?q=tbn:{rng.getrandbits(96):x}" alt="resultado {i}"></div>'
+        for i in range(results)
+    )
+    full_size = ",".join(
+        f'["https://img{i}.example.com/foto/{rng.getrandbits(48):x}.jpg",{rng.randint(300, 4000)},'
+        f'{rng.randint(300, 4000)}]'
+        for i in range(results)
+    )
+    return (
+        "<!doctype html><html><head><title>Google</title>"
+        f"<script>var AF_data={{key:'ds:1',data:[{full_size}]}};</script></head><body>"
+        f'<img src="https://www.google.com/logos/logo.png">{_filler(rng, 400)}'
+        f"{images}{_filler(rng, 200)}</body></html>"
+    )
+
+
+def bing_page(rng: random.Random, results: int = 35) -> str:
+    cards = []
+    for i in range(results):
+        meta = json.dumps({
+            "cid": f"{rng.getrandbits(32):x}",
+            "murl": f"https://media{i}.example.org/{rng.getrandbits(48):x}.jpg",
+            "turl": f"https://tse1.mm.bing.net/th?id=OIP.{rng.getrandbits(64):x}",
+        })
+        cards.append(
+            f'<li><div class="iuscp"><a class="iusc" m=\'{meta}\' href="/images/search?view=detail">'
+            f'<img class="mimg" src="https://tse1.mm.bing.net/th?id={i}"></a></div></li>'
+        )
+    return (
+        "<!doctype html><html><head><title>Bing</title></head><body>"
+        f'{_filler(rng, 500)}<ul class="dgControl_list">{"".join(cards)}</ul>'
+        f"{_filler(rng, 200)}</body></html>"
+    )
+
+
+def write_fixtures():
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    rng = random.Random(15)
+    pages = {"google_images.html": google_page(rng), "bing_images.html": bing_page(rng)}
+    for name, html in pages.items():
+        with open(os.path.join(FIXTURES_DIR, name), "w", encoding="utf-8") as f:
+            f.write(html)
+        print(f"Escrito {name} ({len(html) / 1024:.0f} KB)")
+
+
+# ── Medición ─────────────────────────────────────────────────────────
+def load_fixtures() -> list[tuple[str, str, str]]:
+    """(nombre, motor, html) de cada página de ejemplo."""
+    fixtures = []
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        engine = name.split("_", 1)[0]
+        if name.endswith(".html") and engine in EXTRACTORS:
+            with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+                fixtures.append((name, engine, f.read()))
+    return fixtures
+
+
+def bench(repeat: int) -> bool:
+    backends = available_backends()
+    print(f"Backends disponibles: {', '.join(backends)}\n")
+    consistent = True
+
+    for name, engine, html in load_fixtures():
+        extract = EXTRACTORS[engine]
+        print(f"{name} ({len(html) / 1024:.0f} KB)")
+        reference = None
+        baseline = None
+        for backend in reversed(backends):  # html.parser primero, como referencia
+            extractor = get_extractor(backend)
+            urls = list(extract(html, extractor))
+            start = time.perf_counter()
+            for _ in range(repeat):
+                list(extract(html, extractor))
+            elapsed = (time.perf_counter() - start) / repeat * 1000
+
+            if reference is None:
+                reference, baseline = urls, elapsed
+            same = urls == reference
+            consistent &= same
+            print(
+                f"  {backend:<12} {elapsed:8.2f} ms  x{baseline / elapsed:5.1f}"
+                f"  {len(urls):4d} URLs{'' if same else '  ¡DIFERENTES!'}"
+            )
+        print()
+    return consistent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="repeticiones por backend")
+    parser.add_argument("--write-fixtures", action="store_true",
+                        help="regenera las páginas sintéticas de ejemplo")
+    args = parser.parse_args()
+
+    if args.write_fixtures:
+        write_fixtures()
+        return
+    if not bench(max(1, args.repeat)):
+        sys.exit("Los backends no extraen las mismas URLs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Visual Gallery Explorer Pro - Modo por lotes (sin interfaz).
+
+Lee un archivo de consultas (una por línea; las vacías y las que empiezan
+por # se ignoran), busca cada una en los motores elegidos, descarga las
+imágenes en una subcarpeta por consulta y escribe un manifest.json con el
+resultado de cada descarga.
+
+No importa PyQt5: funciona en servidores sin pantalla y arranca al momento.
+Todas las consultas comparten un bucle de eventos y un cliente HTTP
+asíncrono (ver core/), con un límite de consultas simultáneas.
+
+Uso:
+    python cli.py consultas.txt -o Imagenes -n 100 --engine all --size grande
+    cat consultas.txt | python cli.py - --no-download
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import signal
+import sys
+import time
+
+from core.download import DOWNLOAD_CANCELLED, DOWNLOAD_DUPLICATE, DOWNLOAD_OK, download
+from core.http import AsyncHttpClient
+from core.search import SearchError, collect
+from workers import http_session
+from workers.cancellation import CancelToken, Cancelled
+from workers.providers import AUTO, FEDERATED, providers
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Imagenes")
+
+# Valores de la línea de órdenes -> valores de filtro de la interfaz
+SIZES = {"grande": "Grande", "mediano": "Mediano", "pequeno": "Pequeño"}
+COLORS = {
+    "byn": "Blanco y negro",
+    "transparente": "Transparente",
+    "rojo": "Rojo",
+    "azul": "Azul",
+    "verde": "Verde",
+}
+
+
+def read_queries(path: str) -> list[str]:
+    """Consultas del archivo (o de stdin con «-»), sin repetir."""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    queries = (line.strip() for line in lines)
+    return list(dict.fromkeys(q for q in queries if q and not q.startswith("#")))
+
+
+def folder_name(query: str) -> str:
+    """Nombre de carpeta seguro para una consulta."""
+    name = re.sub(r"[^\w\-]+", "_", query.strip(), flags=re.UNICODE).strip("_")
+    return name[:60] or "consulta"
+
+
+# ── Trabajo por consulta ─────────────────────────────────────────────
+async def run_query(
+    query: str,
+    args: argparse.Namespace,
+    options: dict,
+    token: CancelToken,
+    client: AsyncHttpClient,
+) -> dict:
+    """Busca y descarga una consulta; devuelve su entrada del manifiesto."""
+    name = folder_name(query)
+    entry = {
+        "query": query,
+        "folder": name,
+        "found": 0,
+        "downloaded": 0,
+        "duplicates": 0,
+        "failed": 0,
+        "error": None,
+        "seconds": 0.0,
+        "files": [],
+    }
+    started = time.monotonic()
+    try:
+        urls = await collect(query, args.engine, options, args.limit, token)
+        entry["found"] = len(urls)
+        if args.no_download:
+            entry["files"] = [{"url": url, "status": "skipped"} for url in urls]
+        elif urls:
+            results = await download(
+                urls,
+                os.path.join(args.output, name),
+                name[:30],
+                query=query,
+                concurrency=args.workers,
+                per_host=args.per_host,
+                token=token,
+                client=client,
+                dedup=not args.keep_duplicates,
+            )
+            for result in results:
+                if result["path"]:
+                    result["path"] = os.path.relpath(result["path"], args.output)
+            entry["files"] = results
+            entry["downloaded"] = sum(1 for r in results if r["status"] == DOWNLOAD_OK)
+            entry["duplicates"] = sum(1 for r in results if r["status"] == DOWNLOAD_DUPLICATE)
+            entry["failed"] = sum(
+                1 for r in results
+                if r["status"] not in (DOWNLOAD_OK, DOWNLOAD_DUPLICATE, DOWNLOAD_CANCELLED)
+            )
+    except Cancelled:
+        pass
+    except asyncio.CancelledError:
+        # Con el token cancelado, una tarea interrumpida cuenta como cancelación
+        if not token.cancelled:
+            raise
+    except SearchError as e:
+        entry["error"] = str(e)
+    except Exception as e:
+        # Un fallo de una consulta (disco lleno, respuesta malformada...) no
+        # debe abortar las demás ni dejar el lote sin manifiesto
+        entry["error"] = f"{type(e).__name__}: {e}"
+    if token.cancelled:
+        entry["error"] = "cancelada"
+    entry["seconds"] = round(time.monotonic() - started, 2)
+    return entry
+
+
+async def run_all(
+    queries: list[str],
+    args: argparse.Namespace,
+    options: dict,
+    token: CancelToken,
+    entries: dict[str, dict],
+):
+    """Ejecuta las consultas (hasta args.parallel a la vez) y rellena `entries`."""
+    def interrupt():
+        print("Cancelando...")
+        token.cancel()
+
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGINT, interrupt)
+    except (NotImplementedError, RuntimeError):
+        pass  # Windows: Ctrl+C llega como KeyboardInterrupt (ver main())
+
+    slots = asyncio.Semaphore(max(1, args.parallel))
+
+    async def one(query: str) -> tuple[str, dict]:
+        async with slots:
+            return query, await run_query(query, args, options, token, client)
+
+    async with AsyncHttpClient() as client:
+        for finished in asyncio.as_completed([one(q) for q in queries]):
+            query, entry = await finished
+            entries[query] = entry
+            if token.cancelled:
+                continue
+            status = entry["error"] or (
+                f"{entry['found']} encontradas, {entry['downloaded']} descargadas"
+                + (f", {entry['duplicates']} repetidas" if entry["duplicates"] else "")
+                + (f", {entry['failed']} con error" if entry["failed"] else "")
+            )
+            print(f"[{len(entries)}/{len(queries)}] «{query}»: {status} ({entry['seconds']} s)")
+
+
+def write_manifest(path: str, args: argparse.Namespace, options: dict, entries: list[dict]):
+    manifest = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "engine": args.engine,
+        "options": options,
+        "limit": args.limit,
+        "queries": entries,
+        "rate_limits": http_session.rate_limits(),
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+# ── Línea de órdenes ─────────────────────────────────────────────────
+def build_parser() -> argparse.ArgumentParser:
+    engines = [FEDERATED, AUTO, *(p.NAME for p in providers())]
+    parser = argparse.ArgumentParser(
+        description="Busca y descarga imágenes por lotes, sin interfaz gráfica."
+    )
+    parser.add_argument("queries", help="archivo con una consulta por línea («-» para stdin)")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT,
+                        help="carpeta de destino (por defecto: Imagenes/)")
+    parser.add_argument("-e", "--engine", default=FEDERATED, choices=engines,
+                        help="motor de búsqueda (all: todos, auto: el más barato)")
+    parser.add_argument("-n", "--limit", type=int, default=50,
+                        help="imágenes por consulta (por defecto: 50)")
+    parser.add_argument("--size", choices=sorted(SIZES), help="filtro de tamaño")
+    parser.add_argument("--color", choices=sorted(COLORS), help="filtro de color")
+    parser.add_argument("--no-safe", action="store_true", help="desactiva SafeSearch")
+    parser.add_argument("-j", "--parallel", type=int, default=2,
+                        help="consultas simultáneas (por defecto: 2)")
+    parser.add_argument("--workers", type=int, default=6,
+                        help="descargas simultáneas por consulta (por defecto: 6)")
+    parser.add_argument("--per-host", type=int, default=2,
+                        help="descargas simultáneas por host (por defecto: 2)")
+    parser.add_argument("--keep-duplicates", action="store_true",
+                        help="guarda también las imágenes que ya están en la carpeta")
+    parser.add_argument("--manifest", help="ruta del manifiesto (por defecto: <output>/manifest.json)")
+    parser.add_argument("--no-download", action="store_true",
+                        help="solo busca; el manifiesto lista las URLs")
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.limit < 1:
+        parser.error("--limit debe ser al menos 1")
+
+    try:
+        queries = read_queries(args.queries)
+    except OSError as e:
+        parser.error(f"no se pudo leer {args.queries}: {e}")
+    if not queries:
+        parser.error("el archivo no contiene consultas")
+
+    args.output = os.path.abspath(args.output)
+    manifest_path = args.manifest or os.path.join(args.output, "manifest.json")
+    options = {
+        "size": SIZES.get(args.size, ""),
+        "color": COLORS.get(args.color, ""),
+        "safe": not args.no_safe,
+    }
+
+    token = CancelToken()
+    entries: dict[str, dict] = {}
+    print(f"{len(queries)} consultas · motor {args.engine} · {args.limit} imágenes por consulta")
+
+    try:
+        asyncio.run(run_all(queries, args, options, token, entries))
+    except KeyboardInterrupt:
+        print("Cancelando...")
+        token.cancel()
+    finally:
+        http_session.close_session()
+        # Aunque el lote se interrumpa, las consultas terminadas quedan registradas
+        ordered = [entries[q] for q in queries if q in entries]
+        write_manifest(manifest_path, args, options, ordered)
+        print(f"Manifiesto: {manifest_path}")
+
+    if token.cancelled:
+        return 130
+    return 1 if any(entry["error"] for entry in ordered) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
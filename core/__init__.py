@@ -0,0 +1,37 @@
+"""
+Núcleo asíncrono reutilizable: búsqueda, peticiones y descargas sin Qt.
+
+Se puede usar desde scripts, servicios o pruebas con asyncio:
+
+    from core import collect, download
+
+    async def main():
+        urls = await collect("atardecer", "all", {}, limit=50)
+        results = await download(urls, "Imagenes/atardecer", "atardecer")
+
+Los workers de la interfaz (workers/search_worker.py y
+workers/download_worker.py) son adaptadores QThread sobre este paquete.
+"""
+from core.download import (
+    DOWNLOAD_CANCELLED, DOWNLOAD_DUPLICATE, DOWNLOAD_FAILED, DOWNLOAD_OK, MAX_DOWNLOAD_BYTES,
+    download, iter_downloads,
+)
+from core.http import AsyncHttpClient, HttpResponse, available_backend
+from core.search import SearchError, SearchSession, collect, search
+
+__all__ = [
+    "AsyncHttpClient",
+    "HttpResponse",
+    "available_backend",
+    "SearchError",
+    "SearchSession",
+    "collect",
+    "search",
+    "download",
+    "iter_downloads",
+    "DOWNLOAD_OK",
+    "DOWNLOAD_FAILED",
+    "DOWNLOAD_CANCELLED",
+    "DOWNLOAD_DUPLICATE",
+    "MAX_DOWNLOAD_BYTES",
+]
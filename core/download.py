@@ -0,0 +1,329 @@
+"""
+Descarga de imágenes con asyncio.
+
+Todas las descargas comparten un bucle de eventos y un AsyncHttpClient (ver
+core/http.py), con un límite global de descargas simultáneas y otro por host
+para no saturar un mismo servidor. Cada imagen se escribe a disco por
+bloques (ver workers/image_stream.py), por lo que la memoria no crece con el
+tamaño de los originales; la escritura y el hash van a hilos del executor,
+de WRITE_BATCH en WRITE_BATCH bytes, para no frenar el bucle de eventos.
+
+Cada imagen guardada se registra en el índice de la galería de la carpeta
+(ver workers/gallery_index.py) con su hash, su URL y la búsqueda; el índice
+se consulta y se escribe desde un hilo propio, fuera del bucle de eventos.
+Con dedup (por defecto) se consulta antes: una URL ya descargada no se
+vuelve a pedir, y una imagen cuyo hash, calculado mientras se escribe,
+coincide con la de un archivo existente se descarta sin llegar a guardarse.
+Ambos casos terminan con estado DOWNLOAD_DUPLICATE y la ruta del archivo
+que ya estaba.
+
+Al cancelar el CancelToken se cancelan las tareas pendientes y las que estén
+en curso; los archivos a medias se eliminan.
+
+download() avisa con callbacks desde el bucle de eventos (on_result con
+cada URL según termina) y devuelve el resultado de cada URL;
+iter_downloads() entrega los resultados según terminan. Los usan el
+ImageDownloader de la interfaz (workers/download_worker.py) y el modo por
+lotes (cli.py).
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Optional
+
+from core.http import AsyncHttpClient
+from workers.cancellation import CancelToken, Cancelled
+from workers.gallery_index import GalleryIndex, get_gallery_index
+from workers.image_stream import CHUNK_SIZE, ImageFile, check_headers
+from workers.rate_limiter import host_of
+
+MAX_DOWNLOAD_BYTES = 200 * 1024 * 1024  # tamaño máximo por imagen
+SPEED_INTERVAL = 0.25  # segundos entre avisos de velocidad
+WRITE_BATCH = 1024 * 1024  # bytes recibidos que se juntan antes de escribirlos
+
+# Estado de cada descarga en los resultados
+DOWNLOAD_OK = "ok"
+DOWNLOAD_FAILED = "error"
+DOWNLOAD_CANCELLED = "cancelled"
+DOWNLOAD_DUPLICATE = "duplicate"   # ya estaba en la carpeta; path es el existente
+
+
+def _result(url: str, status: str = DOWNLOAD_OK) -> dict:
+    return {"url": url, "status": status, "path": None, "bytes": 0, "error": None}
+
+
+class _Batch:
+    """Estado compartido por las descargas de una misma llamada."""
+
+    def __init__(
+        self,
+        client: AsyncHttpClient,
+        folder: str,
+        prefix: str,
+        query: Optional[str],
+        concurrency: int,
+        per_host: int,
+        max_bytes: int,
+        on_file_progress: Optional[Callable[[int, int, int], None]],
+        on_speed: Optional[Callable[[float], None]],
+        token: CancelToken,
+        index: GalleryIndex,
+        dedup: bool,
+    ):
+        self.client = client
+        self.folder = folder
+        self.prefix = prefix
+        self.query = query
+        self.per_host = max(1, per_host)
+        self.max_bytes = max_bytes
+        self.on_file_progress = on_file_progress
+        self.on_speed = on_speed
+        self.token = token
+        self.index = index
+        self.dedup = dedup
+
+        # Un solo hilo para el índice: consultar el hash y guardar la imagen
+        # no se intercalan entre dos descargas del mismo contenido
+        self._index_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gallery-index")
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+        self._received = 0
+        self._started = time.monotonic()
+        self._last_speed = 0.0
+
+    async def download_one(self, index: int, url: str) -> tuple[int, dict]:
+        result = _result(url)
+        try:
+            existing = await self._in_thread(self.index.path_for_url, url) if self.dedup else None
+            if existing:
+                result["status"], result["path"] = DOWNLOAD_DUPLICATE, existing
+                return index, result
+            async with self._host_slot(url), self._slots:
+                result["path"], result["bytes"], duplicate = await self._fetch(index, url)
+            if duplicate:
+                result["status"] = DOWNLOAD_DUPLICATE
+        except asyncio.CancelledError:
+            if not self.token.cancelled:
+                raise
+            result["status"] = DOWNLOAD_CANCELLED
+        except Exception as e:
+            print(f"[Download] Error ({url[:60]}...): {e}")
+            result["status"] = DOWNLOAD_FAILED
+            result["error"] = str(e)
+        return index, result
+
+    async def _fetch(self, index: int, url: str) -> tuple[str, int, bool]:
+        """Ruta, bytes recibidos y si el contenido ya estaba en la carpeta."""
+        async with self.client.stream("GET", url) as response:
+            ext = check_headers(response.status, response.headers, self.max_bytes)
+            expected = int(response.headers.get("Content-Length") or 0)
+            # La extensión la decide ImageFile según el Content-Type o la firma
+            base = os.path.join(self.folder, f"{self.prefix}_{int(time.time())}_{index}")
+            image = ImageFile(base, ext, self.max_bytes)
+            writing: Optional[asyncio.Future] = None
+            try:
+                parts: list[bytes] = []
+                buffered = received = 0
+                async for chunk in response.chunks(CHUNK_SIZE):
+                    parts.append(chunk)
+                    buffered += len(chunk)
+                    received += len(chunk)
+                    self._add_received(len(chunk))
+                    if self.on_file_progress:
+                        self.on_file_progress(index, received, expected)
+                    if buffered >= WRITE_BATCH:
+                        writing = self._write(image, parts)
+                        parts, buffered = [], 0
+                        await writing
+                writing = self._write(image, parts)
+                await writing
+                image.finish()
+                storing = asyncio.ensure_future(self._in_thread(self._store, image, url))
+            except BaseException:
+                if writing is None or writing.done():
+                    image.discard()
+                else:
+                    # Un bloque se está escribiendo en otro hilo: se borra al terminar
+                    writing.add_done_callback(lambda _: image.discard())
+                raise
+        # Desde aquí la imagen es del hilo que la guarda: aunque se cancele
+        # la tarea, termina de guardarse (o descartarse) y de indexarse
+        path, duplicate = await asyncio.shield(storing)
+        return path, image.size, duplicate
+
+    def _write(self, image: ImageFile, parts: list[bytes]) -> asyncio.Future:
+        """
+        Escribe y hashea los bloques acumulados en un hilo del executor: con
+        muchas descargas rápidas, el disco y el hash frenarían el bucle de
+        eventos. Se escriben de WRITE_BATCH en WRITE_BATCH para no pagar un
+        salto de hilo por cada bloque de la red.
+        """
+        def write_parts():
+            for part in parts:
+                image.write(part)
+
+        return asyncio.get_running_loop().run_in_executor(None, write_parts)
+
+    def _store(self, image: ImageFile, url: str) -> tuple[str, bool]:
+        """Da nombre definitivo a una imagen recibida y la indexa; ruta y si ya estaba."""
+        if self.dedup:
+            existing = self.index.path_for_hash(image.digest)
+            if existing:
+                image.discard()
+                self.index.add_url(url, existing)
+                return existing, True
+        path = image.commit()
+        self.index.add(path, image.digest, url, self.query)
+        return path, False
+
+    async def _in_thread(self, func, *args):
+        """
+        Ejecuta `func` en el hilo del índice: las consultas a SQLite y la
+        lectura de dimensiones con Pillow bloquean, y en el bucle de eventos
+        pararían todas las descargas en curso.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._index_thread, func, *args)
+
+    def close(self):
+        """Libera el hilo del índice; lo que tenga pendiente termina igualmente."""
+        self._index_thread.shutdown(wait=False)
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        """Semáforo que limita las conexiones simultáneas a un mismo host."""
+        host = host_of(url)
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.per_host)
+        return slot
+
+    # ── Velocidad agregada ───────────────────────────────────────────
+    def _add_received(self, size: int):
+        self._received += size
+        self.emit_speed()
+
+    def emit_speed(self, force: bool = False):
+        if self.on_speed is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_speed < SPEED_INTERVAL:
+            return
+        self._last_speed = now
+        self.on_speed(self._received / max(now - self._started, 1e-6))
+
+
+async def iter_downloads(
+    urls: list[str],
+    folder: str,
+    prefix: str,
+    *,
+    query: Optional[str] = None,
+    concurrency: int = 6,
+    per_host: int = 2,
+    max_bytes: int = MAX_DOWNLOAD_BYTES,
+    on_file_progress: Optional[Callable[[int, int, int], None]] = None,
+    on_speed: Optional[Callable[[float], None]] = None,
+    token: Optional[CancelToken] = None,
+    client: Optional[AsyncHttpClient] = None,
+    dedup: bool = True,
+) -> AsyncIterator[tuple[int, dict]]:
+    """
+    Descarga las URLs y entrega (índice, resultado) según termina cada una.
+    El resultado es un diccionario con url, status, path, bytes y error.
+    query es la búsqueda de la que salen, que se guarda en el índice.
+    """
+    token = token or CancelToken()
+    own_client = client is None
+    client = client or AsyncHttpClient()
+    os.makedirs(folder, exist_ok=True)
+    loop = asyncio.get_running_loop()
+
+    index = get_gallery_index(folder)
+    batch = _Batch(
+        client, folder, prefix, query, concurrency, per_host, max_bytes,
+        on_file_progress, on_speed, token, index, dedup,
+    )
+    tasks: list[asyncio.Future] = []
+    finished: asyncio.Queue = asyncio.Queue()
+
+    def cancel_tasks():
+        for task in tasks:
+            task.cancel()
+
+    # cancel() puede llegar desde otro hilo (la interfaz o una señal)
+    def on_cancel():
+        loop.call_soon_threadsafe(cancel_tasks)
+
+    token.add_callback(on_cancel)
+    try:
+        if dedup:
+            # Indexar lo que ya hay en la carpeta puede leer muchos archivos;
+            # si se cancela a medias, las descargas salen canceladas
+            try:
+                await loop.run_in_executor(None, index.refresh, token)
+            except Cancelled:
+                pass
+
+        for i, url in enumerate(urls):
+            task = asyncio.ensure_future(batch.download_one(i, url))
+            task.add_done_callback(lambda task, i=i: finished.put_nowait((i, task)))
+            tasks.append(task)
+        if token.cancelled:
+            cancel_tasks()
+
+        for _ in tasks:
+            i, task = await finished.get()
+            if task.cancelled():
+                # Cancelada antes de empezar: download_one no llegó a ejecutarse
+                if not token.cancelled:
+                    raise asyncio.CancelledError()
+                yield i, _result(urls[i], DOWNLOAD_CANCELLED)
+            else:
+                yield task.result()
+    finally:
+        token.remove_callback(on_cancel)
+        cancel_tasks()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        batch.emit_speed(force=True)
+        batch.close()
+        if own_client:
+            await client.close()
+
+
+async def download(
+    urls: list[str],
+    folder: str,
+    prefix: str,
+    *,
+    query: Optional[str] = None,
+    concurrency: int = 6,
+    per_host: int = 2,
+    max_bytes: int = MAX_DOWNLOAD_BYTES,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    on_result: Optional[Callable[[int, dict], None]] = None,
+    on_file_progress: Optional[Callable[[int, int, int], None]] = None,
+    on_speed: Optional[Callable[[float], None]] = None,
+    token: Optional[CancelToken] = None,
+    client: Optional[AsyncHttpClient] = None,
+    dedup: bool = True,
+) -> list[dict]:
+    """
+    Descarga todas las URLs. Devuelve, en el orden de las URLs, un
+    diccionario por descarga con url, status, path, bytes y error.
+    """
+    results: list[dict] = [{} for _ in urls]
+    done = 0
+    downloads = iter_downloads(
+        urls, folder, prefix,
+        query=query, concurrency=concurrency, per_host=per_host, max_bytes=max_bytes,
+        on_file_progress=on_file_progress, on_speed=on_speed,
+        token=token, client=client, dedup=dedup,
+    )
+    async for index, result in downloads:
+        results[index] = result
+        if on_result:
+            on_result(index, result)
+        done += 1
+        if on_progress:
+            on_progress(done, len(urls))
+    return results
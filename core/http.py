@@ -0,0 +1,259 @@
+"""
+Cliente HTTP asíncrono del núcleo.
+
+Con aiohttp instalado, todas las peticiones comparten un único bucle de
+eventos: miles de descargas simultáneas no necesitan un hilo cada una. Sin
+aiohttp se usa la sesión compartida de requests (workers/http_session.py)
+en un pool de hilos acotado; la API es la misma en ambos casos.
+
+Como en la sesión síncrona, cada petición espera su turno en el limitador
+por host (workers/rate_limiter.py) y los 429/503 se reintentan según lo que
+pida el host; si sigue limitando se lanza RateLimited.
+
+Cancelar la tarea que espera una petición la corta: en el backend de hilos
+se cancela el CancelToken de la petición, que cierra su socket.
+"""
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Mapping, Optional
+
+from workers import http_session
+from workers.cancellation import CancelToken, Cancelled, abort_response
+from workers.rate_limiter import RateLimited, get_rate_limiter, host_of
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - dependencia opcional
+    aiohttp = None
+
+MAX_CONNECTIONS = 100    # conexiones simultáneas del cliente
+THREAD_WORKERS = 16      # hilos del backend sin aiohttp
+DEFAULT_TIMEOUT = 15.0   # segundos para conectar y entre bloques recibidos
+CHUNK_SIZE = 64 * 1024
+
+BACKEND_AIOHTTP = "aiohttp"
+BACKEND_THREADS = "threads"
+
+
+def available_backend() -> str:
+    """Backend que usa el cliente por defecto."""
+    return BACKEND_AIOHTTP if aiohttp is not None else BACKEND_THREADS
+
+
+class HttpResponse:
+    """
+    Respuesta de AsyncHttpClient: estado, cabeceras, URL final (tras las
+    redirecciones) y el cuerpo, que se lee por bloques con chunks() o entero
+    con read().
+    """
+
+    def __init__(
+        self,
+        status: int,
+        headers: Mapping[str, str],
+        url: str,
+        chunks: Callable[[int], AsyncIterator[bytes]],
+        release: Callable[[], None],
+    ):
+        self.status = status
+        self.headers = headers
+        self.url = url
+        self._chunks = chunks
+        self._release = release
+        self.body: Optional[bytes] = None
+
+    def chunks(self, size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+        return self._chunks(size)
+
+    async def read(self) -> bytes:
+        if self.body is None:
+            self.body = b"".join([chunk async for chunk in self._chunks(CHUNK_SIZE)])
+        return self.body
+
+    def text(self, encoding: str = "utf-8") -> str:
+        """Cuerpo como texto (después de read())."""
+        return (self.body or b"").decode(encoding, errors="replace")
+
+    def json(self) -> Any:
+        """Cuerpo como JSON (después de read())."""
+        return json.loads(self.text())
+
+    def release(self):
+        self._release()
+
+
+# ── Backends ─────────────────────────────────────────────────────────
+class _AiohttpBackend:
+    """Peticiones en el propio bucle de eventos con aiohttp."""
+
+    def __init__(self, max_connections: int, timeout: float):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._session: Optional["aiohttp.ClientSession"] = None
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                headers=http_session.HEADERS,
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections,
+                    limit_per_host=http_session.POOL_PER_HOST,
+                ),
+                timeout=aiohttp.ClientTimeout(
+                    total=None, sock_connect=self.timeout, sock_read=self.timeout
+                ),
+            )
+        return self._session
+
+    async def open(self, method: str, url: str, **kwargs) -> HttpResponse:
+        # Misma política de reintentos que la sesión síncrona
+        attempt = 0
+        while True:
+            try:
+                response = await self._get_session().request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= http_session.RETRY_TOTAL:
+                    raise
+            else:
+                if response.status not in http_session.RETRY_STATUS or attempt >= http_session.RETRY_TOTAL:
+                    break
+                response.release()
+            await asyncio.sleep(http_session.RETRY_BACKOFF * 2 ** attempt)
+            attempt += 1
+
+        async def chunks(size: int) -> AsyncIterator[bytes]:
+            async for chunk in response.content.iter_chunked(size):
+                yield chunk
+
+        return HttpResponse(
+            response.status, response.headers, str(response.url), chunks, response.release
+        )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class _ThreadBackend:
+    """Peticiones con la sesión de requests en un pool de hilos acotado."""
+
+    def __init__(self, max_connections: int, timeout: float):
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(
+            max_workers=min(max_connections, THREAD_WORKERS),
+            thread_name_prefix="core-http",
+        )
+
+    async def _call(self, token: CancelToken, fn: Callable, *args):
+        """Ejecuta fn en el pool; si se cancela la tarea, cancela el token."""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._pool, fn, *args)
+        except asyncio.CancelledError:
+            token.cancel()
+            raise
+
+    def _request(self, method: str, url: str, token: CancelToken, kwargs: dict):
+        kwargs.setdefault("timeout", self.timeout)
+        response = http_session.send(method, url, token, stream=True, **kwargs)
+        abort = partial(abort_response, response)
+        token.add_callback(abort)
+        if token.cancelled:
+            response.close()
+            raise Cancelled()
+        return response, abort
+
+    async def open(self, method: str, url: str, **kwargs) -> HttpResponse:
+        token = CancelToken()
+        response, abort = await self._call(token, self._request, method, url, token, kwargs)
+
+        async def chunks(size: int) -> AsyncIterator[bytes]:
+            parts = response.iter_content(size)
+            while True:
+                chunk = await self._call(token, next, parts, None)
+                if chunk is None:
+                    return
+                if chunk:
+                    yield chunk
+
+        def release():
+            token.remove_callback(abort)
+            response.close()
+
+        return HttpResponse(
+            response.status_code, response.headers, response.url, chunks, release
+        )
+
+    async def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ── Cliente ──────────────────────────────────────────────────────────
+class AsyncHttpClient:
+    """
+    Cliente HTTP para corrutinas. Se usa como contexto asíncrono:
+
+        async with AsyncHttpClient() as client:
+            async with client.stream("GET", url) as response:
+                async for chunk in response.chunks():
+                    ...
+    """
+
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        timeout: float = DEFAULT_TIMEOUT,
+        backend: Optional[str] = None,
+    ):
+        self.backend = backend or available_backend()
+        if self.backend == BACKEND_AIOHTTP:
+            if aiohttp is None:
+                raise RuntimeError("El backend aiohttp necesita el paquete aiohttp")
+            self._backend = _AiohttpBackend(max_connections, timeout)
+        elif self.backend == BACKEND_THREADS:
+            self._backend = _ThreadBackend(max_connections, timeout)
+        else:
+            raise ValueError(f"Backend HTTP desconocido: {self.backend}")
+
+    async def __aenter__(self) -> "AsyncHttpClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self._backend.close()
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs) -> AsyncIterator[HttpResponse]:
+        """
+        Petición al ritmo que permite el host; el cuerpo se lee dentro del
+        contexto. Lanza RateLimited si el host sigue limitando tras
+        THROTTLE_RETRIES reintentos.
+        """
+        limiter = get_rate_limiter()
+        retries = 0
+        while True:
+            await limiter.acquire_async(url)
+            response = await self._backend.open(method, url, **kwargs)
+            if not limiter.record_status(url, response.status, response.headers, response.url):
+                break
+            response.release()
+            wait = limiter.blocked_for(url)
+            if retries >= http_session.THROTTLE_RETRIES or wait > http_session.MAX_THROTTLE_WAIT:
+                raise RateLimited(host_of(url), response.status, wait)
+            retries += 1
+        try:
+            yield response
+        finally:
+            response.release()
+
+    async def fetch(self, url: str, method: str = "GET", **kwargs) -> HttpResponse:
+        """Petición con el cuerpo ya leído (para páginas y APIs, no para imágenes)."""
+        async with self.stream(method, url, **kwargs) as response:
+            await response.read()
+        return response
@@ -0,0 +1,344 @@
+"""
+Búsqueda de imágenes sin interfaz: motores en paralelo, paginación por
+demanda y fusión de resultados.
+
+SearchSession no depende de Qt; avisa con callbacks desde los hilos de los
+motores. La usa el SearchWorker de la interfaz (workers/search_worker.py).
+Para corrutinas, search() la recorre como un iterador asíncrono de lotes y
+collect() reúne un número de URLs; los proveedores siguen siendo síncronos
+y se ejecutan en hilos, fuera del bucle de eventos.
+
+Los motores son proveedores del registro de workers/providers: cada uno
+declara qué filtros aplica, su tamaño de página, su plazo y su ritmo de
+peticiones. En modo federado ("all") se consultan en paralelo todos los que
+aplican los filtros pedidos y los resultados se fusionan sin duplicados; en
+modo automático ("auto") se usa solo el más barato de ellos.
+
+Cada motor produce sus resultados por lotes a medida que analiza la página
+y cada lote se avisa enseguida con on_found: se pueden mostrar los primeros
+resultados sin esperar al resto del análisis ni al motor más lento.
+
+Las búsquedas son paginadas y perezosas: cada motor trae su primera página
+y después espera. fetch_more() pide la página siguiente a los motores;
+on_ready indica que la búsqueda está en espera, y stop() la da por
+terminada con lo que ya tiene.
+
+Cada página se guarda en la caché de búsquedas (workers/search_cache.py):
+repetir una búsqueda con los mismos filtros no vuelve a la red.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import suppress
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+from workers.cancellation import CancelToken, Cancelled
+from workers.providers import FEDERATED, SearchProvider, select_providers
+from workers.providers.base import batched, requested_filters
+from workers.search_cache import get_search_cache, normalize_query
+
+MAX_PAGES = 40         # páginas por motor como máximo
+MORE_RESULTS = 100     # resultados que pide fetch_more() por defecto
+DEMAND_POLL = 0.2      # segundos entre comprobaciones al esperar demanda
+
+
+class ProviderRun:
+    """
+    Estado de un proveedor dentro de una búsqueda: token, URLs propias y
+    páginas. Es lo que recibe SearchProvider.search().
+    """
+
+    def __init__(self, session: "SearchSession", provider: SearchProvider, token: CancelToken):
+        self.session = session
+        self.provider = provider
+        self.name = provider.NAME
+        self.token = token
+        self.query = session.query
+        self.options = session.options
+        self.own: set[str] = set()
+
+    def pages(self) -> Iterator[tuple[int, CancelToken]]:
+        """
+        Números de página con el token que limita su plazo. La primera se da
+        enseguida; las siguientes solo cuando se piden más resultados, y se
+        deja de paginar cuando una página no aporta URLs nuevas. El plazo no
+        cuenta las esperas del limitador de ritmo: un motor limitado acaba
+        en RateLimited, no en «sin respuesta».
+        """
+        last_count = -1
+        for page in range(MAX_PAGES):
+            if page:
+                if len(self.own) == last_count:
+                    return
+                if not self.session._wait_for_demand(self.token):
+                    return
+            last_count = len(self.own)
+
+            page_token = self.token.child()
+            page_token.set_deadline(self.provider.DEADLINE)
+            try:
+                yield page, page_token
+            finally:
+                page_token.clear_deadline()
+
+    def cached(
+        self,
+        page: int,
+        token: CancelToken,
+        produce: Callable[[], Iterator[list[str]]],
+        meta: Optional[dict] = None,
+        is_last: Optional[Callable[[], bool]] = None,
+    ) -> Iterator[list[str]]:
+        """
+        Lotes de una página desde la caché de búsquedas o, si no está,
+        desde produce(), guardándola al terminar sin errores. `meta` guarda
+        junto a la página el estado que el motor necesita para seguir
+        (por ejemplo, el cursor de la página siguiente).
+
+        Una página sin resultados solo se guarda si is_last() (evaluado al
+        terminar produce()) confirma que el motor no tiene más: si no, puede
+        ser una página de consentimiento o de error y no debe ocultar la
+        búsqueda durante todo el TTL.
+        """
+        cache = get_search_cache()
+        key = cache.key(self.name, page, *self.session.cache_parts())
+        entry = cache.get(key)
+        if entry is not None:
+            if meta is not None:
+                meta.update(entry.get("meta", {}))
+            yield from batched(entry["urls"])
+            return
+
+        urls: list[str] = []
+        for batch in produce():
+            urls.extend(batch)
+            yield batch
+        if urls or (is_last is not None and is_last()):
+            cache.put(key, {"urls": urls, "meta": meta or {}})
+
+
+class SearchError(Exception):
+    """La búsqueda no dio resultados y algún motor falló."""
+
+
+class SearchSession:
+    """Búsqueda en uno o varios motores; run() bloquea hasta que termina."""
+
+    def __init__(
+        self,
+        query: str,
+        engine: str,
+        options: dict,
+        on_found: Optional[Callable[[list[str]], None]] = None,
+        on_ready: Optional[Callable[[int], None]] = None,
+        token: Optional[CancelToken] = None,
+    ):
+        self.query = query
+        self.engine = engine
+        self.options = options
+        self.on_found = on_found    # URLs nuevas (sin repetir) según llegan
+        self.on_ready = on_ready    # en espera de fetch_more() (total hasta ahora)
+        self.token = token or CancelToken()
+
+        # Resultados y demanda, protegidos por la misma condición
+        self._lock = threading.Condition()
+        self._merged: list[str] = []
+        self._seen: set[str] = set()
+        self._wanted = 0          # total deseado; la primera página no espera
+        self._stopped = False
+        self._engine_count = 0
+        self._waiting = 0         # motores esperando demanda
+        self._done = 0            # motores terminados
+        self._idle_emitted = False
+
+    def cancel(self):
+        """Aborta la búsqueda; run() lanza Cancelled."""
+        self.token.cancel()
+        with self._lock:
+            self._lock.notify_all()
+
+    def stop(self):
+        """No se piden más páginas; run() devuelve lo encontrado hasta ahora."""
+        with self._lock:
+            self._stopped = True
+            self._lock.notify_all()
+
+    def cache_parts(self) -> tuple:
+        """Parte de la clave de caché común a todas las páginas de la búsqueda."""
+        filters = requested_filters(self.options)
+        return (
+            normalize_query(self.query),
+            filters.get("size", ""),
+            filters.get("color", ""),
+            filters["safe"],
+        )
+
+    def fetch_more(self, count: int = MORE_RESULTS):
+        """Pide a los motores en espera su página siguiente."""
+        with self._lock:
+            self._wanted = len(self._merged) + count
+            self._idle_emitted = False
+            self._lock.notify_all()
+
+    # ── Ejecución ────────────────────────────────────────────────────
+    def run(self) -> list[str]:
+        """
+        Ejecuta la búsqueda hasta agotar los motores o hasta stop().
+        Devuelve todas las URLs; SearchError si no hay ninguna y algún motor
+        falló, Cancelled si se canceló.
+        """
+        try:
+            selected = select_providers(self.engine, self.options)
+        except KeyError:
+            raise SearchError(f"Motor de búsqueda desconocido: {self.engine}") from None
+        if not selected:
+            raise SearchError("No hay ningún motor de búsqueda disponible")
+
+        self._engine_count = len(selected)
+        errors: list[str] = []
+        for provider in selected:
+            ignored = provider.unsupported(self.options)
+            if ignored:
+                print(f"[Search] {provider.NAME} no aplica los filtros: {', '.join(ignored)}")
+
+        with ThreadPoolExecutor(max_workers=len(selected)) as pool:
+            futures = {
+                pool.submit(
+                    self._run_engine, ProviderRun(self, provider, self.token.child())
+                ): provider
+                for provider in selected
+            }
+            for future in as_completed(futures):
+                provider = futures[future]
+                try:
+                    future.result()
+                except Cancelled:
+                    if not self.token.cancelled:
+                        errors.append(
+                            f"{provider.NAME}: sin respuesta en {provider.DEADLINE:.0f}s"
+                        )
+                except Exception as e:
+                    errors.append(f"{provider.NAME}: {e}")
+
+        self.token.raise_if_cancelled()
+        for message in errors:
+            print(f"[Search] {message}")
+        with self._lock:
+            merged = list(self._merged)
+        if not merged and errors:
+            raise SearchError("; ".join(errors))
+        return merged
+
+    def _run_engine(self, run: ProviderRun):
+        """Consume los lotes de un proveedor (en su hilo) hasta que se agota."""
+        try:
+            for batch in run.provider.search(run):
+                batch = [url for url in batch if url not in run.own]
+                run.own.update(batch)
+                self._merge(batch)
+        finally:
+            with self._lock:
+                self._done += 1
+                self._check_idle()
+
+    def _merge(self, batch: list[str]):
+        """Añade un lote al resultado global y avisa de las URLs nuevas."""
+        with self._lock:
+            fresh = [url for url in batch if url not in self._seen]
+            self._seen.update(fresh)
+            self._merged.extend(fresh)
+        if fresh and self.on_found and not self.token.cancelled:
+            self.on_found(fresh)
+
+    # ── Demanda (hilos de los motores) ───────────────────────────────
+    def _wait_for_demand(self, token: CancelToken) -> bool:
+        """Bloquea hasta que se pidan más resultados; False si se cancela o se para."""
+        with self._lock:
+            self._waiting += 1
+            self._check_idle()
+            try:
+                while len(self._merged) >= self._wanted and not self._stopped:
+                    if token.cancelled:
+                        return False
+                    self._lock.wait(DEMAND_POLL)
+            finally:
+                self._waiting -= 1
+            return not token.cancelled and not self._stopped
+
+    def _check_idle(self):
+        """Avisa con on_ready cuando todos los motores esperan o han terminado."""
+        if self._done == self._engine_count or self._idle_emitted:
+            return
+        if len(self._merged) < self._wanted:
+            return  # hay demanda pendiente: los motores en espera van a seguir
+        if self._waiting + self._done == self._engine_count:
+            self._idle_emitted = True
+            if self.on_ready and not self.token.cancelled:
+                self.on_ready(len(self._merged))
+
+
+# ── API asíncrona ────────────────────────────────────────────────────
+async def search(
+    query: str,
+    engine: str = FEDERATED,
+    options: Optional[dict] = None,
+    limit: Optional[int] = None,
+    token: Optional[CancelToken] = None,
+    page_size: int = MORE_RESULTS,
+) -> AsyncIterator[list[str]]:
+    """
+    Lotes de URLs nuevas según llegan, hasta `limit` o hasta agotar los
+    motores. Las páginas siguientes solo se piden cuando quien itera pide
+    más lotes. Lanza SearchError o Cancelled como SearchSession.run().
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    # Token propio: al dejar de iterar se cancela la búsqueda, no el del llamador
+    session_token = token.child() if token is not None else CancelToken()
+    session = SearchSession(
+        query, engine, options or {},
+        on_found=lambda urls: loop.call_soon_threadsafe(events.put_nowait, ("found", urls)),
+        on_ready=lambda total: loop.call_soon_threadsafe(events.put_nowait, ("ready", total)),
+        token=session_token,
+    )
+    running = loop.run_in_executor(None, session.run)
+    running.add_done_callback(lambda _: events.put_nowait(("done", None)))
+
+    sent = 0
+    try:
+        while True:
+            kind, value = await events.get()
+            if kind == "found":
+                batch = value if limit is None else value[:limit - sent]
+                if batch:
+                    sent += len(batch)
+                    yield batch
+                if limit is not None and sent >= limit:
+                    return
+            elif kind == "ready":
+                wanted = page_size if limit is None else min(page_size, limit - sent)
+                session.fetch_more(wanted)
+            else:
+                if token is not None:
+                    token.raise_if_cancelled()
+                running.result()  # SearchError o Cancelled
+                return
+    finally:
+        if not running.done():
+            session.cancel()
+        with suppress(Cancelled, SearchError):
+            await running
+
+
+async def collect(
+    query: str,
+    engine: str,
+    options: dict,
+    limit: int,
+    token: Optional[CancelToken] = None,
+) -> list[str]:
+    """Busca hasta reunir `limit` URLs o agotar los motores."""
+    urls: list[str] = []
+    async for batch in search(query, engine, options, limit, token):
+        urls.extend(batch)
+    return urls
@@ -0,0 +1,64 @@
+"""
+Cancelación de las descargas de core/download.py.
+
+Uso:
+    python -m pytest tests
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.download import DOWNLOAD_CANCELLED, download  # noqa: E402
+from workers import gallery_index  # noqa: E402
+from workers.cancellation import CancelToken  # noqa: E402
+
+URLS = [f"http://example.invalid/{i}.jpg" for i in range(20)]
+
+
+class _NoNetwork:
+    """Cliente que falla si alguna descarga llega a pedir algo."""
+
+    def stream(self, method, url):
+        raise AssertionError(f"No debería descargarse {url}")
+
+
+def _fill_folder(folder, count):
+    for i in range(count):
+        with open(os.path.join(folder, f"img_{i}.jpg"), "wb") as f:
+            f.write(b"\xff\xd8\xff" + os.urandom(64))
+
+
+def test_cancel_during_refresh(tmp_path, monkeypatch):
+    _fill_folder(tmp_path, 10)
+    token = CancelToken()
+    hashed = []
+    original_hash = gallery_index.content_hash
+
+    def hash_and_cancel(path):
+        # Se cancela mientras se indexa el primer archivo de la carpeta
+        hashed.append(path)
+        token.cancel()
+        return original_hash(path)
+
+    monkeypatch.setattr(gallery_index, "content_hash", hash_and_cancel)
+    results = asyncio.run(download(URLS, str(tmp_path), "test", token=token, client=_NoNetwork()))
+
+    assert len(hashed) == 1
+    assert [r["url"] for r in results] == URLS
+    assert all(r["status"] == DOWNLOAD_CANCELLED for r in results)
+
+
+def test_cancel_before_start(tmp_path):
+    token = CancelToken()
+    token.cancel()
+    seen = []
+    results = asyncio.run(download(
+        URLS, str(tmp_path), "test",
+        on_result=lambda index, result: seen.append(index),
+        token=token, client=_NoNetwork(), dedup=False,
+    ))
+
+    assert sorted(seen) == list(range(len(URLS)))
+    assert all(r["status"] == DOWNLOAD_CANCELLED for r in results)
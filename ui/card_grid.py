@@ -0,0 +1,226 @@
+"""
+Base común de las rejillas de tarjetas virtualizadas (model/view).
+
+ThumbnailListModel guarda en la PixmapCache compartida las miniaturas que
+entrega un ThumbnailPool y solo las pide para las filas que la vista
+necesita. CardGridView es un QListView en modo icono que calcula qué filas
+están visibles, pide sus miniaturas (más una parte de la siguiente
+pantalla) y cancela las pendientes que quedan lejos del área visible.
+Si el modelo admite fetchMore(), la vista lo llama al acercarse al final.
+"""
+import itertools
+from typing import Optional
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QSize, Qt, QTimer
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QListView
+
+from ui.cards import THUMB_FAILED, THUMB_LOADING, THUMB_READY
+from ui.pixmap_cache import PixmapCache
+from workers.thumbnail_cache import original_size
+from workers.thumbnail_pool import ThumbnailPool
+
+ThumbStateRole = Qt.UserRole + 100
+
+
+class ThumbnailListModel(QAbstractListModel):
+    """
+    Modelo de lista con miniaturas bajo demanda.
+
+    Las subclases indican el tamaño (THUMB_SIZE), el origen que se pide al
+    pool para cada fila (_thumb_source) y la clave en la caché (_cache_key).
+    """
+
+    THUMB_SIZE: tuple[int, int] = (0, 0)
+
+    def __init__(self, pool: ThumbnailPool, pixmaps: PixmapCache, parent=None):
+        super().__init__(parent)
+        self._pool = pool
+        self._pixmaps = pixmaps
+        # Peticiones al pool por fila, con su propio número: al insertar o
+        # quitar filas basta con renumerar las filas, sin cancelar nada
+        self._pending: dict[int, int] = {}    # fila -> petición
+        self._requests: dict[int, int] = {}   # petición -> fila
+        self._ids = itertools.count()
+        self._failed: set[int] = set()
+
+        pool.image_loaded.connect(self._on_loaded)
+        pool.failed.connect(self._on_failed)
+
+    # ── A implementar por las subclases ──────────────────────────────
+    def _thumb_source(self, row: int) -> str:
+        raise NotImplementedError
+
+    def _cache_key(self, row: int) -> str:
+        raise NotImplementedError
+
+    # ── Estado de las miniaturas ─────────────────────────────────────
+    def _reset_thumbnails(self):
+        """Descarta lo pendiente. Llamar dentro de begin/endResetModel."""
+        self._pool.cancel_all()
+        self._pending.clear()
+        self._requests.clear()
+        self._failed.clear()
+
+    def _shift_thumbnails(self, row: int, delta: int):
+        """
+        Ajusta el estado tras insertar (delta > 0) o quitar (delta < 0) filas
+        en `row`: solo se cancelan las peticiones de las filas quitadas; las
+        demás siguen en curso con su fila renumerada. Llamar entre
+        begin/endInsertRows o begin/endRemoveRows.
+        """
+        removed = range(row, row - delta) if delta < 0 else range(0)
+        for gone in removed:
+            self._drop_request(gone)
+        self._pending = {r + delta if r >= row else r: req for r, req in self._pending.items()}
+        self._requests = {req: r for r, req in self._pending.items()}
+        self._failed = {r + delta if r >= row else r for r in self._failed if r not in removed}
+
+    def _forget_thumbnail(self, row: int):
+        """La miniatura de la fila ya no vale (el archivo ha cambiado)."""
+        self._failed.discard(row)
+        self._drop_request(row)
+
+    def _drop_request(self, row: int):
+        """Cancela la petición pendiente de una fila, si la hay."""
+        request = self._pending.pop(row, None)
+        if request is not None:
+            del self._requests[request]
+            self._pool.cancel(request)
+
+    def _needs_request(self, row: int) -> bool:
+        """La fila tiene que pasar por el pool (por defecto: si no está en la caché)."""
+        return self.thumbnail(row) is None
+
+    def thumbnail(self, row: int) -> Optional[QPixmap]:
+        cached = self._pixmaps.get(self._cache_key(row), self.THUMB_SIZE)
+        return cached.pixmap if cached else None
+
+    def thumb_state(self, row: int) -> str:
+        if row in self._failed:
+            return THUMB_FAILED
+        if self._pixmaps.get(self._cache_key(row), self.THUMB_SIZE):
+            return THUMB_READY
+        return THUMB_LOADING
+
+    def thumbnail_data(self, row: int, role: int):
+        """Roles de miniatura comunes; None si el rol no es de miniatura."""
+        if role == Qt.DecorationRole:
+            pixmap = self.thumbnail(row)
+            if self._needs_request(row):
+                self.request_rows(row, row)
+            return pixmap
+        if role == ThumbStateRole:
+            return self.thumb_state(row)
+        return None
+
+    def request_rows(self, first: int, last: int, priority: int = 0):
+        """Pide las miniaturas de un rango de filas que aún no estén listas."""
+        last = min(last, self.rowCount() - 1)
+        for row in range(max(first, 0), last + 1):
+            if row in self._pending or row in self._failed:
+                continue
+            if not self._needs_request(row):
+                continue
+            request = next(self._ids)
+            self._pending[row] = request
+            self._requests[request] = row
+            self._pool.request(
+                self._thumb_source(row), request, priority=priority, size=self.THUMB_SIZE
+            )
+
+    def retain_rows(self, first: int, last: int):
+        """Cancela las peticiones pendientes fuera del rango indicado."""
+        for row in [r for r in self._pending if r < first or r > last]:
+            self._drop_request(row)
+
+    def _on_loaded(self, image: QImage, request: int):
+        row = self._requests.pop(request, None)
+        if row is None:
+            return
+        del self._pending[row]
+        pixmap = QPixmap.fromImage(image)
+        self._pixmaps.put(self._cache_key(row), self.THUMB_SIZE, pixmap, original_size(image))
+        self._emit_thumb_changed(row)
+
+    def _on_failed(self, request: int):
+        row = self._requests.pop(request, None)
+        if row is None:
+            return
+        del self._pending[row]
+        self._failed.add(row)
+        self._emit_thumb_changed(row)
+
+    def _emit_thumb_changed(self, row: int):
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DecorationRole, ThumbStateRole])
+
+
+class CardGridView(QListView):
+    """Rejilla virtualizada de tarjetas de tamaño fijo."""
+
+    CARD_SIZE = QSize(240, 280)
+    SPACING = 8
+    PREFETCH_SCREENS = 1.0  # pantallas por delante que se piden
+    RETAIN_SCREENS = 1.0    # pantallas alrededor que no se cancelan
+    FETCH_MORE_SCREENS = 1.0  # distancia al final a la que se piden más filas
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName("cardGrid")
+        self.setViewMode(QListView.IconMode)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setSpacing(self.SPACING)
+        self.setSelectionMode(QListView.NoSelection)
+        self.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.verticalScrollBar().setSingleStep(40)
+        self.setMouseTracking(True)
+
+        self._prefetch_timer = QTimer(self)
+        self._prefetch_timer.setSingleShot(True)
+        self._prefetch_timer.setInterval(50)
+        self._prefetch_timer.timeout.connect(self._prefetch)
+
+        self.verticalScrollBar().valueChanged.connect(self.schedule_prefetch)
+
+    def setModel(self, model):
+        super().setModel(model)
+        model.modelReset.connect(self.schedule_prefetch)
+        model.rowsInserted.connect(self.schedule_prefetch)
+        model.rowsRemoved.connect(self.schedule_prefetch)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.schedule_prefetch()
+
+    def schedule_prefetch(self, *_):
+        """Recalcula en breve qué miniaturas (y filas) hay que pedir."""
+        self._prefetch_timer.start()
+
+    def visible_rows(self) -> tuple[int, int]:
+        """Primera y última fila visibles (calculado sobre la rejilla uniforme)."""
+        cell_w = self.CARD_SIZE.width() + self.SPACING
+        cell_h = self.CARD_SIZE.height() + self.SPACING
+        viewport = self.viewport()
+        columns = max(1, (viewport.width() - self.SPACING) // cell_w)
+        first_line = max(0, self.verticalScrollBar().value() - self.SPACING) // cell_h
+        lines = viewport.height() // cell_h + 2
+        return first_line * columns, (first_line + lines) * columns - 1
+
+    def _prefetch(self):
+        model = self.model()
+        if not isinstance(model, ThumbnailListModel) or model.rowCount() == 0:
+            return
+        first, last = self.visible_rows()
+        span = last - first + 1
+        ahead = last + int(span * self.PREFETCH_SCREENS)
+        keep = int(span * self.RETAIN_SCREENS)
+        model.request_rows(first, last, priority=0)
+        model.request_rows(last + 1, ahead, priority=1)
+        model.retain_rows(first - keep, max(ahead, last + keep))
+
+        near_end = last + int(span * self.FETCH_MORE_SCREENS) >= model.rowCount()
+        if near_end and model.canFetchMore(QModelIndex()):
+            model.fetchMore(QModelIndex())
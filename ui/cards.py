@@ -0,0 +1,109 @@
+"""
+Dibujo de tarjetas de imagen con QPainter.
+
+Las vistas model/view (galería y resultados) no crean widgets por
+tarjeta: su delegate pinta directamente el fondo, la miniatura y los textos
+con estas funciones, imitando el aspecto de card_style().
+"""
+from typing import Optional
+
+from PyQt5.QtCore import QRect, QRectF, Qt
+from PyQt5.QtGui import QColor, QFont, QLinearGradient, QPainter, QPainterPath, QPen, QPixmap
+
+from ui.styles import (
+    ACCENT, BG_DARK, CARD_BOTTOM, CARD_HOVER_BOTTOM, CARD_HOVER_TOP, CARD_TOP,
+    SURFACE, SURFACE_BORDER, TEXT_MUTED,
+)
+
+# Estados de la miniatura
+THUMB_LOADING = "loading"
+THUMB_READY = "ready"
+THUMB_FAILED = "failed"
+
+
+def _rounded(rect: QRect, radius: float) -> QPainterPath:
+    path = QPainterPath()
+    path.addRoundedRect(QRectF(rect).adjusted(0.5, 0.5, -0.5, -0.5), radius, radius)
+    return path
+
+
+def paint_card(painter: QPainter, rect: QRect, hovered: bool, selected: bool = False):
+    """Fondo degradado y borde de la tarjeta."""
+    gradient = QLinearGradient(rect.topLeft(), rect.bottomLeft())
+    if hovered:
+        gradient.setColorAt(0, QColor(CARD_HOVER_TOP))
+        gradient.setColorAt(1, QColor(CARD_HOVER_BOTTOM))
+    else:
+        gradient.setColorAt(0, QColor(CARD_TOP))
+        gradient.setColorAt(1, QColor(CARD_BOTTOM))
+
+    border = QColor(ACCENT) if hovered or selected else QColor(SURFACE_BORDER)
+    painter.setPen(QPen(border, 2 if selected else 1))
+    painter.setBrush(gradient)
+    painter.drawPath(_rounded(rect, 16))
+
+
+def paint_thumbnail(
+    painter: QPainter,
+    rect: QRect,
+    pixmap: Optional[QPixmap],
+    state: str = THUMB_LOADING,
+):
+    """Contenedor de la imagen: miniatura centrada o placeholder (⏳ / ✕)."""
+    background = QColor(BG_DARK) if state == THUMB_FAILED else QColor(SURFACE)
+    painter.setPen(Qt.NoPen)
+    painter.setBrush(background)
+    painter.drawPath(_rounded(rect, 12))
+
+    if pixmap is not None and not pixmap.isNull():
+        x = rect.x() + (rect.width() - pixmap.width()) // 2
+        y = rect.y() + (rect.height() - pixmap.height()) // 2
+        painter.drawPixmap(x, y, pixmap)
+        return
+
+    font = QFont(painter.font())
+    font.setPixelSize(24 if state == THUMB_FAILED else 22)
+    painter.setFont(font)
+    painter.setPen(QColor(TEXT_MUTED))
+    painter.drawText(rect, Qt.AlignCenter, "✕" if state == THUMB_FAILED else "⏳")
+
+
+def paint_badge(painter: QPainter, rect: QRect, text: str, color: str):
+    """Etiqueta redondeada en la esquina superior izquierda de `rect`."""
+    font = QFont(painter.font())
+    font.setPixelSize(11)
+    font.setWeight(QFont.Bold)
+    painter.setFont(font)
+    width = painter.fontMetrics().horizontalAdvance(text) + 16
+    badge = QRect(rect.x() + 8, rect.y() + 8, min(width, rect.width() - 16), 22)
+    painter.setPen(Qt.NoPen)
+    painter.setBrush(QColor(color))
+    painter.drawRoundedRect(badge, 11, 11)
+    painter.setPen(QColor("#ffffff"))
+    painter.drawText(badge, Qt.AlignCenter, text)
+
+
+def paint_text(
+    painter: QPainter,
+    rect: QRect,
+    text: str,
+    color: str,
+    pixel_size: int,
+    align=Qt.AlignLeft | Qt.AlignVCenter,
+    weight: int = QFont.Normal,
+):
+    """Texto de una línea, recortado con «…» si no cabe."""
+    font = QFont(painter.font())
+    font.setPixelSize(pixel_size)
+    font.setWeight(weight)
+    painter.setFont(font)
+    painter.setPen(QColor(color))
+    elided = painter.fontMetrics().elidedText(text, Qt.ElideRight, rect.width())
+    painter.drawText(rect, align, elided)
+
+
+def format_size(num_bytes: float) -> str:
+    """Formatea un tamaño en bytes como KB o MB."""
+    if num_bytes > 1_000_000:
+        return f"{num_bytes / 1_000_000:.1f} MB"
+    return f"{num_bytes / 1000:.0f} KB"
@@ -0,0 +1,181 @@
+"""
+Galería local virtualizada (model/view).
+
+En lugar de crear un QFrame con sus QLabel por cada archivo, la galería es
+un QListView con un modelo de lista y un delegate que pinta las tarjetas.
+Los archivos nuevos, borrados o modificados se insertan, quitan o
+actualizan uno a uno (insert_file, remove_file), sin reconstruir el modelo.
+Solo se piden miniaturas para las filas visibles y para la siguiente
+pantalla (ver ui/card_grid.py). Las miniaturas viven en la PixmapCache
+compartida, acotada en bytes, así que la memoria no depende del número de
+archivos de la carpeta.
+"""
+import os
+from bisect import bisect_left
+from typing import Optional
+
+from PyQt5.QtCore import QModelIndex, QRect, Qt, pyqtSignal
+from PyQt5.QtGui import QFont, QPainter
+from PyQt5.QtWidgets import QStyle, QStyledItemDelegate
+
+from ui.card_grid import CardGridView, ThumbnailListModel, ThumbStateRole
+from ui.cards import format_size, paint_card, paint_text, paint_thumbnail
+from ui.pixmap_cache import PixmapCache, local_source
+from ui.styles import TEXT_MUTED, TEXT_SECONDARY
+from workers.thumbnail_cache import GALLERY_THUMB_SIZE
+from workers.thumbnail_pool import ThumbnailPool
+
+PathRole = Qt.UserRole + 1
+FileSizeRole = Qt.UserRole + 2
+
+
+class GalleryModel(ThumbnailListModel):
+    """Archivos de la carpeta de descargas; las miniaturas se piden bajo demanda."""
+
+    THUMB_SIZE = GALLERY_THUMB_SIZE
+
+    def __init__(self, pool: ThumbnailPool, pixmaps: PixmapCache, parent=None):
+        super().__init__(pool, pixmaps, parent)
+        self._folder = ""
+        self._files: list[str] = []                 # ordenados por nombre
+        self._sources: list[Optional[str]] = []     # clave de la caché de cada fila
+        self._sizes: list[Optional[int]] = []       # bytes de cada archivo (-1: error)
+
+    # ── Datos ────────────────────────────────────────────────────────
+    def set_files(self, folder: str, files: list[str], sizes: Optional[list[int]] = None):
+        """
+        Archivos de la carpeta; sizes (bytes de cada uno, del índice de la
+        galería) evita un stat() por fila al pintar.
+        """
+        self.beginResetModel()
+        self._reset_thumbnails()
+        self._folder = folder
+        self._files = list(files)
+        self._sources = [None] * len(self._files)
+        self._sizes = list(sizes) if sizes is not None else [None] * len(self._files)
+        self.endResetModel()
+
+    def insert_file(self, name: str, size: Optional[int] = None):
+        """Añade un archivo en su sitio; si ya estaba, lo actualiza."""
+        row = bisect_left(self._files, name)
+        if row < len(self._files) and self._files[row] == name:
+            self.update_file(name, size)
+            return
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._files.insert(row, name)
+        self._sources.insert(row, None)
+        self._sizes.insert(row, size)
+        self._shift_thumbnails(row, 1)
+        self.endInsertRows()
+
+    def remove_file(self, name: str):
+        row = self.row_of(name)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._files[row]
+        del self._sources[row]
+        del self._sizes[row]
+        self._shift_thumbnails(row, -1)
+        self.endRemoveRows()
+
+    def update_file(self, name: str, size: Optional[int] = None):
+        """El archivo ha cambiado: nueva miniatura y nuevo tamaño."""
+        row = self.row_of(name)
+        if row is None:
+            return
+        self._sources[row] = None
+        self._sizes[row] = size
+        self._forget_thumbnail(row)
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def row_of(self, name: str) -> Optional[int]:
+        row = bisect_left(self._files, name)
+        return row if row < len(self._files) and self._files[row] == name else None
+
+    def path(self, row: int) -> str:
+        return os.path.join(self._folder, self._files[row])
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._files)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._files):
+            return None
+        row = index.row()
+
+        if role == Qt.DisplayRole:
+            return self._files[row]
+        if role == PathRole:
+            return self.path(row)
+        if role == FileSizeRole:
+            return self._file_size(row)
+        return self.thumbnail_data(row, role)
+
+    def _thumb_source(self, row: int) -> str:
+        return self.path(row)
+
+    def _cache_key(self, row: int) -> str:
+        source = self._sources[row]
+        if source is None:
+            source = local_source(self.path(row))
+            self._sources[row] = source
+        return source
+
+    def _file_size(self, row: int) -> Optional[int]:
+        if self._sizes[row] is None:
+            try:
+                self._sizes[row] = os.path.getsize(self.path(row))
+            except OSError:
+                self._sizes[row] = -1
+        size = self._sizes[row]
+        return size if size >= 0 else None
+
+
+class GalleryDelegate(QStyledItemDelegate):
+    """Pinta una tarjeta de galería: miniatura, nombre y tamaño."""
+
+    PADDING = 12
+
+    def sizeHint(self, option, index):
+        return GalleryView.CARD_SIZE
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        card = QRect(option.rect.topLeft(), GalleryView.CARD_SIZE)
+        hovered = bool(option.state & QStyle.State_MouseOver)
+        paint_card(painter, card, hovered)
+
+        pad = self.PADDING
+        w, h = GALLERY_THUMB_SIZE
+        img_rect = QRect(card.x() + pad, card.y() + pad, w, h)
+        paint_thumbnail(painter, img_rect, index.data(Qt.DecorationRole), index.data(ThumbStateRole))
+
+        text_rect = QRect(card.x() + pad, img_rect.bottom() + 8, w, card.bottom() - img_rect.bottom() - 16)
+        size = index.data(FileSizeRole)
+        size_text = format_size(size) if size is not None else ""
+        size_width = 60 if size_text else 0
+        if size_text:
+            paint_text(
+                painter, text_rect, size_text, TEXT_MUTED, 10,
+                Qt.AlignRight | Qt.AlignVCenter,
+            )
+        name_rect = text_rect.adjusted(0, 0, -size_width, 0)
+        paint_text(painter, name_rect, index.data(Qt.DisplayRole), TEXT_SECONDARY, 11, weight=QFont.Medium)
+
+        painter.restore()
+
+
+class GalleryView(CardGridView):
+    """Rejilla de la galería; al pulsar una tarjeta emite su ruta."""
+
+    image_activated = pyqtSignal(str)  # ruta del archivo pulsado
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setCursor(Qt.PointingHandCursor)
+        self.setItemDelegate(GalleryDelegate(self))
+        self.clicked.connect(lambda index: self.image_activated.emit(index.data(PathRole)))
@@ -5,31 +5,46 @@ Interfaz premium con glassmorphism, gradientes y micro-animaciones.
 import sys
 import os
 import webbrowser
+from functools import partial
+from typing import Optional
 
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton,
-    QLabel, QScrollArea, QGridLayout, QCheckBox, QMessageBox,
+    QLabel, QGridLayout, QCheckBox, QMessageBox,
     QFrame, QDialog, QDialogButtonBox, QTabWidget, QComboBox,
     QMenuBar, QProgressBar, QSlider, QAction, QApplication,
     QGraphicsDropShadowEffect, QSizePolicy, QSpacerItem,
 )
 from PyQt5.QtGui import (
-    QPixmap, QCursor, QDesktopServices, QColor, QPainter,
+    QPixmap, QImage, QCursor, QDesktopServices, QColor, QPainter,
     QLinearGradient, QFont, QIcon,
 )
-from PyQt5.QtCore import Qt, QUrl, QTimer, QSize, QPropertyAnimation, QEasingCurve
+from PyQt5.QtCore import (
+    Qt, QUrl, QTimer, QPropertyAnimation, QEasingCurve, QFileSystemWatcher,
+)
 
 from ui.styles import (
     GLOBAL_STYLESHEET, ACCENT, ACCENT_LIGHT, ACCENT_GLOW, CYAN, ROSE, AMBER,
-    TEXT, TEXT_SECONDARY, TEXT_MUTED, BG, BG_DARK, BG_ELEVATED, BG_DEEPEST,
-    SURFACE, SURFACE_LIGHT, SURFACE_HOVER, SURFACE_BORDER,
+    TEXT, TEXT_SECONDARY, TEXT_MUTED, BG, BG_ELEVATED, BG_DEEPEST,
+    SURFACE, SURFACE_LIGHT, SURFACE_BORDER,
     STATUS_COLORS, STATUS_ICONS, GRADIENT_ACCENT,
-    card_style, status_style, dialog_style, header_style,
-    search_card_placeholder_style, gallery_empty_style,
+    status_style, dialog_style, header_style, gallery_empty_style,
     badge_style, separator_style,
 )
+from ui.cards import format_size
+from ui.gallery_view import GalleryModel, GalleryView
+from ui.pixmap_cache import CachedPixmap, PixmapCache, local_source
+from ui.results_view import ResultsModel, ResultsView
+from ui.slide_buffer import SlideBuffer
+from workers.providers import AUTO, FEDERATED, providers
 from workers.search_worker import SearchWorker
-from workers.download_worker import ImageDownloader, ThumbnailLoader
+from workers.download_worker import ImageDownloader
+from workers.gallery_index import GalleryChanges, GalleryIndex, get_gallery_index
+from workers.gallery_worker import GalleryIndexWorker
+from workers.perceptual_hash import DEFAULT_KIND
+from workers.thumbnail_pool import ThumbnailPool
+from workers.thumbnail_cache import original_size, read_local_image, scale_image
+from workers import http_session
 
 
 def _shadow(widget, blur=30, offset_y=8, color="#00000060"):
@@ -55,6 +70,16 @@ class MainWindow(QWidget):
     """Ventana principal premium de la aplicación."""
 
     IMG_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp")
+    THUMB_WORKERS = 6      # hilos del pool de miniaturas
+    GALLERY_WORKERS = 2    # hilos que decodifican la galería local
+    SLIDE_WORKERS = 2      # hilos que preparan las diapositivas siguientes
+    SLIDES_AHEAD = 3       # diapositivas decodificadas por adelantado
+    DOWNLOAD_WORKERS = 6   # descargas simultáneas
+    DOWNLOADS_PER_HOST = 2 # descargas simultáneas a un mismo host
+    DETAILS_SIZE = (560, 420)
+    MORE_RESULTS = 100     # resultados por cada página adicional pedida
+    WATCH_DELAY_MS = 400   # espera tras un cambio en la carpeta antes de sincronizar
+    INCREMENTAL_LIMIT = 500  # cambios a partir de los que se recarga la galería entera
 
     def __init__(self):
         super().__init__()
@@ -62,13 +87,45 @@ class MainWindow(QWidget):
         self.resize(1480, 920)
 
         # ── Estado interno ───────────────────────────────────────────
-        self.image_checkboxes: list[QCheckBox] = []
-        self.image_urls: list[str] = []
-        self._thumb_workers: list[ThumbnailLoader] = []
         self.current_search = ""
+        self._search_worker: Optional[SearchWorker] = None
+        self._retired_searches: list[SearchWorker] = []  # cancelados aún en marcha
+        self._dl_worker: Optional[ImageDownloader] = None
+        self._index_worker: Optional[GalleryIndexWorker] = None
+        self._index_stale = False  # la galería cambió mientras se indexaba
+        self._index_rebuild = False  # la próxima indexación rehace el índice perceptual
         self.download_folder = os.path.join(os.path.dirname(__file__), "..", "Imagenes")
         self.download_folder = os.path.abspath(self.download_folder)
 
+        # Imágenes decodificadas (galería y detalles)
+        self._pixmaps = PixmapCache()
+
+        # Pool de miniaturas de resultados (un número fijo de hilos), que
+        # también calcula su hash perceptual para agrupar los casi duplicados
+        self._thumb_pool = ThumbnailPool(self.THUMB_WORKERS, self, hash_kind=DEFAULT_KIND)
+
+        # Vista de detalles de un resultado, solo al pulsar «Ver»
+        self._original_pool = ThumbnailPool(1, self)
+        self._original_pool.image_loaded.connect(self._on_original_loaded)
+        self._original_pool.failed.connect(self._on_original_failed)
+
+        # Miniaturas de la galería local (decodificadas fuera del hilo principal)
+        self._gallery_pool = ThumbnailPool(self.GALLERY_WORKERS, self)
+
+        # Slideshow: las siguientes diapositivas, ya decodificadas y escaladas
+        self._slide_pool = ThumbnailPool(self.SLIDE_WORKERS, self, disk_cache=False)
+        self._slides = SlideBuffer(self._slide_pool, self)
+        self._slides.ready.connect(self._on_slide_ready)
+        self._slides.failed.connect(self._on_slide_failed)
+
+        # Cambios hechos en la carpeta desde fuera (varios seguidos, una sincronización)
+        self._gallery_watcher = QFileSystemWatcher(self)
+        self._watch_timer = QTimer(self)
+        self._watch_timer.setSingleShot(True)
+        self._watch_timer.setInterval(self.WATCH_DELAY_MS)
+        self._watch_timer.timeout.connect(partial(self._refresh_gallery_index, False))
+        self._gallery_watcher.directoryChanged.connect(lambda _path: self._watch_timer.start())
+
         # ── Estilo ───────────────────────────────────────────────────
         self.setStyleSheet(GLOBAL_STYLESHEET)
 
@@ -234,7 +291,10 @@ class MainWindow(QWidget):
         search_row.setSpacing(12)
 
         self.search_type = QComboBox()
-        self.search_type.addItems(["Google", "Bing", "DuckDuckGo"])
+        self.search_type.addItem("Todos los motores", FEDERATED)
+        self.search_type.addItem("Automático", AUTO)
+        for provider in providers():
+            self.search_type.addItem(provider.LABEL, provider.NAME)
         self.search_type.setMinimumHeight(48)
         search_row.addWidget(self.search_type)
 
@@ -337,17 +397,13 @@ class MainWindow(QWidget):
         self.progress_bar.hide()
         rp_layout.addWidget(self.progress_bar)
 
-        # Grid de resultados
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.results_container = QWidget()
-        self.results_container.setStyleSheet("background: transparent;")
-        self.results_grid = QGridLayout()
-        self.results_grid.setSpacing(16)
-        self.results_grid.setContentsMargins(0, 8, 0, 8)
-        self.results_container.setLayout(self.results_grid)
-        self.scroll_area.setWidget(self.results_container)
-        rp_layout.addWidget(self.scroll_area)
+        # Rejilla virtualizada de resultados
+        self.results_model = ResultsModel(self._thumb_pool, self._pixmaps, self)
+        self.results_view = ResultsView()
+        self.results_view.setModel(self.results_model)
+        self.results_view.details_requested.connect(self._request_original)
+        self.results_model.more_requested.connect(self._load_more_results)
+        rp_layout.addWidget(self.results_view)
 
         layout.addWidget(results_panel)
 
@@ -426,23 +482,55 @@ class MainWindow(QWidget):
 
         layout.addWidget(toolbar)
 
-        # Grid de galería
-        self.gallery_scroll = QScrollArea()
-        self.gallery_scroll.setWidgetResizable(True)
-        self.gallery_container = QWidget()
-        self.gallery_container.setStyleSheet("background: transparent;")
-        self.gallery_grid = QGridLayout()
-        self.gallery_grid.setSpacing(16)
-        self.gallery_grid.setContentsMargins(4, 8, 4, 8)
-        self.gallery_container.setLayout(self.gallery_grid)
-        self.gallery_scroll.setWidget(self.gallery_container)
-        layout.addWidget(self.gallery_scroll)
+        # Rejilla virtualizada de galería
+        self.gallery_model = GalleryModel(self._gallery_pool, self._pixmaps, self)
+        self.gallery_view = GalleryView()
+        self.gallery_view.setModel(self.gallery_model)
+        self.gallery_view.image_activated.connect(self._open_local_details)
+        layout.addWidget(self.gallery_view, 1)
+
+        self.gallery_empty = self._build_gallery_empty()
+        self.gallery_empty.hide()
+        layout.addWidget(self.gallery_empty, 1, Qt.AlignTop)
 
         # Slideshow timer
         self.slideshow_timer = QTimer()
+        self.slideshow_timer.setTimerType(Qt.PreciseTimer)
         self.slideshow_timer.timeout.connect(self._next_slideshow_image)
         self.slideshow_active = False
         self.current_slideshow_index = 0
+        self._ss_current: Optional[str] = None   # archivo que se está mostrando
+        self._ss_waiting: Optional[str] = None   # ruta que aún se está decodificando
+
+    @staticmethod
+    def _build_gallery_empty() -> QFrame:
+        empty_widget = QFrame()
+        empty_widget.setStyleSheet(f"""
+            QFrame {{
+                background: {BG_ELEVATED};
+                border-radius: 20px;
+                border: 2px dashed {SURFACE_BORDER};
+            }}
+        """)
+        empty_widget.setMinimumHeight(300)
+        el = QVBoxLayout(empty_widget)
+        el.setAlignment(Qt.AlignCenter)
+
+        icon = QLabel("🖼")
+        icon.setStyleSheet("font-size: 48px; background: transparent;")
+        icon.setAlignment(Qt.AlignCenter)
+        el.addWidget(icon)
+
+        msg = QLabel("Tu galería está vacía")
+        msg.setStyleSheet(f"font-size: 18px; font-weight: 700; color: {TEXT}; background: transparent;")
+        msg.setAlignment(Qt.AlignCenter)
+        el.addWidget(msg)
+
+        hint = QLabel("Busca y descarga imágenes para empezar tu colección")
+        hint.setStyleSheet(f"font-size: 13px; color: {TEXT_MUTED}; background: transparent;")
+        hint.setAlignment(Qt.AlignCenter)
+        el.addWidget(hint)
+        return empty_widget
 
     # ══════════════════════════════════════════════════════════════════
     #  PESTAÑA ACERCA DE
@@ -589,42 +677,111 @@ class MainWindow(QWidget):
             "color": self.color_combo.currentText(),
             "safe": self.safe_search.isChecked(),
         }
-        engine = self.search_type.currentText().lower()
+        engine = self.search_type.currentData()
+
+        self._cancel_search()
+        self._clear_results()
+        self.results_count.hide()
+        worker = SearchWorker(query, engine, options)
+        worker.found.connect(partial(self._on_worker_found, worker))
+        worker.ready.connect(partial(self._on_worker_ready, worker))
+        worker.finished.connect(partial(self._on_worker_done, worker))
+        worker.error.connect(partial(self._on_worker_error, worker))
+        self._search_worker = worker
+        worker.start()
+
+    def _cancel_search(self):
+        """Aborta la búsqueda en curso; sus señales tardías se ignoran."""
+        self._retired_searches = [w for w in self._retired_searches if w.isRunning()]
+        worker = self._search_worker
+        self._search_worker = None
+        if worker is not None and worker.isRunning():
+            worker.cancel()
+            # Se conserva la referencia hasta que el hilo termine
+            self._retired_searches.append(worker)
+
+    def _on_worker_found(self, worker: SearchWorker, images: list[str]):
+        if worker is self._search_worker:
+            self._on_search_results(images)
+
+    def _on_worker_ready(self, worker: SearchWorker, total: int):
+        if worker is self._search_worker:
+            self._on_search_ready()
+
+    def _on_worker_done(self, worker: SearchWorker, images: list[str]):
+        if worker is self._search_worker:
+            self._search_worker = None
+            self._on_search_done(images)
+
+    def _on_worker_error(self, worker: SearchWorker, msg: str):
+        if worker is self._search_worker:
+            self._search_worker = None
+            self._on_search_error(msg)
+
+    def _on_search_results(self, images: list[str]):
+        """Encola un lote de resultados mientras la búsqueda continúa."""
+        self.results_model.enqueue(images)
+        total = self._results_total()
+        self.results_count.setText(f"  {total}  ")
+        self.results_count.show()
+        self._show_status(
+            f"{total} imágenes encontradas para «{self._short_query()}»...", "loading"
+        )
+
+    def _on_search_ready(self):
+        """La búsqueda espera: hay más páginas que se piden al hacer scroll."""
+        self.search_btn.setEnabled(True)
+        self.search_btn.setText("🚀  Buscar")
+        self.progress_bar.hide()
+        total = self._results_total()
+        if total:
+            self._show_status(
+                f"{total} imágenes encontradas para «{self._short_query()}» · "
+                "desplázate para cargar más",
+                "success",
+            )
+        self.results_model.set_can_fetch_more(True)
+        self.results_view.schedule_prefetch()
 
-        self._search_worker = SearchWorker(query, engine, options)
-        self._search_worker.finished.connect(self._on_search_done)
-        self._search_worker.error.connect(self._on_search_error)
-        self._search_worker.start()
+    def _load_more_results(self):
+        if self._search_worker is None:
+            return
+        self._show_status("Cargando más resultados...", "loading")
+        self._search_worker.fetch_more(self.MORE_RESULTS)
 
     def _on_search_done(self, images: list[str]):
         self.search_btn.setEnabled(True)
         self.search_btn.setText("🚀  Buscar")
-        self._clear_results()
-        self.image_urls = []
-        self.image_checkboxes = []
+        self.results_model.set_can_fetch_more(False)
 
-        if not images:
+        # Lo que no haya llegado ya con found() (el modelo ignora repetidos)
+        self.results_model.enqueue(images)
+
+        total = self._results_total()
+        if not total:
             self._show_status("No se encontraron resultados. Prueba otra búsqueda.", "warning")
             self.results_count.hide()
             self.progress_bar.hide()
             return
 
-        total = len(images)
-        for idx, url in enumerate(images):
-            self._add_image_card(url, idx)
-            self.image_urls.append(url)
-            self.progress_bar.setValue((idx + 1) * 100 // total)
+        self.progress_bar.setValue(100)
 
         # Actualizar badge de resultados
         self.results_count.setText(f"  {total}  ")
         self.results_count.show()
 
+        self._show_status(f"{total} imágenes encontradas para «{self._short_query()}»", "success")
+
+        QTimer.singleShot(500, lambda: self.progress_bar.hide())
+
+    def _results_total(self) -> int:
+        return self.results_model.rowCount() + self.results_model.pending_count()
+
+    def _short_query(self) -> str:
         display = self.current_search
         if len(display) > 25:
             display = display[:22] + "..."
-        self._show_status(f"{total} imágenes encontradas para «{display}»", "success")
-
-        QTimer.singleShot(500, lambda: self.progress_bar.hide())
+        return display
 
     def _on_search_error(self, msg: str):
         self.search_btn.setEnabled(True)
@@ -636,121 +793,33 @@ class MainWindow(QWidget):
     #  TARJETAS DE RESULTADOS
     # ═════════════════════════════════════════════════════════════════
 
-    def _add_image_card(self, image_url: str, index: int):
-        """Crea una tarjeta premium con placeholder y carga la miniatura."""
-        row, col = divmod(index, 4)
-
-        card = QFrame()
-        card.setStyleSheet(card_style())
-        card.setFixedSize(260, 300)
-
-        card_layout = QVBoxLayout()
-        card_layout.setContentsMargins(12, 12, 12, 12)
-        card_layout.setSpacing(10)
-
-        # Contenedor de imagen con fondo oscuro
-        img_container = QFrame()
-        img_container.setFixedSize(236, 200)
-        img_container.setStyleSheet(f"""
-            QFrame {{
-                background: {SURFACE};
-                border-radius: 12px;
-                border: none;
-            }}
-        """)
-        img_inner = QVBoxLayout(img_container)
-        img_inner.setContentsMargins(0, 0, 0, 0)
-
-        img_label = QLabel("⏳")
-        img_label.setAlignment(Qt.AlignCenter)
-        img_label.setFixedSize(236, 200)
-        img_label.setStyleSheet(search_card_placeholder_style())
-        img_inner.addWidget(img_label)
-
-        # Fila inferior: checkbox + botón
-        bottom_row = QHBoxLayout()
-        bottom_row.setSpacing(8)
-
-        checkbox = QCheckBox("Seleccionar")
-        checkbox.setCursor(QCursor(Qt.PointingHandCursor))
-        checkbox.setStyleSheet(f"font-size: 12px; background: transparent;")
-
-        details_btn = QPushButton("🔍 Ver")
-        details_btn.setCursor(QCursor(Qt.PointingHandCursor))
-        details_btn.setEnabled(False)
-        details_btn.setFixedWidth(80)
-        details_btn.setStyleSheet(f"""
-            QPushButton {{
-                font-size: 12px; padding: 6px 10px;
-                min-width: 60px; border-radius: 8px;
-                background: {SURFACE}; color: {TEXT_SECONDARY};
-                border: 1px solid {SURFACE_BORDER};
-            }}
-            QPushButton:hover {{
-                background: {SURFACE_HOVER}; color: {TEXT};
-                border: 1px solid {ACCENT};
-            }}
-            QPushButton:disabled {{
-                color: {TEXT_MUTED}; background: {BG_ELEVATED};
-                border: 1px solid {BG_ELEVATED};
-            }}
-        """)
-
-        bottom_row.addWidget(checkbox)
-        bottom_row.addStretch()
-        bottom_row.addWidget(details_btn)
-
-        # Clic en imagen alterna el checkbox
-        img_label.setCursor(QCursor(Qt.PointingHandCursor))
-        img_label.mousePressEvent = lambda ev, cb=checkbox: cb.setChecked(not cb.isChecked())
-
-        card_layout.addWidget(img_container)
-        card_layout.addLayout(bottom_row)
-        card.setLayout(card_layout)
+    def _request_original(self, url: str):
+        """Descarga el original para el diálogo de detalles."""
+        cached = self._pixmaps.get(url, self.DETAILS_SIZE)
+        if cached:
+            self._show_image_details(url, cached)
+            return
 
-        self.results_grid.addWidget(card, row, col)
-        self.image_checkboxes.append(checkbox)
+        self._pending_original = url
+        self._show_status("Cargando imagen original...", "loading")
+        self._original_pool.cancel_all()
+        self._original_pool.request(url, 0, size=self.DETAILS_SIZE)
 
-        # Cargar thumbnail en hilo (emite bytes, NO QPixmap)
-        worker = ThumbnailLoader(image_url, index)
-        worker.loaded.connect(
-            lambda data, idx, lbl=img_label, btn=details_btn, url=image_url:
-                self._on_thumb_loaded(data, lbl, btn, url)
-        )
-        worker.failed.connect(
-            lambda idx, lbl=img_label: self._on_thumb_failed(lbl)
+    def _on_original_loaded(self, image: QImage, _index: int):
+        self._show_status("Imagen cargada", "info")
+        url = self._pending_original
+        cached = self._pixmaps.put(
+            url, self.DETAILS_SIZE, QPixmap.fromImage(image), original_size(image)
         )
-        worker.start()
-        self._thumb_workers.append(worker)
-
-    def _on_thumb_loaded(self, data: bytes, label: QLabel, button: QPushButton, url: str):
-        """Slot en el hilo principal: crea QPixmap de los bytes recibidos."""
-        pixmap = QPixmap()
-        if pixmap.loadFromData(data):
-            label.setText("")
-            label.setStyleSheet(f"background: transparent; border-radius: 12px;")
-            label.setPixmap(pixmap.scaled(236, 200, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-            button.setEnabled(True)
-            button.clicked.connect(lambda: self._show_image_details(url, pixmap))
-
-    def _on_thumb_failed(self, label: QLabel):
-        label.setText("✕")
-        label.setStyleSheet(f"""
-            background: {BG_DARK}; border-radius: 12px;
-            color: {TEXT_MUTED}; font-size: 24px;
-        """)
+        self._show_image_details(url, cached)
+
+    def _on_original_failed(self, _index: int):
+        self._show_status("No se pudo cargar la imagen original", "error")
 
     def _clear_results(self):
-        for w in self._thumb_workers:
-            if w.isRunning():
-                w.quit()
-                w.wait(500)
-        self._thumb_workers.clear()
-
-        for i in reversed(range(self.results_grid.count())):
-            widget = self.results_grid.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
+        self._original_pool.cancel_all()
+        self.results_model.clear()
+        self.select_all_btn.setText("☑  Seleccionar todo")
         self.progress_bar.setValue(0)
 
     # ═════════════════════════════════════════════════════════════════
@@ -758,11 +827,7 @@ class MainWindow(QWidget):
     # ═════════════════════════════════════════════════════════════════
 
     def download_selected(self):
-        selected = [
-            self.image_urls[i]
-            for i, cb in enumerate(self.image_checkboxes)
-            if cb.isChecked()
-        ]
+        selected = self.results_model.checked_urls()
         if not selected:
             self._show_status("Selecciona al menos una imagen para descargar", "warning")
             return
@@ -774,20 +839,83 @@ class MainWindow(QWidget):
         self.progress_bar.show()
 
         prefix = self.current_search.replace(" ", "_")[:30]
-        self._dl_worker = ImageDownloader(selected, self.download_folder, prefix)
-        self._dl_worker.progress.connect(
-            lambda cur, tot: self.progress_bar.setValue(cur * 100 // tot)
+        self._dl_total = len(selected)
+        self._dl_done = 0
+        self._dl_fractions: dict[int, float] = {}
+        self._dl_duplicates = 0
+        self._dl_error: Optional[str] = None
+        self._dl_worker = ImageDownloader(
+            selected, self.download_folder, prefix,
+            max_workers=self.DOWNLOAD_WORKERS,
+            per_host=self.DOWNLOADS_PER_HOST,
+            query=self.current_search,
         )
+        self._dl_worker.file_progress.connect(self._on_file_progress)
+        self._dl_worker.file_saved.connect(self._on_file_saved)
+        self._dl_worker.progress.connect(self._on_download_progress)
+        self._dl_worker.speed.connect(self._on_download_speed)
+        self._dl_worker.duplicates.connect(self._on_download_duplicates)
+        self._dl_worker.error.connect(self._on_download_error)
         self._dl_worker.finished.connect(self._on_download_done)
         self._dl_worker.start()
 
+    def _on_file_saved(self, path: str, size: int):
+        """Cada descarga aparece en la galería en cuanto se guarda."""
+        if os.path.dirname(path) != self.download_folder:
+            return
+        self.gallery_model.insert_file(os.path.basename(path), size)
+        self._update_gallery_counters()
+
+    def _on_file_progress(self, index: int, received: int, expected: int):
+        if expected > 0:
+            self._dl_fractions[index] = min(received / expected, 1.0)
+            self._update_download_bar()
+
+    def _on_download_progress(self, done: int, total: int):
+        # Las descargas terminadas cuentan completas aunque no enviaran tamaño
+        self._dl_done = done
+        self._update_download_bar()
+
+    def _update_download_bar(self):
+        fractional = sum(self._dl_fractions.values())
+        value = max(self._dl_done, fractional) * 100 // max(self._dl_total, 1)
+        self.progress_bar.setValue(max(self.progress_bar.value(), int(value)))
+
+    def _on_download_speed(self, rate: float):
+        self._show_status(
+            f"Descargando {self._dl_total} imágenes · {format_size(rate)}/s",
+            "loading",
+        )
+
+    def _on_download_duplicates(self, count: int):
+        self._dl_duplicates = count
+
+    def _on_download_error(self, msg: str):
+        # finished llega justo después y es quien muestra el error
+        print(f"[Download] Error: {msg}")
+        self._dl_error = msg
+
     def _on_download_done(self, count: int):
         self.download_btn.setEnabled(True)
         self.download_btn.setText("📥  Descargar")
         self.progress_bar.hide()
-        if count > 0:
-            self._show_status(f"{count} imágenes descargadas correctamente", "success")
-            self.load_local_gallery()
+        skipped = (
+            f" · {self._dl_duplicates} ya estaban en la galería" if self._dl_duplicates else ""
+        )
+        if self._dl_error:
+            self._show_status(
+                f"La descarga se interrumpió ({count} guardadas): {self._dl_error}", "error"
+            )
+            if count > 0:
+                self._refresh_gallery_index(rebuild=False)
+        elif count > 0:
+            self._show_status(f"{count} imágenes descargadas correctamente{skipped}", "success")
+            # Ya están en la galería (file_saved); falta marcarlas como «ya la tienes»
+            self._refresh_gallery_index(rebuild=False)
+        elif self._dl_duplicates:
+            self._show_status(
+                f"Todas las imágenes ya estaban en la galería ({self._dl_duplicates})", "info"
+            )
         else:
             self._show_status("No se pudo descargar ninguna imagen", "error")
 
@@ -795,135 +923,91 @@ class MainWindow(QWidget):
     #  GALERÍA LOCAL
     # ═════════════════════════════════════════════════════════════════
 
-    def _get_gallery_files(self) -> list[str]:
-        os.makedirs(self.download_folder, exist_ok=True)
-        return sorted([
-            f for f in os.listdir(self.download_folder)
-            if f.lower().endswith(self.IMG_EXTENSIONS)
-        ])
+    def _gallery_index(self) -> GalleryIndex:
+        """Índice de la carpeta de descargas (ver workers/gallery_index.py)."""
+        return get_gallery_index(self.download_folder)
 
     def load_local_gallery(self):
         """Carga las imágenes descargadas en la galería."""
-        for i in reversed(range(self.gallery_grid.count())):
-            w = self.gallery_grid.itemAt(i).widget()
-            if w:
-                w.deleteLater()
-
-        image_files = self._get_gallery_files()
-        count = len(image_files)
+        self._show_gallery_files()
+        self._watch_gallery_folder()
+        self._refresh_gallery_index()
+
+    def _show_gallery_files(self):
+        """Lista la galería desde el índice, sin recorrer la carpeta."""
+        listing = self._gallery_index().listing()
+        self.gallery_model.set_files(
+            self.download_folder,
+            [name for name, _size in listing],
+            [size for _name, size in listing],
+        )
+        self._update_gallery_counters()
+        if listing:
+            self._show_status(f"Galería actualizada · {len(listing)} imágenes", "info")
 
-        # Actualizar contadores
+    def _update_gallery_counters(self):
+        count = self.gallery_model.rowCount()
         self.gallery_badge.setText(f"  {count}  ")
         self.gallery_counter.setText(f"📷 {count} imágenes")
-
-        if not image_files:
-            empty_widget = QFrame()
-            empty_widget.setStyleSheet(f"""
-                QFrame {{
-                    background: {BG_ELEVATED};
-                    border-radius: 20px;
-                    border: 2px dashed {SURFACE_BORDER};
-                }}
-            """)
-            empty_widget.setMinimumHeight(300)
-            el = QVBoxLayout(empty_widget)
-            el.setAlignment(Qt.AlignCenter)
-
-            icon = QLabel("🖼")
-            icon.setStyleSheet("font-size: 48px; background: transparent;")
-            icon.setAlignment(Qt.AlignCenter)
-            el.addWidget(icon)
-
-            msg = QLabel("Tu galería está vacía")
-            msg.setStyleSheet(f"font-size: 18px; font-weight: 700; color: {TEXT}; background: transparent;")
-            msg.setAlignment(Qt.AlignCenter)
-            el.addWidget(msg)
-
-            hint = QLabel("Busca y descarga imágenes para empezar tu colección")
-            hint.setStyleSheet(f"font-size: 13px; color: {TEXT_MUTED}; background: transparent;")
-            hint.setAlignment(Qt.AlignCenter)
-            el.addWidget(hint)
-
-            self.gallery_grid.addWidget(empty_widget, 0, 0, 1, 4)
+        self.gallery_empty.setVisible(not count)
+        self.gallery_view.setVisible(bool(count))
+
+    def _watch_gallery_folder(self):
+        if self.download_folder not in self._gallery_watcher.directories():
+            self._gallery_watcher.addPath(self.download_folder)
+
+    def _refresh_gallery_index(self, rebuild: bool = True):
+        """
+        Sincroniza el índice con la carpeta y, si hay imágenes nuevas o se
+        pide con rebuild, recalcula el índice perceptual para marcar los
+        resultados que ya están en la galería.
+        """
+        self._index_rebuild = self._index_rebuild or rebuild
+        if self._index_worker is not None:
+            self._index_stale = True
             return
-
-        for idx, filename in enumerate(image_files[:60]):
-            img_path = os.path.join(self.download_folder, filename)
-            try:
-                pixmap = QPixmap(img_path)
-                if pixmap.isNull():
-                    continue
-
-                card = QFrame()
-                card.setStyleSheet(card_style())
-                card.setFixedSize(240, 280)
-
-                cl = QVBoxLayout()
-                cl.setContentsMargins(12, 12, 12, 12)
-                cl.setSpacing(8)
-
-                # Container de imagen
-                img_container = QFrame()
-                img_container.setFixedSize(216, 190)
-                img_container.setStyleSheet(f"""
-                    QFrame {{
-                        background: {SURFACE};
-                        border-radius: 12px;
-                        border: none;
-                    }}
-                """)
-                ic_layout = QVBoxLayout(img_container)
-                ic_layout.setContentsMargins(0, 0, 0, 0)
-
-                img_label = QLabel()
-                img_label.setPixmap(pixmap.scaled(216, 190, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-                img_label.setAlignment(Qt.AlignCenter)
-                img_label.setStyleSheet("background: transparent;")
-                img_label.setCursor(QCursor(Qt.PointingHandCursor))
-                ic_layout.addWidget(img_label)
-
-                # Información del archivo
-                short = filename if len(filename) <= 22 else filename[:19] + "..."
-                name_label = QLabel(short)
-                name_label.setStyleSheet(f"""
-                    font-size: 11px; color: {TEXT_SECONDARY};
-                    background: transparent; font-weight: 500;
-                """)
-                name_label.setAlignment(Qt.AlignLeft)
-
-                # Tamaño del archivo
-                try:
-                    file_size = os.path.getsize(img_path)
-                    if file_size > 1_000_000:
-                        size_text = f"{file_size / 1_000_000:.1f} MB"
-                    else:
-                        size_text = f"{file_size / 1000:.0f} KB"
-                except Exception:
-                    size_text = ""
-
-                info_row = QHBoxLayout()
-                info_row.addWidget(name_label)
-                if size_text:
-                    size_label = QLabel(size_text)
-                    size_label.setStyleSheet(f"font-size: 10px; color: {TEXT_MUTED}; background: transparent;")
-                    info_row.addStretch()
-                    info_row.addWidget(size_label)
-
-                img_label.mousePressEvent = (
-                    lambda ev, p=img_path, pm=pixmap: self._show_image_details(p, pm)
-                )
-
-                cl.addWidget(img_container)
-                cl.addLayout(info_row)
-                card.setLayout(cl)
-
-                row, col = divmod(idx, 4)
-                self.gallery_grid.addWidget(card, row, col)
-
-            except Exception as e:
-                print(f"[Gallery] Error cargando {filename}: {e}")
-
-        self._show_status(f"Galería actualizada · {count} imágenes", "info")
+        self._index_stale = False
+        self._index_worker = GalleryIndexWorker(self.download_folder, self._index_rebuild)
+        self._index_rebuild = False
+        self._index_worker.synced.connect(self._on_gallery_synced)
+        self._index_worker.ready.connect(self.results_model.set_owned_index)
+        self._index_worker.error.connect(lambda msg: print(f"[Gallery] Índice: {msg}"))
+        self._index_worker.finished.connect(self._on_gallery_index_done)
+        self._index_worker.start()
+
+    def _on_gallery_synced(self, changes: GalleryChanges):
+        """Aplica a la galería solo los archivos que han cambiado."""
+        if not changes:
+            return
+        total = len(changes.added) + len(changes.removed) + len(changes.changed)
+        if total > self.INCREMENTAL_LIMIT:
+            self._show_gallery_files()
+            return
+        for name in changes.removed:
+            self.gallery_model.remove_file(name)
+        # insert_file actualiza los que ya estaban (modificados)
+        for name, size in changes.added + changes.changed:
+            self.gallery_model.insert_file(name, size)
+        self._update_gallery_counters()
+
+    def _on_gallery_index_done(self):
+        self._index_worker = None
+        if self._index_stale:
+            self._refresh_gallery_index(rebuild=False)
+
+    def _local_pixmap(self, path: str, size: tuple[int, int]) -> Optional[CachedPixmap]:
+        """Imagen local escalada a `size`, reutilizando la caché en memoria."""
+        source = local_source(path)
+        cached = self._pixmaps.get(source, size)
+        if cached:
+            return cached
+
+        # Decodificada ya reducida: no se crea el bitmap a resolución completa
+        image = read_local_image(path, size)
+        if image.isNull():
+            return None
+        pixmap = QPixmap.fromImage(scale_image(image, size))
+        return self._pixmaps.put(source, size, pixmap, original_size(image))
 
     def clear_local_gallery(self):
         reply = QMessageBox.question(
@@ -932,10 +1016,14 @@ class MainWindow(QWidget):
             QMessageBox.Yes | QMessageBox.No, QMessageBox.No,
         )
         if reply == QMessageBox.Yes:
+            removed = []
             try:
                 for f in os.listdir(self.download_folder):
                     if f.lower().endswith(self.IMG_EXTENSIONS):
                         os.remove(os.path.join(self.download_folder, f))
+                        removed.append(f)
+                self._pixmaps.clear()
+                self._gallery_index().remove(removed)
                 self.load_local_gallery()
                 self._show_status("Galería limpiada", "success")
             except Exception as e:
@@ -945,7 +1033,13 @@ class MainWindow(QWidget):
     #  DETALLES DE IMAGEN
     # ═════════════════════════════════════════════════════════════════
 
-    def _show_image_details(self, source: str, pixmap: QPixmap):
+    def _open_local_details(self, path: str):
+        image = self._local_pixmap(path, self.DETAILS_SIZE)
+        if image:
+            self._show_image_details(path, image)
+
+    def _show_image_details(self, source: str, image: CachedPixmap):
+        """Muestra el diálogo de detalles con la imagen ya escalada."""
         dialog = QDialog(self)
         dialog.setWindowTitle("Detalles de la imagen")
         dialog.setMinimumSize(650, 500)
@@ -968,7 +1062,7 @@ class MainWindow(QWidget):
         if_layout.setContentsMargins(16, 16, 16, 16)
 
         img_label = QLabel()
-        img_label.setPixmap(pixmap.scaled(560, 420, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        img_label.setPixmap(image.pixmap)
         img_label.setAlignment(Qt.AlignCenter)
         img_label.setStyleSheet("background: transparent;")
         if_layout.addWidget(img_label)
@@ -987,7 +1081,8 @@ class MainWindow(QWidget):
         ml.setContentsMargins(16, 12, 16, 12)
         ml.setSpacing(6)
 
-        size_lbl = QLabel(f"📐  {pixmap.width()} × {pixmap.height()} px")
+        original = image.original_size
+        size_lbl = QLabel(f"📐  {original.width()} × {original.height()} px")
         size_lbl.setStyleSheet(f"font-size: 13px; color: {TEXT}; background: transparent; font-weight: 600;")
         ml.addWidget(size_lbl)
 
@@ -1046,8 +1141,7 @@ class MainWindow(QWidget):
         if self.slideshow_active:
             self._stop_slideshow()
         else:
-            files = self._get_gallery_files()
-            if not files:
+            if not self._gallery_index().count():
                 self._show_status("No hay imágenes para el slideshow", "warning")
                 return
 
@@ -1056,6 +1150,7 @@ class MainWindow(QWidget):
             self.slideshow_btn.setObjectName("danger")
             self.slideshow_btn.setStyle(self.slideshow_btn.style())  # force re-style
             self.current_slideshow_index = -1
+            self._ss_current = None
 
             speed = max(500, 3500 - self.slideshow_speed.value() * 300)
             self.slideshow_timer.start(speed)
@@ -1067,6 +1162,8 @@ class MainWindow(QWidget):
         self.slideshow_btn.setObjectName("accent")
         self.slideshow_btn.setStyle(self.slideshow_btn.style())
         self.slideshow_active = False
+        self._ss_waiting = None
+        self._slides.clear()
         if hasattr(self, "_ss_dialog") and self._ss_dialog.isVisible():
             self._ss_dialog.close()
 
@@ -1074,16 +1171,20 @@ class MainWindow(QWidget):
         if not self.slideshow_active:
             return
 
-        files = self._get_gallery_files()
-        if not files:
+        # El siguiente por nombre (como en la galería), dando la vuelta al final
+        index = self._gallery_index()
+        name = index.next_name(self._ss_current)
+        if name is not None:
+            self.current_slideshow_index += 1
+        else:
+            name = index.next_name()
+            self.current_slideshow_index = 0
+        if name is None:
             self._stop_slideshow()
             return
-
-        self.current_slideshow_index = (self.current_slideshow_index + 1) % len(files)
-        path = os.path.join(self.download_folder, files[self.current_slideshow_index])
-        pixmap = QPixmap(path)
-        if pixmap.isNull():
-            return
+        self._ss_current = name
+        total = index.count()
+        path = os.path.join(self.download_folder, name)
 
         if not hasattr(self, "_ss_dialog") or not self._ss_dialog.isVisible():
             self._ss_dialog = QDialog(self, Qt.FramelessWindowHint)
@@ -1097,7 +1198,7 @@ class MainWindow(QWidget):
             top = QHBoxLayout()
             top.setContentsMargins(20, 12, 20, 0)
 
-            counter = QLabel(f"{self.current_slideshow_index + 1} / {len(files)}")
+            counter = QLabel(f"{self.current_slideshow_index + 1} / {total}")
             counter.setStyleSheet(f"color: {TEXT_SECONDARY}; font-size: 14px; font-weight: 600;")
             top.addWidget(counter)
             self._ss_counter = counter
@@ -1132,25 +1233,54 @@ class MainWindow(QWidget):
             )
             self._ss_dialog.mousePressEvent = lambda e: self._stop_slideshow()
 
-        # Actualizar imagen y contador
-        screen = self._ss_dialog.size()
-        margin = QSize(screen.width() - 80, screen.height() - 120)
-        self._ss_label.setPixmap(
-            pixmap.scaled(margin, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        )
-        files = self._get_gallery_files()
-        self._ss_counter.setText(f"{self.current_slideshow_index + 1} / {len(files)}")
+        # Actualizar imagen y contador; la imagen suele estar ya preparada.
+        # El diálogo aún no tiene su tamaño al crearlo: vale el de su pantalla.
+        screen = self._ss_dialog.screen().size()
+        self._slides.set_size((screen.width() - 80, screen.height() - 120))
+        self._slides.keep([path, *self._upcoming_slides(name)])
+        self._ss_counter.setText(f"{self.current_slideshow_index + 1} / {total}")
+        slide = self._slides.get(path)
+        if slide is not None:
+            self._ss_waiting = None
+            self._ss_label.setPixmap(slide.pixmap)
+        else:
+            # Se pausa hasta que esté lista, para que se vea el intervalo completo
+            self._ss_waiting = path
+            self.slideshow_timer.stop()
+
+    def _upcoming_slides(self, name: str) -> list[str]:
+        """Rutas de las SLIDES_AHEAD diapositivas que siguen a `name`."""
+        index = self._gallery_index()
+        names = index.names_after(name, self.SLIDES_AHEAD)
+        if len(names) < self.SLIDES_AHEAD:
+            names += index.names_after(None, self.SLIDES_AHEAD - len(names))
+        return [
+            os.path.join(self.download_folder, n)
+            for n in dict.fromkeys(names) if n != name
+        ]
+
+    def _on_slide_ready(self, path: str):
+        if path != self._ss_waiting or not self.slideshow_active:
+            return
+        self._ss_waiting = None
+        self._ss_label.setPixmap(self._slides.get(path).pixmap)
+        self.slideshow_timer.start()
+
+    def _on_slide_failed(self, path: str):
+        # Se queda la anterior y se sigue en el próximo tick
+        if path == self._ss_waiting and self.slideshow_active:
+            self._ss_waiting = None
+            self.slideshow_timer.start()
 
     # ═════════════════════════════════════════════════════════════════
     #  UTILIDADES
     # ═════════════════════════════════════════════════════════════════
 
     def toggle_select_all(self):
-        if not self.image_checkboxes:
+        if not self.results_model.rowCount():
             return
-        all_checked = all(cb.isChecked() for cb in self.image_checkboxes)
-        for cb in self.image_checkboxes:
-            cb.setChecked(not all_checked)
+        all_checked = self.results_model.all_checked()
+        self.results_model.set_all_checked(not all_checked)
         self.select_all_btn.setText(
             "☐  Deseleccionar" if not all_checked else "☑  Seleccionar todo"
         )
@@ -1170,12 +1300,38 @@ class MainWindow(QWidget):
 
     def clear_search(self):
         self.search_input.clear()
+        if self._search_worker is not None:
+            self._cancel_search()
+            self.search_btn.setEnabled(True)
+            self.search_btn.setText("🚀  Buscar")
+            self.progress_bar.hide()
         self._clear_results()
-        self.image_urls.clear()
-        self.image_checkboxes.clear()
         self.results_count.hide()
         self._show_status("Búsqueda limpiada", "info")
 
+    def closeEvent(self, event):
+        # Primero los temporizadores: después de apagar los pools nada debe
+        # volver a pedirles trabajo (sincronizar la galería, la siguiente diapositiva)
+        self._watch_timer.stop()
+        self._gallery_watcher.blockSignals(True)
+        if self.slideshow_active:
+            self._stop_slideshow()
+        self.slideshow_timer.stop()
+        self._cancel_search()
+        if self._dl_worker is not None:
+            self._dl_worker.cancel()
+        if self._index_worker is not None:
+            self._index_worker.cancel()
+        for worker in [*self._retired_searches, self._dl_worker, self._index_worker]:
+            if worker is not None:
+                worker.wait(2000)
+        self._thumb_pool.shutdown()
+        self._original_pool.shutdown()
+        self._gallery_pool.shutdown()
+        self._slide_pool.shutdown()
+        http_session.close_session()
+        super().closeEvent(event)
+
     def _show_status(self, message: str, msg_type: str = "info"):
         icon = STATUS_ICONS.get(msg_type, "💡")
         color = STATUS_COLORS.get(msg_type, TEXT_SECONDARY)
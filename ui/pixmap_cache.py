@@ -0,0 +1,99 @@
+"""
+Caché en memoria de imágenes ya decodificadas y escaladas.
+
+La comparten la galería y el diálogo de detalles (el slideshow prepara sus
+imágenes aparte, ver ui/slide_buffer.py): la clave es el origen (ruta o
+URL) junto con el tamaño de destino, de modo que volver a una imagen ya
+vista no repite la decodificación del JPEG ni el escalado.
+
+La memoria está acotada por un presupuesto en bytes (ancho × alto × bytes
+por píxel); al superarlo se descartan las entradas usadas hace más tiempo.
+Solo se debe usar desde el hilo principal (QPixmap no es seguro en otros hilos).
+"""
+import os
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from PyQt5.QtCore import QSize
+from PyQt5.QtGui import QPixmap
+
+MAX_PIXMAP_BYTES = 192 * 1024 * 1024
+
+Size = Optional[tuple[int, int]]  # None = tamaño original
+
+
+class CachedPixmap(NamedTuple):
+    pixmap: QPixmap
+    original_size: QSize  # tamaño de la imagen antes de escalar
+
+
+def local_source(path: str) -> str:
+    """Clave de un archivo local; cambia si el archivo se modifica."""
+    try:
+        return f"{os.path.abspath(path)}#{os.stat(path).st_mtime_ns}"
+    except OSError:
+        return os.path.abspath(path)
+
+
+def pixmap_cost(pixmap: QPixmap) -> int:
+    return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+
+class PixmapCache:
+    """Caché LRU de QPixmap acotada por bytes."""
+
+    def __init__(self, max_bytes: int = MAX_PIXMAP_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple[str, Size], tuple[CachedPixmap, int]] = OrderedDict()
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, source: str, size: Size) -> Optional[CachedPixmap]:
+        entry = self._entries.get((source, size))
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end((source, size))
+        self.hits += 1
+        return entry[0]
+
+    def put(
+        self,
+        source: str,
+        size: Size,
+        pixmap: QPixmap,
+        original_size: Optional[QSize] = None,
+    ) -> CachedPixmap:
+        key = (source, size)
+        item = CachedPixmap(pixmap, original_size or pixmap.size())
+        cost = pixmap_cost(pixmap)
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._total -= old[1]
+
+        # Una imagen que no cabe en el presupuesto no se guarda
+        if cost <= self.max_bytes:
+            self._entries[key] = (item, cost)
+            self._total += cost
+            self._evict()
+        return item
+
+    def clear(self):
+        self._entries.clear()
+        self._total = 0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self._total,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _evict(self):
+        while self._total > self.max_bytes and self._entries:
+            _, (_, cost) = self._entries.popitem(last=False)
+            self._total -= cost
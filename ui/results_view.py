@@ -0,0 +1,429 @@
+"""
+Rejilla virtualizada de resultados de búsqueda (model/view).
+
+Cada resultado es una fila del modelo, que también guarda qué resultados
+están seleccionados para descargar (antes era una lista paralela de
+QCheckBox). Las miniaturas se piden solo cuando la tarjeta entra en el
+área visible y se cancelan cuando sale, así el número de resultados no
+dispara el consumo de memoria ni de red.
+
+Los resultados que llegan mientras se busca se encolan con enqueue() y se
+insertan por lotes, unos pocos por fotograma, para que la interfaz siga
+respondiendo aunque lleguen cientos de golpe.
+
+El pool de resultados calcula el hash perceptual de cada miniatura en sus
+hilos (ver workers/perceptual_hash.py). Los casi duplicados (la misma foto a
+otra resolución o recomprimida) se pliegan en el modelo: de cada grupo queda
+una sola tarjeta, la del resultado mejor situado, con el número de copias
+que oculta. Los que ya están en la galería local se marcan con «Ya la
+tienes» y no entran en «Seleccionar todo».
+
+Cuando la búsqueda admite más páginas, el modelo lo indica con
+canFetchMore() y la vista llama a fetchMore() al acercarse al final; el
+modelo emite more_requested y la ventana se lo pide al SearchWorker.
+"""
+from collections import deque
+from typing import Optional
+
+from PyQt5.QtCore import QEvent, QModelIndex, QRect, QSize, Qt, QTimer, pyqtSignal
+from PyQt5.QtGui import QColor, QCursor, QFont, QPainter, QPen
+from PyQt5.QtWidgets import QStyle, QStyledItemDelegate
+
+from ui.card_grid import CardGridView, ThumbnailListModel, ThumbStateRole
+from ui.cards import THUMB_READY, paint_badge, paint_card, paint_text, paint_thumbnail
+from ui.pixmap_cache import PixmapCache
+from ui.styles import (
+    ACCENT, BG_ELEVATED, CYAN_DARK, SURFACE, SURFACE_BORDER, SURFACE_HOVER,
+    TEXT, TEXT_MUTED, TEXT_SECONDARY,
+)
+from workers.perceptual_hash import NearDuplicateIndex, is_informative
+from workers.thumbnail_cache import RESULT_THUMB_SIZE
+from workers.thumbnail_pool import ThumbnailPool
+
+UrlRole = Qt.UserRole + 1
+CopiesRole = Qt.UserRole + 2      # casi duplicados plegados en este resultado
+OwnedRole = Qt.UserRole + 3       # ya está en la galería local
+
+
+class ResultsModel(ThumbnailListModel):
+    """URLs encontradas y su estado de selección."""
+
+    more_requested = pyqtSignal()  # la vista necesita más resultados
+
+    THUMB_SIZE = RESULT_THUMB_SIZE
+    FRAME_BATCH = 24        # filas insertadas por fotograma
+    FRAME_INTERVAL_MS = 16
+    HASH_MEMORY = 50_000    # hashes recordados entre búsquedas
+
+    def __init__(self, pool: ThumbnailPool, pixmaps: PixmapCache, parent=None):
+        super().__init__(pool, pixmaps, parent)
+        self._urls: list[str] = []
+        self._known: set[str] = set()   # insertadas, en cola o plegadas
+        self._queue: deque[str] = deque()
+        self._checked: set[str] = set()
+        self._can_fetch_more = False
+
+        # Casi duplicados, por URL. Los hashes se recuerdan entre búsquedas:
+        # una miniatura que ya está en la caché no se vuelve a pedir al pool.
+        self._hashes: dict[str, int] = {}
+        self._groups: NearDuplicateIndex[str] = NearDuplicateIndex()
+        self._group_of: dict[str, str] = {}     # URL -> grupo (su primera URL)
+        self._shown: dict[str, str] = {}        # grupo -> URL visible
+        self._copies: dict[str, list[str]] = {}  # URL visible -> URLs plegadas
+        self._owned_index: Optional[NearDuplicateIndex[str]] = None
+        self._owned: set[str] = set()
+
+        pool.hashed.connect(self._on_hashed)
+
+        self._frame_timer = QTimer(self)
+        self._frame_timer.setInterval(self.FRAME_INTERVAL_MS)
+        self._frame_timer.timeout.connect(self._insert_batch)
+
+    # ── Datos ────────────────────────────────────────────────────────
+    def set_urls(self, urls: list[str]):
+        """Sustituye los resultados; se insertan por lotes, como con enqueue()."""
+        self.beginResetModel()
+        self._reset_thumbnails()
+        self._frame_timer.stop()
+        self._queue.clear()
+        self._urls = []
+        self._known.clear()
+        self._checked.clear()
+        self._can_fetch_more = False
+        if len(self._hashes) > self.HASH_MEMORY:
+            self._hashes.clear()
+        self._groups = NearDuplicateIndex()
+        self._group_of.clear()
+        self._shown.clear()
+        self._copies.clear()
+        self._owned.clear()
+        self.endResetModel()
+        self.enqueue(urls)
+
+    def enqueue(self, urls: list[str]):
+        """
+        Encola resultados para insertarlos por lotes; ignora los repetidos.
+        El primer lote de una lista vacía se inserta en el acto.
+        """
+        for url in urls:
+            if url not in self._known:
+                self._known.add(url)
+                self._queue.append(url)
+        if not self._queue:
+            return
+        if not self._urls:
+            self._insert_batch()
+        if self._queue and not self._frame_timer.isActive():
+            self._frame_timer.start()
+
+    def pending_count(self) -> int:
+        """Resultados recibidos que aún no se han insertado."""
+        return len(self._queue)
+
+    def _insert_batch(self):
+        batch: list[str] = []
+        while self._queue and len(batch) < self.FRAME_BATCH:
+            url = self._queue.popleft()
+            if not self._fold_known(url):
+                batch.append(url)
+        if batch:
+            first = len(self._urls)
+            self.beginInsertRows(QModelIndex(), first, first + len(batch) - 1)
+            self._urls.extend(batch)
+            self.endInsertRows()
+        if not self._queue:
+            self._frame_timer.stop()
+
+    def clear(self):
+        self.set_urls([])
+
+    # ── Paginación ───────────────────────────────────────────────────
+    def set_can_fetch_more(self, enabled: bool):
+        """La búsqueda tiene más páginas y está esperando a que se pidan."""
+        self._can_fetch_more = enabled
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._can_fetch_more and not self._queue
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        # Una petición a la vez: se reactiva cuando la búsqueda vuelve a esperar
+        self._can_fetch_more = False
+        self.more_requested.emit()
+
+    def url(self, row: int) -> str:
+        return self._urls[row]
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._urls)
+
+    def flags(self, index: QModelIndex):
+        return Qt.ItemIsEnabled | Qt.ItemIsUserCheckable
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._urls):
+            return None
+        url = self._urls[index.row()]
+
+        if role in (Qt.DisplayRole, UrlRole):
+            return url
+        if role == Qt.CheckStateRole:
+            return Qt.Checked if url in self._checked else Qt.Unchecked
+        if role == CopiesRole:
+            return len(self._copies.get(url, ()))
+        if role == OwnedRole:
+            return url in self._owned
+        return self.thumbnail_data(index.row(), role)
+
+    def setData(self, index: QModelIndex, value, role=Qt.EditRole) -> bool:
+        if role != Qt.CheckStateRole or not index.isValid():
+            return False
+        if value == Qt.Checked:
+            self._checked.add(self._urls[index.row()])
+        else:
+            self._checked.discard(self._urls[index.row()])
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        return True
+
+    # ── Selección ────────────────────────────────────────────────────
+    def toggle(self, row: int):
+        state = Qt.Unchecked if self._urls[row] in self._checked else Qt.Checked
+        self.setData(self.index(row), state, Qt.CheckStateRole)
+
+    def checked_urls(self) -> list[str]:
+        return [url for url in self._urls if url in self._checked]
+
+    def _selectable(self) -> set[str]:
+        """URLs que marca «Seleccionar todo»: las que no están ya descargadas."""
+        return set(self._urls) - self._owned
+
+    def all_checked(self) -> bool:
+        selectable = self._selectable()
+        return bool(selectable) and selectable <= self._checked
+
+    def set_all_checked(self, checked: bool):
+        self._checked = self._selectable() if checked else set()
+        if self._urls:
+            self.dataChanged.emit(
+                self.index(0), self.index(len(self._urls) - 1), [Qt.CheckStateRole]
+            )
+
+    # ── Casi duplicados ──────────────────────────────────────────────
+    def set_owned_index(self, index: Optional[NearDuplicateIndex[str]]):
+        """Índice de la galería local; marca los resultados que ya están en ella."""
+        self._owned_index = index
+        owned = {
+            url for url in self._urls
+            if url in self._hashes and self._is_owned(self._hashes[url])
+        }
+        changed = owned ^ self._owned
+        self._owned = owned
+        for row, url in enumerate(self._urls):
+            if url in changed:
+                self._emit_marks_changed(row)
+
+    def _needs_request(self, row: int) -> bool:
+        # Sin hash hay que pasar por el pool aunque la miniatura esté en caché
+        return super()._needs_request(row) or self._urls[row] not in self._hashes
+
+    def _on_hashed(self, value: int, request: int):
+        row = self._requests.get(request)   # la imagen llega justo después
+        if row is None:
+            return
+        url = self._urls[row]
+        self._hashes[url] = value
+        self._classify(url, value, row)
+
+    def _fold_known(self, url: str) -> bool:
+        """Clasifica una URL aún sin fila cuyo hash ya se conoce; True si se pliega."""
+        value = self._hashes.get(url)
+        return value is not None and self._classify(url, value, None)
+
+    def _classify(self, url: str, value: int, row: Optional[int]) -> bool:
+        """
+        Agrupa un resultado con sus casi duplicados (row: su fila, o None si
+        aún no se ha insertado). De cada grupo se muestra el resultado mejor
+        situado; los demás se pliegan en él. Devuelve True si `url` se pliega.
+        """
+        if url in self._group_of or not is_informative(value):
+            return False
+        if self._is_owned(value):
+            self._owned.add(url)
+            if row is not None:
+                self._emit_marks_changed(row)
+
+        group = self._groups.nearest(value)
+        if group is None:
+            self._groups.add(value, url)
+            self._group_of[url] = url
+            self._shown[url] = url
+            return False
+
+        self._group_of[url] = group
+        shown = self._shown[group]
+        if row is None or row > self._urls.index(shown):
+            self._copies.setdefault(shown, []).append(url)
+            self._checked.discard(url)
+            self._owned.discard(url)
+            if row is not None:
+                self._remove_row(row)
+            # El visible puede estar aún en el lote que se va a insertar
+            if shown in self._urls:
+                self._emit_marks_changed(self._urls.index(shown))
+            return True
+
+        shown_row = self._urls.index(shown)
+
+        # El nuevo va antes que el visible: pasa a representar al grupo
+        self._shown[group] = url
+        self._copies[url] = [shown, *self._copies.pop(shown, [])]
+        if shown in self._checked:
+            self._checked.add(url)
+        self._checked.discard(shown)
+        self._owned.discard(shown)
+        self._remove_row(shown_row)
+        self._emit_marks_changed(row)
+        return False
+
+    def _remove_row(self, row: int):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._urls[row]
+        self._shift_thumbnails(row, -1)
+        self.endRemoveRows()
+
+    def _is_owned(self, value: int) -> bool:
+        return (
+            self._owned_index is not None
+            and is_informative(value)
+            and self._owned_index.nearest(value) is not None
+        )
+
+    def _emit_marks_changed(self, row: int):
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [CopiesRole, OwnedRole, Qt.CheckStateRole])
+
+    def _thumb_source(self, row: int) -> str:
+        return self._urls[row]
+
+    def _cache_key(self, row: int) -> str:
+        return self._urls[row]
+
+
+class ResultsDelegate(QStyledItemDelegate):
+    """Tarjeta de resultado: miniatura, casilla «Seleccionar» y botón «Ver»."""
+
+    details_clicked = pyqtSignal(QModelIndex)
+
+    PADDING = 12
+    ROW_HEIGHT = 32
+    BUTTON_SIZE = QSize(80, 30)
+    INDICATOR = 20
+
+    def sizeHint(self, option, index):
+        return ResultsView.CARD_SIZE
+
+    # ── Geometría ────────────────────────────────────────────────────
+    def _rects(self, cell: QRect) -> dict[str, QRect]:
+        card = QRect(cell.topLeft(), ResultsView.CARD_SIZE)
+        pad = self.PADDING
+        w, h = RESULT_THUMB_SIZE
+        image = QRect(card.x() + pad, card.y() + pad, w, h)
+
+        row_top = image.bottom() + 1 + (card.bottom() - image.bottom() - self.ROW_HEIGHT) // 2
+        row = QRect(card.x() + pad, row_top, w, self.ROW_HEIGHT)
+        bw, bh = self.BUTTON_SIZE.width(), self.BUTTON_SIZE.height()
+        button = QRect(row.right() - bw + 1, row.y() + (row.height() - bh) // 2, bw, bh)
+        checkbox = QRect(row.x(), row.y(), button.x() - row.x() - 8, row.height())
+        return {"card": card, "image": image, "checkbox": checkbox, "button": button}
+
+    # ── Dibujo ───────────────────────────────────────────────────────
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        rects = self._rects(option.rect)
+        checked = index.data(Qt.CheckStateRole) == Qt.Checked
+        hovered = bool(option.state & QStyle.State_MouseOver)
+        paint_card(painter, rects["card"], hovered, selected=checked)
+
+        state = index.data(ThumbStateRole)
+        paint_thumbnail(painter, rects["image"], index.data(Qt.DecorationRole), state)
+        copies = index.data(CopiesRole)
+        badges = []
+        if index.data(OwnedRole):
+            badges.append("✓ Ya la tienes")
+        if copies:
+            badges.append(f"≈ +{copies} {'copia' if copies == 1 else 'copias'}")
+        if badges:
+            color = CYAN_DARK if index.data(OwnedRole) else BG_ELEVATED
+            paint_badge(painter, rects["image"], " · ".join(badges), color)
+
+        # Casilla de selección
+        box = rects["checkbox"]
+        size = self.INDICATOR
+        indicator = QRect(box.x() + 1, box.y() + (box.height() - size) // 2, size, size)
+        painter.setPen(QPen(QColor(ACCENT if checked or hovered else SURFACE_BORDER), 2))
+        painter.setBrush(QColor(ACCENT if checked else SURFACE))
+        painter.drawRoundedRect(indicator.adjusted(1, 1, -1, -1), 6, 6)
+        if checked:
+            paint_text(painter, indicator, "✓", "#ffffff", 13, Qt.AlignCenter, QFont.Bold)
+        label = box.adjusted(size + 10, 0, 0, 0)
+        paint_text(painter, label, "Seleccionar", TEXT, 12)
+
+        # Botón «Ver» (habilitado cuando la miniatura está lista)
+        button = rects["button"]
+        enabled = state == THUMB_READY
+        over_button = False
+        if enabled and option.widget is not None:
+            cursor = option.widget.viewport().mapFromGlobal(QCursor.pos())
+            over_button = button.contains(cursor)
+        if not enabled:
+            painter.setPen(QPen(QColor(BG_ELEVATED), 1))
+            painter.setBrush(QColor(BG_ELEVATED))
+        elif over_button:
+            painter.setPen(QPen(QColor(ACCENT), 1))
+            painter.setBrush(QColor(SURFACE_HOVER))
+        else:
+            painter.setPen(QPen(QColor(SURFACE_BORDER), 1))
+            painter.setBrush(QColor(SURFACE))
+        painter.drawRoundedRect(button.adjusted(0, 0, -1, -1), 8, 8)
+        text_color = TEXT_MUTED if not enabled else (TEXT if over_button else TEXT_SECONDARY)
+        paint_text(painter, button, "🔍 Ver", text_color, 12, Qt.AlignCenter, QFont.Normal)
+
+        painter.restore()
+
+    # ── Interacción ──────────────────────────────────────────────────
+    def editorEvent(self, event, model, option, index) -> bool:
+        if event.type() != QEvent.MouseButtonRelease or event.button() != Qt.LeftButton:
+            return False
+
+        rects = self._rects(option.rect)
+        pos = event.pos()
+        if rects["button"].contains(pos):
+            if index.data(ThumbStateRole) == THUMB_READY:
+                self.details_clicked.emit(index)
+            return True
+        if rects["image"].contains(pos) or rects["checkbox"].contains(pos):
+            model.toggle(index.row())
+            return True
+        return False
+
+
+class ResultsView(CardGridView):
+    """Rejilla de resultados; las miniaturas fuera de la vista se cancelan."""
+
+    details_requested = pyqtSignal(str)  # URL del resultado
+
+    CARD_SIZE = QSize(260, 300)
+    PREFETCH_SCREENS = 0.0
+    RETAIN_SCREENS = 0.0
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setCursor(Qt.PointingHandCursor)
+        delegate = ResultsDelegate(self)
+        delegate.details_clicked.connect(
+            lambda index: self.details_requested.emit(index.data(UrlRole))
+        )
+        self.setItemDelegate(delegate)
@@ -0,0 +1,88 @@
+"""
+Buffer de diapositivas del slideshow.
+
+Mientras se muestra una diapositiva, las siguientes se decodifican y se
+escalan al tamaño de la pantalla en un ThumbnailPool propio (sin caché de
+disco). Al avanzar, la siguiente ya es un QPixmap y cambiarla es solo un
+setPixmap, así que el temporizador no depende de cuánto tarde en
+decodificarse cada foto.
+
+El buffer solo guarda las rutas que se le pasan a keep() (la actual y las
+siguientes), de modo que la memoria queda acotada a unas pocas imágenes a
+pantalla completa. Solo se debe usar desde el hilo principal.
+"""
+import itertools
+from typing import Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+
+from ui.pixmap_cache import CachedPixmap
+from workers.thumbnail_cache import original_size
+from workers.thumbnail_pool import ThumbnailPool
+
+
+class SlideBuffer(QObject):
+    """Diapositivas decodificadas por adelantado, al tamaño de la pantalla."""
+
+    ready = pyqtSignal(str)    # ruta de una diapositiva que acaba de quedar lista
+    failed = pyqtSignal(str)   # ruta que no se pudo decodificar
+
+    def __init__(self, pool: ThumbnailPool, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._pool = pool
+        self._size: tuple[int, int] = (0, 0)
+        self._slides: dict[str, CachedPixmap] = {}
+        self._requests: dict[int, str] = {}     # petición del pool -> ruta
+        self._ids = itertools.count()
+
+        pool.image_loaded.connect(self._on_loaded)
+        pool.failed.connect(self._on_failed)
+
+    def set_size(self, size: tuple[int, int]):
+        """Tamaño de destino; si cambia, lo preparado ya no sirve."""
+        if size != self._size:
+            self.clear()
+            self._size = size
+
+    def clear(self):
+        self._pool.cancel_all()
+        self._slides.clear()
+        self._requests.clear()
+
+    def get(self, path: str) -> Optional[CachedPixmap]:
+        return self._slides.get(path)
+
+    def keep(self, paths: list[str]):
+        """
+        Deja en el buffer solo `paths` y pide las que falten; se decodifican
+        en ese orden (la primera, antes).
+        """
+        wanted = set(paths)
+        for path in [p for p in self._slides if p not in wanted]:
+            del self._slides[path]
+        for request, path in list(self._requests.items()):
+            if path not in wanted:
+                self._pool.cancel(request)
+                del self._requests[request]
+
+        requested = set(self._requests.values())
+        for priority, path in enumerate(paths):
+            if path in self._slides or path in requested:
+                continue
+            request = next(self._ids)
+            self._requests[request] = path
+            requested.add(path)
+            self._pool.request(path, request, priority=priority, size=self._size)
+
+    def _on_loaded(self, image: QImage, request: int):
+        path = self._requests.pop(request, None)
+        if path is None:
+            return
+        self._slides[path] = CachedPixmap(QPixmap.fromImage(image), original_size(image))
+        self.ready.emit(path)
+
+    def _on_failed(self, request: int):
+        path = self._requests.pop(request, None)
+        if path is not None:
+            self.failed.emit(path)
@@ -36,6 +36,12 @@ GRADIENT_ACCENT = "qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #6c63ff, stop:
 GRADIENT_HEADER = "qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #141820, stop:0.5 #1a1f2e, stop:1 #141820)"
 GRADIENT_CARD = "qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #262e42, stop:1 #1e2435)"
 
+# Colores de tarjeta para dibujar con QPainter (mismos que GRADIENT_CARD)
+CARD_TOP = "#262e42"
+CARD_BOTTOM = BG_ELEVATED
+CARD_HOVER_TOP = "#2d3650"
+CARD_HOVER_BOTTOM = SURFACE
+
 STATUS_COLORS = {
     "info": TEXT_SECONDARY,
     "success": CYAN,
@@ -201,6 +207,13 @@ GLOBAL_STYLESHEET = f"""
         background: transparent;
     }}
 
+    /* ── Rejillas de tarjetas (model/view) ───── */
+    QListView#cardGrid {{
+        border: none;
+        background: transparent;
+        outline: none;
+    }}
+
     QScrollBar:vertical {{
         background: {BG_DARK};
         width: 10px;
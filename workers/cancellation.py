@@ -0,0 +1,204 @@
+"""
+Cancelación cooperativa del trabajo en segundo plano.
+
+Un CancelToken lo comparten quien lanza el trabajo (la interfaz) y los hilos
+que lo ejecutan. Al cancelarlo:
+
+- raise_if_cancelled() lanza Cancelled; los workers lo comprueban antes de
+  cada petición y entre bloques de lectura.
+- Las respuestas HTTP que se estén leyendo dentro de track() se cierran a
+  nivel de socket, lo que despierta al hilo bloqueado esperando datos.
+
+- Los callbacks registrados con add_callback() se llaman (desde el hilo que
+  cancela); así el núcleo asíncrono (core/) cancela sus tareas de asyncio.
+
+Un token puede tener un plazo (set_deadline()): se cancela solo al vencer.
+El plazo no corre dentro de paused(), que es donde el limitador de ritmo
+(workers/rate_limiter.py) hace esperar las peticiones.
+
+El establecimiento de la conexión TCP no se puede interrumpir desde fuera;
+lo acota el timeout de cada petición.
+"""
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+import requests
+
+
+class Cancelled(Exception):
+    """El trabajo se canceló antes de terminar."""
+
+
+def _socket_of(response: requests.Response) -> Optional[socket.socket]:
+    """Socket de una respuesta de urllib3 que aún se está leyendo."""
+    raw = response.raw
+    sock = getattr(getattr(raw, "_connection", None), "sock", None)
+    if sock is not None:
+        return sock
+    # http.client suelta conn.sock en cuanto empieza la respuesta; el socket
+    # sigue accesible desde el archivo del que se lee el cuerpo.
+    fp = getattr(getattr(raw, "_fp", None), "fp", None)
+    return getattr(getattr(fp, "raw", None), "_sock", None)
+
+
+def abort_response(response: requests.Response):
+    """
+    Corta una respuesta aunque otro hilo esté leyendo de ella.
+    shutdown() desbloquea el recv() pendiente; el hilo lector se encarga
+    después de cerrarla y de descartar la conexión.
+    """
+    sock = _socket_of(response)
+    if sock is None:
+        response.close()
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+class CancelToken:
+    """Señal de cancelación segura entre hilos."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._responses: set[requests.Response] = set()
+        self._children: list["CancelToken"] = []
+        self._callbacks: list[Callable[[], None]] = []
+
+        # Plazo: segundos que le quedan, temporizador armado y pausas anidadas
+        self._remaining: Optional[float] = None
+        self._timer: Optional[threading.Timer] = None
+        self._started = 0.0
+        self._pauses = 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        """Marca el token como cancelado y corta las respuestas en curso."""
+        with self._lock:
+            self._event.set()
+            responses = list(self._responses)
+            self._responses.clear()
+            children = list(self._children)
+            callbacks = list(self._callbacks)
+            self._callbacks.clear()
+            self._disarm()
+        for response in responses:
+            abort_response(response)
+        for child in children:
+            child.cancel()
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback: Callable[[], None]):
+        """Llama a `callback` al cancelar (enseguida si ya está cancelado)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def child(self) -> "CancelToken":
+        """
+        Token que se cancela junto con este, pero que también se puede
+        cancelar por separado (por ejemplo, al vencer el plazo de una parte).
+        """
+        child = CancelToken()
+        with self._lock:
+            if not self._event.is_set():
+                self._children.append(child)
+                return child
+        child.cancel()
+        return child
+
+    # ── Plazo ────────────────────────────────────────────────────────
+    def set_deadline(self, seconds: float):
+        """Cancela el token al cabo de `seconds`, sin contar el tiempo en paused()."""
+        with self._lock:
+            self._disarm()
+            self._remaining = seconds
+            self._arm()
+
+    def clear_deadline(self):
+        with self._lock:
+            self._disarm()
+            self._remaining = None
+
+    @contextmanager
+    def paused(self) -> Iterator[None]:
+        """El plazo, si lo hay, se detiene mientras dura el bloque."""
+        with self._lock:
+            self._pauses += 1
+            self._disarm()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pauses -= 1
+                self._arm()
+
+    def _arm(self):
+        """Arranca el temporizador con lo que queda de plazo (con el lock tomado)."""
+        if self._remaining is None or self._pauses or self._event.is_set():
+            return
+        self._started = time.monotonic()
+        self._timer = threading.Timer(max(0.0, self._remaining), self.cancel)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _disarm(self):
+        """Para el temporizador y descuenta lo transcurrido (con el lock tomado)."""
+        if self._timer is None:
+            return
+        self._timer.cancel()
+        self._timer = None
+        self._remaining -= time.monotonic() - self._started
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise Cancelled()
+
+    def wait(self, timeout: float) -> bool:
+        """Espera hasta `timeout` segundos; True si se canceló entretanto."""
+        return self._event.wait(timeout)
+
+    @contextmanager
+    def track(self, response: requests.Response) -> Iterator[requests.Response]:
+        """
+        Asocia una respuesta (pedida con stream=True) al token mientras se lee.
+        La respuesta se cierra al salir. Los errores de lectura provocados por
+        la cancelación, y los cuerpos truncados por ella, salen como Cancelled.
+        """
+        with self._lock:
+            tracked = not self._event.is_set()
+            if tracked:
+                self._responses.add(response)
+        if not tracked:
+            response.close()
+            raise Cancelled()
+
+        try:
+            with response:
+                yield response
+        except Cancelled:
+            raise
+        except Exception:
+            if self._event.is_set():
+                raise Cancelled() from None
+            raise
+        finally:
+            with self._lock:
+                self._responses.discard(response)
+        self.raise_if_cancelled()
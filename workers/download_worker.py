@@ -1,82 +1,91 @@
 """
-Workers para descarga de imágenes y carga de miniaturas.
-Se ejecutan en hilos secundarios (QThread) para no bloquear la interfaz.
-
-NOTA IMPORTANTE: QPixmap NO se puede crear en un hilo secundario.
-En su lugar se emiten los bytes crudos y el hilo principal crea el QPixmap.
+Worker para la descarga de imágenes.
+Se ejecuta en un hilo secundario (QThread) para no bloquear la interfaz.
+
+Las descargas (en paralelo, con límite por host y escritura por bloques)
+las hace core/download.py con asyncio y sin depender de Qt; este worker
+ejecuta su bucle de eventos en el hilo y traduce sus avisos a señales.
+cancel() detiene las pendientes, corta las que estén en curso y elimina
+los archivos a medias. Las imágenes que ya estaban en la carpeta no se
+guardan otra vez; duplicates indica cuántas había. file_saved avisa de cada
+archivo nuevo en cuanto se guarda, para añadirlo a la galería sin esperar
+al final.
+
+Las miniaturas se cargan con el pool compartido de workers/thumbnail_pool.py.
 """
-import os
-import time
-import requests
+import asyncio
+from typing import Optional
+
 from PyQt5.QtCore import QThread, pyqtSignal
 
+from core.download import DOWNLOAD_DUPLICATE, DOWNLOAD_OK, MAX_DOWNLOAD_BYTES, download
+from workers.cancellation import CancelToken
+
 
 class ImageDownloader(QThread):
     """Descarga una lista de imágenes a una carpeta local."""
 
-    progress = pyqtSignal(int, int)   # (actual, total)
-    finished = pyqtSignal(int)        # cantidad de descargas exitosas
+    progress = pyqtSignal(int, int)            # (completadas, total)
+    file_progress = pyqtSignal(int, int, int)  # (índice, bytes recibidos, bytes totales o 0)
+    file_saved = pyqtSignal(str, int)          # (ruta, bytes) de cada imagen guardada
+    speed = pyqtSignal(float)                  # bytes/s de todas las descargas
+    duplicates = pyqtSignal(int)               # ya estaban en la carpeta (antes de finished)
+    finished = pyqtSignal(int)                 # cantidad de descargas exitosas
     error = pyqtSignal(str)
 
-    def __init__(self, urls: list[str], folder: str, prefix: str):
+    def __init__(
+        self,
+        urls: list[str],
+        folder: str,
+        prefix: str,
+        max_workers: int = 6,
+        per_host: int = 2,
+        max_bytes: int = MAX_DOWNLOAD_BYTES,
+        query: Optional[str] = None,
+    ):
         super().__init__()
         self.urls = urls
         self.folder = folder
         self.prefix = prefix
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.max_bytes = max_bytes
+        self.query = query
+        self.token = CancelToken()
 
-    def run(self):
-        success = 0
-        total = len(self.urls)
-        os.makedirs(self.folder, exist_ok=True)
-
-        for i, url in enumerate(self.urls):
-            try:
-                response = requests.get(url, timeout=15)
-                if response.status_code == 200:
-                    # Detectar extensión por Content-Type
-                    ct = response.headers.get("Content-Type", "")
-                    ext = "jpg"
-                    if "png" in ct:
-                        ext = "png"
-                    elif "gif" in ct:
-                        ext = "gif"
-                    elif "webp" in ct:
-                        ext = "webp"
-
-                    filename = f"{self.prefix}_{int(time.time())}_{i}.{ext}"
-                    path = os.path.join(self.folder, filename)
-
-                    with open(path, "wb") as f:
-                        f.write(response.content)
-                    success += 1
-
-                self.progress.emit(i + 1, total)
-            except Exception as e:
-                print(f"[Download] Error ({url[:60]}...): {e}")
-
-        self.finished.emit(success)
-
-
-class ThumbnailLoader(QThread):
-    """
-    Descarga la imagen de una URL y emite los bytes crudos.
-    El QPixmap se debe crear en el hilo principal (slot conectado).
-    """
-
-    loaded = pyqtSignal(bytes, int)  # (datos de imagen, índice)
-    failed = pyqtSignal(int)         # índice que falló
-
-    def __init__(self, url: str, index: int):
-        super().__init__()
-        self.url = url
-        self.index = index
+    def cancel(self):
+        """Cancela las descargas; finished se emite con las completadas."""
+        self.token.cancel()
 
     def run(self):
+        self._saved = 0
+        self._duplicates = 0
         try:
-            response = requests.get(self.url, timeout=8)
-            if response.status_code == 200 and len(response.content) > 100:
-                self.loaded.emit(response.content, self.index)
-            else:
-                self.failed.emit(self.index)
-        except Exception:
-            self.failed.emit(self.index)
+            asyncio.run(download(
+                self.urls, self.folder, self.prefix,
+                query=self.query,
+                concurrency=self.max_workers,
+                per_host=self.per_host,
+                max_bytes=self.max_bytes,
+                on_progress=self.progress.emit,
+                on_result=self._on_result,
+                on_file_progress=self.file_progress.emit,
+                on_speed=self.speed.emit,
+                token=self.token,
+            ))
+        except asyncio.CancelledError:
+            # Cancelada con el token: finished informa de lo que se llegó a guardar
+            if not self.token.cancelled:
+                self.error.emit("Descarga interrumpida")
+        except Exception as e:
+            self.error.emit(str(e))
+        # finished llega siempre, también tras error, para que la interfaz se libere
+        self.duplicates.emit(self._duplicates)
+        self.finished.emit(self._saved)
+
+    def _on_result(self, _index: int, result: dict):
+        if result["status"] == DOWNLOAD_OK:
+            self._saved += 1
+            self.file_saved.emit(result["path"], result["bytes"])
+        elif result["status"] == DOWNLOAD_DUPLICATE:
+            self._duplicates += 1
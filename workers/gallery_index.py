@@ -0,0 +1,377 @@
+"""
+Índice de la galería: una base de datos SQLite dentro de cada carpeta de
+descargas.
+
+Por archivo guarda su tamaño, su fecha de modificación, las dimensiones, el
+hash del contenido (calculado mientras se descarga, ver ImageFile en
+workers/image_stream.py), la URL de origen y la búsqueda que lo trajo; y,
+aparte, los hashes perceptuales (ver workers/perceptual_hash.py) y todas las
+URLs que resultaron ser esa imagen. Con él:
+
+- La galería se lista y el slideshow avanza con consultas al índice, sin
+  recorrer el directorio cada vez.
+- Una URL ya descargada en la carpeta no se vuelve a pedir.
+- Una imagen cuyo contenido ya está en la carpeta (la misma foto desde otro
+  espejo) se descarta antes de darle nombre definitivo.
+
+Las descargas se registran al terminar con add(). Los cambios hechos por
+fuera (archivos copiados, borrados o editados) se recogen con sync(), que
+solo hace stat() de cada archivo; fill_pending() calcula después el hash y
+las dimensiones de los nuevos o modificados. refresh() hace ambas cosas.
+
+La base usa WAL: la interfaz puede leer mientras un hilo o el modo por lotes
+(cli.py) escriben. Una sola conexión por carpeta, compartida entre hilos y
+protegida con un bloqueo.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from workers.cancellation import CancelToken
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - Pillow está en requirements.txt
+    Image = None
+
+INDEX_NAME = ".gallery.db"
+SCHEMA_VERSION = 1
+BUSY_TIMEOUT = 10.0     # segundos esperando a otro proceso que escribe
+DIGEST_SIZE = 16        # bytes del hash BLAKE2b (32 caracteres hex)
+HASH_CHUNK = 1024 * 1024
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    name    TEXT PRIMARY KEY,
+    size    INTEGER NOT NULL,
+    mtime   INTEGER NOT NULL,       -- nanosegundos
+    width   INTEGER,
+    height  INTEGER,
+    hash    TEXT,                   -- NULL: pendiente de fill_pending()
+    url     TEXT,
+    query   TEXT,
+    added   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_hash ON files (hash);
+
+CREATE TABLE IF NOT EXISTS urls (
+    url     TEXT PRIMARY KEY,
+    name    TEXT NOT NULL REFERENCES files (name) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS urls_name ON urls (name);
+
+CREATE TABLE IF NOT EXISTS perceptual (
+    name    TEXT NOT NULL REFERENCES files (name) ON DELETE CASCADE,
+    kind    TEXT NOT NULL,
+    value   TEXT,                   -- NULL: no se pudo decodificar
+    PRIMARY KEY (name, kind)
+);
+"""
+_TABLES = ("perceptual", "urls", "files")
+
+
+class GalleryChanges(NamedTuple):
+    """Cambios de la carpeta que sync() ha llevado al índice."""
+    added: list[tuple[str, int]]     # (nombre, bytes)
+    removed: list[str]
+    changed: list[tuple[str, int]]   # modificados: (nombre, bytes)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+def new_hasher():
+    """Hash incremental del contenido de una imagen."""
+    return hashlib.blake2b(digest_size=DIGEST_SIZE)
+
+
+def content_hash(path: str) -> str:
+    """Hash del contenido de un archivo ya escrito, leído por bloques."""
+    hasher = new_hasher()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def image_size(path: str) -> tuple[Optional[int], Optional[int]]:
+    """Ancho y alto de una imagen leyendo solo su cabecera."""
+    if Image is None:
+        return None, None
+    try:
+        with Image.open(path) as image:
+            return image.size
+    except Exception:
+        return None, None
+
+
+class GalleryIndex:
+    """Índice SQLite de las imágenes de una carpeta."""
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.path = os.path.join(folder, INDEX_NAME)
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        try:
+            self._db = self._connect()
+        except sqlite3.DatabaseError as e:
+            # Todo lo que guarda se puede reconstruir desde la carpeta salvo
+            # las URLs; mejor perderlas que quedarse sin galería.
+            print(f"[GalleryIndex] Índice dañado, se reconstruye ({self.path}): {e}")
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(self.path + suffix)
+                except OSError:
+                    pass
+            self._db = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(
+            self.path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False,
+        )
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA foreign_keys=ON")
+        version = db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            db.executescript("".join(f"DROP TABLE IF EXISTS {t};" for t in _TABLES))
+        db.executescript(_SCHEMA)
+        db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        return db
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Transacción de escritura (con el bloqueo tomado)."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # ── Listado de la galería ────────────────────────────────────────
+    def count(self) -> int:
+        return self._query("SELECT COUNT(*) FROM files")[0][0]
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def listing(self) -> list[tuple[str, int]]:
+        """(nombre, bytes) de cada archivo, por nombre."""
+        return self._query("SELECT name, size FROM files ORDER BY name")
+
+    def next_name(self, after: Optional[str] = None) -> Optional[str]:
+        """Siguiente archivo por nombre (el primero si after es None)."""
+        names = self.names_after(after, 1)
+        return names[0] if names else None
+
+    def names_after(self, after: Optional[str], limit: int) -> list[str]:
+        """Los `limit` archivos siguientes por nombre (desde el principio si after es None)."""
+        if after is None:
+            rows = self._query("SELECT name FROM files ORDER BY name LIMIT ?", (limit,))
+        else:
+            rows = self._query(
+                "SELECT name FROM files WHERE name > ? ORDER BY name LIMIT ?", (after, limit)
+            )
+        return [name for name, in rows]
+
+    # ── Duplicados ───────────────────────────────────────────────────
+    def path_for_hash(self, digest: str) -> Optional[str]:
+        """Ruta de la imagen con ese contenido, si sigue en la carpeta."""
+        # Si dos archivos tienen el mismo contenido, vale el primero indexado
+        rows = self._query("SELECT name FROM files WHERE hash = ? ORDER BY added", (digest,))
+        return self._existing(name for name, in rows)
+
+    def path_for_url(self, url: str) -> Optional[str]:
+        """Ruta de la imagen descargada desde esa URL, si sigue en la carpeta."""
+        rows = self._query("SELECT name FROM urls WHERE url = ?", (url,))
+        return self._existing(name for name, in rows)
+
+    def _existing(self, names: Iterable[str]) -> Optional[str]:
+        """La primera que sigue en disco; las que ya no están se olvidan."""
+        missing = []
+        try:
+            for name in names:
+                path = os.path.join(self.folder, name)
+                if os.path.isfile(path):
+                    return path
+                missing.append(name)
+            return None
+        finally:
+            self.remove(missing)
+
+    # ── Altas y bajas ────────────────────────────────────────────────
+    def add(
+        self,
+        path: str,
+        digest: str,
+        url: Optional[str] = None,
+        query: Optional[str] = None,
+    ):
+        """Registra un archivo recién escrito en la carpeta."""
+        name = os.path.basename(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        width, height = image_size(path)
+        with self._write() as db:
+            db.execute("DELETE FROM files WHERE name = ?", (name,))
+            db.execute(
+                "INSERT INTO files (name, size, mtime, width, height, hash, url, query, added)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (name, st.st_size, st.st_mtime_ns, width, height, digest, url, query, time.time()),
+            )
+            if url:
+                db.execute("INSERT OR REPLACE INTO urls (url, name) VALUES (?, ?)", (url, name))
+
+    def add_url(self, url: str, path: str):
+        """Otra URL que resultó ser una imagen que ya estaba en la carpeta."""
+        with self._write() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO urls (url, name) SELECT ?, name FROM files WHERE name = ?",
+                (url, os.path.basename(path)),
+            )
+
+    def remove(self, names: Iterable[str]):
+        """Olvida archivos que ya no están en la carpeta."""
+        names = [(name,) for name in names]
+        if names:
+            with self._write() as db:
+                db.executemany("DELETE FROM files WHERE name = ?", names)
+
+    # ── Sincronización con la carpeta ────────────────────────────────
+    def sync(self) -> GalleryChanges:
+        """
+        Pone el índice al día con la carpeta: da de alta los archivos nuevos,
+        olvida los borrados y marca como pendientes los modificados. Solo
+        hace stat(); devuelve lo que ha cambiado.
+        """
+        try:
+            on_disk = {
+                e.name: e.stat()
+                for e in os.scandir(self.folder)
+                if e.is_file() and e.name.lower().endswith(IMAGE_EXTENSIONS)
+            }
+        except OSError:
+            return GalleryChanges([], [], [])
+
+        known = {
+            name: (size, mtime)
+            for name, size, mtime in self._query("SELECT name, size, mtime FROM files")
+        }
+        gone = [(name,) for name in known if name not in on_disk]
+        new, changed = [], []
+        now = time.time()
+        for name, st in on_disk.items():
+            current = known.get(name)
+            if current is None:
+                new.append((name, st.st_size, st.st_mtime_ns, now))
+            elif current != (st.st_size, st.st_mtime_ns):
+                changed.append((st.st_size, st.st_mtime_ns, name))
+        changes = GalleryChanges(
+            [(name, size) for name, size, _mtime, _added in new],
+            [name for name, in gone],
+            [(name, size) for size, _mtime, name in changed],
+        )
+        if not changes:
+            return changes
+
+        with self._write() as db:
+            db.executemany("DELETE FROM files WHERE name = ?", gone)
+            db.executemany(
+                "INSERT OR IGNORE INTO files (name, size, mtime, added) VALUES (?, ?, ?, ?)", new
+            )
+            # Misma URL de origen, pero el contenido ya no es el que se indexó
+            db.executemany(
+                "UPDATE files SET size = ?, mtime = ?, width = NULL, height = NULL, hash = NULL"
+                " WHERE name = ?",
+                changed,
+            )
+            db.executemany("DELETE FROM perceptual WHERE name = ?", [(c[2],) for c in changed])
+        return changes
+
+    def fill_pending(self, token: Optional[CancelToken] = None):
+        """
+        Calcula el hash y las dimensiones de los archivos dados de alta por
+        sync(). Lanza Cancelled si se cancela el token.
+        """
+        pending = self._query("SELECT name, size, mtime FROM files WHERE hash IS NULL")
+        # Leer fuera del bloqueo: puede tardar en carpetas grandes
+        for name, size, mtime in pending:
+            if token is not None:
+                token.raise_if_cancelled()
+            path = os.path.join(self.folder, name)
+            try:
+                digest = content_hash(path)
+            except OSError:
+                continue
+            width, height = image_size(path)
+            with self._write() as db:
+                # Si el archivo volvió a cambiar mientras tanto, lo verá el próximo sync()
+                db.execute(
+                    "UPDATE files SET hash = ?, width = ?, height = ?"
+                    " WHERE name = ? AND size = ? AND mtime = ?",
+                    (digest, width, height, name, size, mtime),
+                )
+
+    def refresh(self, token: Optional[CancelToken] = None):
+        """sync() y fill_pending(): el índice queda completo."""
+        self.sync()
+        self.fill_pending(token)
+
+    # ── Hashes perceptuales ──────────────────────────────────────────
+    def perceptual(self, kind: str) -> list[tuple[str, Optional[str]]]:
+        """(nombre, hash en hex o None) de los archivos que ya lo tienen."""
+        return self._query("SELECT name, value FROM perceptual WHERE kind = ?", (kind,))
+
+    def missing_perceptual(self, kind: str) -> list[str]:
+        """Archivos sin hash perceptual de ese tipo."""
+        rows = self._query(
+            "SELECT f.name FROM files f LEFT JOIN perceptual p"
+            " ON p.name = f.name AND p.kind = ? WHERE p.name IS NULL ORDER BY f.name",
+            (kind,),
+        )
+        return [name for name, in rows]
+
+    def set_perceptual(self, kind: str, values: Iterable[tuple[str, Optional[str]]]):
+        """
+        Guarda hashes perceptuales (None: no se pudo decodificar, no se
+        reintenta); se descartan si el archivo cambia.
+        """
+        with self._write() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO perceptual (name, kind, value)"
+                " SELECT name, ?, ? FROM files WHERE name = ?",
+                [(kind, value, name) for name, value in values],
+            )
+
+
+_indexes: dict[str, GalleryIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_gallery_index(folder: str) -> GalleryIndex:
+    """Índice compartido de una carpeta (se abre la primera vez)."""
+    folder = os.path.abspath(folder)
+    with _indexes_lock:
+        index = _indexes.get(folder)
+        if index is None:
+            index = _indexes[folder] = GalleryIndex(folder)
+        return index
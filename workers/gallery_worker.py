@@ -0,0 +1,51 @@
+"""
+Worker que pone al día el índice de la galería local.
+Se ejecuta en un hilo secundario (QThread) para no bloquear la interfaz.
+
+Primero sincroniza el índice con la carpeta (solo stat() de cada archivo) y
+emite synced con los cambios, para que la galería inserte, quite o actualice
+solo esas tarjetas. Después, si hay imágenes nuevas o se pide con rebuild,
+construye el índice de casi duplicados: los resultados de búsqueda que ya
+están en la galería (aunque sea a otra resolución o con otra compresión) se
+marcan como «ya la tienes». Por último calcula el hash de contenido y las
+dimensiones de los archivos nuevos.
+
+Todo queda guardado en el índice de la carpeta (ver workers/gallery_index.py),
+así que solo la primera vez se leen todas las imágenes.
+"""
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from workers.cancellation import CancelToken, Cancelled
+from workers.gallery_index import get_gallery_index
+from workers.perceptual_hash import DEFAULT_KIND, folder_index
+
+
+class GalleryIndexWorker(QThread):
+    """Hilo que sincroniza el índice de una carpeta y sus hashes."""
+
+    synced = pyqtSignal(object)  # GalleryChanges: lo que el índice no conocía
+    ready = pyqtSignal(object)   # NearDuplicateIndex con las rutas de la galería
+    error = pyqtSignal(str)
+
+    def __init__(self, folder: str, rebuild: bool = True):
+        super().__init__()
+        self.folder = folder
+        self.rebuild = rebuild
+        self.token = CancelToken()
+
+    def cancel(self):
+        """Deja de indexar; no se emitirá ready."""
+        self.token.cancel()
+
+    def run(self):
+        try:
+            gallery = get_gallery_index(self.folder)
+            changes = gallery.sync()
+            self.synced.emit(changes)
+            if self.rebuild or changes or gallery.missing_perceptual(DEFAULT_KIND):
+                self.ready.emit(folder_index(self.folder, token=self.token))
+            gallery.fill_pending(self.token)
+        except Cancelled:
+            return
+        except Exception as e:
+            self.error.emit(str(e))
@@ -0,0 +1,179 @@
+"""
+Extracción de atributos de las páginas de resultados.
+
+Los motores solo necesitan unos pocos atributos de unas pocas etiquetas
+(<img src>, <a class="iusc" m>...), así que no hace falta construir el árbol
+completo de BeautifulSoup sobre páginas de cientos de KB. Este módulo ofrece
+varios backends con la misma interfaz y usa el más rápido que esté
+instalado:
+
+- selectolax: parser HTML5 en C (Lexbor); el más rápido.
+- lxml: parser en C de libxml2.
+- html.parser: BeautifulSoup con SoupStrainer, solo construye las etiquetas
+  pedidas. No necesita dependencias extra y es el último recurso.
+
+selectolax y lxml son opcionales (ver requirements.txt). El micro-benchmark
+de benchmarks/bench_html_parsers.py compara los backends sobre páginas de
+ejemplo.
+"""
+import json
+import re
+from typing import Any, Iterator, Optional
+
+# Orden de preferencia de los backends
+BACKENDS = ("selectolax", "lxml", "html.parser")
+
+Attrs = tuple[Optional[str], ...]
+
+# URLs de alta resolución que Google incrusta en los scripts de la página
+GOOGLE_FULL_SIZE = re.compile(
+    r'\["(https?://[^"]+\.(?:jpg|jpeg|png|gif|webp))",\s*\d+,\s*\d+\]'
+)
+
+
+class Extractor:
+    """Interfaz común de los backends."""
+
+    name = ""
+
+    def parse(self, html: str, tags: tuple[str, ...]) -> Any:
+        """Analiza la página; `tags` son las etiquetas que se van a consultar."""
+        raise NotImplementedError
+
+    def attributes(
+        self,
+        doc: Any,
+        tag: str,
+        attrs: tuple[str, ...],
+        css_class: Optional[str] = None,
+    ) -> Iterator[Attrs]:
+        """Valores de `attrs` (None si falta) de cada `tag` con la clase indicada."""
+        raise NotImplementedError
+
+
+class SelectolaxExtractor(Extractor):
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+
+    def parse(self, html: str, tags: tuple[str, ...]) -> Any:
+        return self._parser(html)
+
+    def attributes(self, doc, tag, attrs, css_class=None):
+        selector = f"{tag}.{css_class}" if css_class else tag
+        for node in doc.css(selector):
+            values = node.attributes
+            yield tuple(values.get(name) for name in attrs)
+
+
+class LxmlExtractor(Extractor):
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        self._lxml = lxml.html
+
+    def parse(self, html: str, tags: tuple[str, ...]) -> Any:
+        if not html.strip():
+            return None
+        return self._lxml.document_fromstring(html)
+
+    def attributes(self, doc, tag, attrs, css_class=None):
+        if doc is None:
+            return
+        for node in doc.iter(tag):
+            if css_class and css_class not in (node.get("class") or "").split():
+                continue
+            yield tuple(node.get(name) for name in attrs)
+
+
+class SoupExtractor(Extractor):
+    name = "html.parser"
+
+    def __init__(self):
+        from bs4 import BeautifulSoup, SoupStrainer
+        self._soup = BeautifulSoup
+        self._strainer = SoupStrainer
+
+    def parse(self, html: str, tags: tuple[str, ...]) -> Any:
+        # Solo se construyen los nodos de las etiquetas pedidas
+        return self._soup(html, "html.parser", parse_only=self._strainer(list(tags)))
+
+    def attributes(self, doc, tag, attrs, css_class=None):
+        found = doc.find_all(tag, class_=css_class) if css_class else doc.find_all(tag)
+        for node in found:
+            yield tuple(node.get(name) for name in attrs)
+
+
+_CLASSES = {
+    "selectolax": SelectolaxExtractor,
+    "lxml": LxmlExtractor,
+    "html.parser": SoupExtractor,
+}
+_instances: dict[str, Extractor] = {}
+
+
+def available_backends() -> list[str]:
+    """Backends que se pueden usar en esta instalación, por preferencia."""
+    return [name for name in BACKENDS if _load(name) is not None]
+
+
+def get_extractor(name: Optional[str] = None) -> Extractor:
+    """
+    Backend indicado o, sin nombre, el más rápido instalado.
+    Si el indicado no está instalado se usa html.parser.
+    """
+    if name is not None:
+        return _load(name) or _load("html.parser")
+    for candidate in BACKENDS:
+        extractor = _load(candidate)
+        if extractor is not None:
+            return extractor
+    raise RuntimeError("No hay ningún parser HTML disponible")
+
+
+def _load(name: str) -> Optional[Extractor]:
+    if name not in _instances:
+        try:
+            _instances[name] = _CLASSES[name]()
+        except (ImportError, KeyError):
+            return None
+    return _instances[name]
+
+
+# ── Extracción por motor ─────────────────────────────────────────────
+def google_image_urls(html: str, extractor: Optional[Extractor] = None) -> Iterator[str]:
+    """Miniaturas de <img> y, después, las URLs originales de los scripts."""
+    extractor = extractor or get_extractor()
+    doc = extractor.parse(html, ("img",))
+    for src, data_src, data_iurl in extractor.attributes(
+        doc, "img", ("src", "data-src", "data-iurl")
+    ):
+        src = src or data_src or data_iurl
+        if src and src.startswith("http") and "google" not in src:
+            yield src
+    for match in GOOGLE_FULL_SIZE.finditer(html):
+        yield match.group(1)
+
+
+def bing_image_urls(html: str, extractor: Optional[Extractor] = None) -> Iterator[str]:
+    """URLs originales de los metadatos de <a class="iusc">; si no hay, miniaturas."""
+    extractor = extractor or get_extractor()
+    doc = extractor.parse(html, ("a", "img"))
+    found = False
+    for (meta,) in extractor.attributes(doc, "a", ("m",), "iusc"):
+        try:
+            murl = json.loads(meta or "{}").get("murl")
+        except (ValueError, AttributeError):
+            continue
+        if murl:
+            found = True
+            yield murl
+    if found:
+        return
+    for src, data_src in extractor.attributes(doc, "img", ("src", "data-src"), "mimg"):
+        src = src or data_src
+        if src and src.startswith("http"):
+            yield src
@@ -0,0 +1,160 @@
+"""
+Sesión HTTP compartida por todos los workers.
+
+Una única requests.Session para todo el proceso reutiliza las conexiones
+TCP/TLS (keep-alive) con un pool por host, aplica una política de
+reintentos con backoff y envía siempre las mismas cabeceras.
+
+requests.Session se puede compartir entre hilos para peticiones sencillas
+(GET/POST sin modificar el estado de la sesión), que es como la usan los workers.
+
+Las peticiones aceptan un CancelToken (workers/cancellation.py) para poder
+abortarlas desde la interfaz mientras se recibe la respuesta.
+
+Todas las peticiones pasan por el limitador de ritmo por host
+(workers/rate_limiter.py). Los 429/503 no los reintenta urllib3 sino
+request(), que espera lo que pida el host sin dejar de atender la
+cancelación y, si el host sigue limitando, lanza RateLimited en lugar de
+devolver una página de error que se analizaría como «sin resultados».
+"""
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from workers.cancellation import CancelToken
+from workers.rate_limiter import RateLimited, get_rate_limiter, host_of
+
+# User-Agent realista para evitar bloqueos
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept": (
+        "text/html,application/xhtml+xml,application/xml;"
+        "q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8"
+    ),
+    "Accept-Language": "en-US,en;q=0.9,es;q=0.8",
+}
+
+# ─── Pool de conexiones ──────────────────────────────────────────────
+POOL_HOSTS = 32        # hosts distintos con pool propio
+POOL_PER_HOST = 16     # conexiones keep-alive por host
+
+# ─── Reintentos ──────────────────────────────────────────────────────
+RETRY_TOTAL = 2
+RETRY_BACKOFF = 0.4    # 0.4s, 0.8s, ...
+RETRY_STATUS = (500, 502, 504)   # 429 y 503 los gestiona el limitador
+
+# ─── Limitación del host ─────────────────────────────────────────────
+THROTTLE_RETRIES = 2      # reintentos tras un 429/503
+MAX_THROTTLE_WAIT = 30.0  # más espera que esta se notifica en vez de esperarla
+
+_session: Optional[requests.Session] = None
+_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=RETRY_TOTAL,
+        connect=RETRY_TOTAL,
+        read=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUS,
+        respect_retry_after_header=False,  # si no, urllib3 reintenta los 429 por su cuenta
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_HOSTS,
+        pool_maxsize=POOL_PER_HOST,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Devuelve la sesión del proceso, creándola la primera vez."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+
+def request(
+    method: str,
+    url: str,
+    token: Optional[CancelToken] = None,
+    **kwargs,
+) -> requests.Response:
+    """
+    Petición con la sesión compartida, al ritmo que permite el host.
+
+    Con token, el cuerpo se lee de forma que token.cancel() lo interrumpa
+    (lanza Cancelled). Con stream=True el cuerpo no se lee aquí: el llamador
+    debe leerlo dentro de token.track(response). Lanza RateLimited si el
+    host sigue limitando tras THROTTLE_RETRIES reintentos.
+    """
+    limiter = get_rate_limiter()
+    retries = 0
+    while True:
+        limiter.acquire(url, token)
+        response = send(method, url, token, **kwargs)
+        if not limiter.record(response):
+            return response
+        response.close()
+        wait = limiter.blocked_for(url)
+        if retries >= THROTTLE_RETRIES or wait > MAX_THROTTLE_WAIT:
+            raise RateLimited(host_of(url), response.status_code, wait)
+        retries += 1
+
+
+def send(
+    method: str,
+    url: str,
+    token: Optional[CancelToken] = None,
+    **kwargs,
+) -> requests.Response:
+    """Como request(), pero sin pasar por el limitador ni reintentar los 429/503."""
+    if token is None:
+        return get_session().request(method, url, **kwargs)
+
+    token.raise_if_cancelled()
+    if kwargs.get("stream"):
+        return get_session().request(method, url, **kwargs)
+
+    kwargs["stream"] = True
+    response = get_session().request(method, url, **kwargs)
+    with token.track(response):
+        response.content  # lee y guarda el cuerpo completo
+    return response
+
+
+def rate_limits() -> list[dict]:
+    """Estado del limitador por host (ritmo, bloqueo, avisos), para vigilarlo."""
+    return get_rate_limiter().snapshot()
+
+
+def get(url: str, token: Optional[CancelToken] = None, **kwargs) -> requests.Response:
+    return request("GET", url, token, **kwargs)
+
+
+def post(url: str, token: Optional[CancelToken] = None, **kwargs) -> requests.Response:
+    return request("POST", url, token, **kwargs)
+
+
+def close_session():
+    """Cierra las conexiones abiertas. La siguiente petición crea otra sesión."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,229 @@
+"""
+Lectura por bloques de respuestas HTTP con imágenes.
+
+El cuerpo se lee por bloques en lugar de cargarlo entero con
+response.content, y se aborta en cuanto se detecta que la respuesta no es
+una imagen o que excede el límite, o cuando se cancela el CancelToken
+recibido.
+
+- check_headers() valida estado, Content-Type y tamaño antes de leer nada.
+- ImageFile escribe una descarga en un archivo temporal que recibe su nombre
+  definitivo de forma atómica al terminar, sin pisar nunca un archivo
+  existente (la usa core/download.py).
+- read_limited() lee en memoria las miniaturas con un tamaño máximo.
+"""
+import itertools
+import os
+import tempfile
+from typing import Mapping, Optional
+
+import requests
+
+from workers.cancellation import CancelToken
+from workers.gallery_index import new_hasher
+
+CHUNK_SIZE = 64 * 1024
+
+# Extensión según el Content-Type declarado por el servidor
+CONTENT_TYPES = {
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/pjpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+    "image/bmp": "bmp",
+}
+
+# Tipos genéricos en los que hay que mirar los primeros bytes
+_GENERIC_TYPES = ("", "application/octet-stream", "binary/octet-stream")
+
+# Bytes necesarios para reconocer cualquier firma (la de WebP es la más larga)
+SNIFF_BYTES = 12
+
+
+class ImageRejected(Exception):
+    """La respuesta no es una imagen o supera el tamaño máximo."""
+
+
+def sniff_extension(head: bytes) -> Optional[str]:
+    """Detecta el formato por la firma de los primeros bytes."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head.startswith(b"BM"):
+        return "bmp"
+    return None
+
+
+def check_response(response: requests.Response, max_bytes: int) -> Optional[str]:
+    """
+    Valida estado, Content-Type y Content-Length antes de leer el cuerpo.
+    Devuelve la extensión declarada, o None si hay que deducirla del contenido.
+    """
+    return check_headers(response.status_code, response.headers, max_bytes)
+
+
+def check_headers(status: int, headers: Mapping[str, str], max_bytes: int) -> Optional[str]:
+    """Como check_response(), con el estado y las cabeceras de cualquier cliente HTTP."""
+    if status != 200:
+        raise ImageRejected(f"HTTP {status}")
+
+    ct = headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if ct not in _GENERIC_TYPES and not ct.startswith("image/"):
+        raise ImageRejected(f"Content-Type no es una imagen: {ct}")
+
+    length = int(headers.get("Content-Length") or 0)
+    if length > max_bytes:
+        raise ImageRejected(f"Demasiado grande ({length} bytes)")
+
+    if ct.startswith("image/"):
+        # Tipo de imagen no listado: se mantiene el jpg por defecto
+        return CONTENT_TYPES.get(ct, "jpg")
+    return None
+
+
+class ImageFile:
+    """
+    Imagen que se escribe por bloques en un .part de la carpeta de destino
+    y que commit() renombra a su nombre definitivo; discard() la elimina.
+    Si la extensión no se conoce, se deduce de la firma de los primeros
+    SNIFF_BYTES bytes, aunque lleguen repartidos en varios bloques.
+    El hash del contenido (digest) se calcula mientras se escribe.
+    """
+
+    def __init__(self, dest_base: str, ext: Optional[str], max_bytes: int):
+        self.dest_base = dest_base
+        self.ext = ext
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._head = b""
+        self._hasher = new_hasher()
+        folder = os.path.dirname(dest_base) or "."
+        fd, self.tmp_path = tempfile.mkstemp(dir=folder, suffix=".part")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes):
+        if not chunk:
+            return
+        if self.ext is None:
+            self._head += chunk
+            if len(self._head) < SNIFF_BYTES:
+                return
+            chunk, self._head = self._head, b""
+            self.ext = _sniff_or_reject(chunk)
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise ImageRejected(f"Supera el tamaño máximo ({self.max_bytes} bytes)")
+        self._hasher.update(chunk)
+        self._file.write(chunk)
+
+    def finish(self):
+        """
+        Marca el final del cuerpo. Una imagen más corta que SNIFF_BYTES aún no
+        tiene extensión ni está escrita: se decide con lo que haya llegado.
+        """
+        if self.ext is not None:
+            return
+        if not self._head:
+            raise ImageRejected("Respuesta vacía")
+        head, self._head = self._head, b""
+        self.ext = _sniff_or_reject(head)
+        self.write(head)
+
+    @property
+    def digest(self) -> str:
+        """Hash del contenido escrito hasta ahora (ver workers/gallery_index.py)."""
+        return self._hasher.hexdigest()
+
+    def commit(self) -> str:
+        """
+        Cierra el archivo y le da su nombre definitivo; devuelve la ruta final.
+        Nunca pisa un archivo existente (otra descarga del mismo segundo con
+        el mismo prefijo): si el nombre está ocupado, prueba con _2, _3...
+        """
+        self.finish()
+        self._file.close()
+        for attempt in itertools.count(1):
+            suffix = f"_{attempt}" if attempt > 1 else ""
+            final_path = f"{self.dest_base}{suffix}.{self.ext}"
+            try:
+                _move_exclusive(self.tmp_path, final_path)
+            except FileExistsError:
+                continue
+            return final_path
+
+    def discard(self):
+        self._file.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+def _move_exclusive(src: str, dest: str):
+    """Mueve src a dest solo si dest no existe; si existe, FileExistsError."""
+    try:
+        os.link(src, dest)
+    except FileExistsError:
+        raise
+    except OSError:
+        # Sin enlaces duros (FAT, algunos montajes): se reserva el nombre
+        # creándolo en exclusiva y después se reemplaza por la imagen
+        os.close(os.open(dest, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        os.replace(src, dest)
+        return
+    os.remove(src)
+
+
+def _chunks(
+    response: requests.Response,
+    max_bytes: int,
+    token: Optional[CancelToken] = None,
+):
+    """Itera los bloques del cuerpo cortando en cuanto se supera el límite."""
+    received = 0
+    for chunk in response.iter_content(CHUNK_SIZE):
+        if token is not None:
+            token.raise_if_cancelled()
+        if not chunk:
+            continue
+        received += len(chunk)
+        if received > max_bytes:
+            raise ImageRejected(f"Supera el tamaño máximo ({max_bytes} bytes)")
+        yield chunk
+    # Un socket cortado por cancel() puede terminar como un cuerpo truncado
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def read_limited(
+    response: requests.Response,
+    max_bytes: int,
+    token: Optional[CancelToken] = None,
+) -> bytes:
+    """Lee en memoria una imagen pequeña (miniaturas) respetando el límite."""
+    ext = check_response(response, max_bytes)
+    parts: list[bytes] = []
+    received = 0
+    for chunk in _chunks(response, max_bytes, token):
+        parts.append(chunk)
+        received += len(chunk)
+        if ext is None and received >= SNIFF_BYTES:
+            ext = _sniff_or_reject(b"".join(parts)[:SNIFF_BYTES])
+    data = b"".join(parts)
+    if ext is None:
+        _sniff_or_reject(data)
+    return data
+
+
+def _sniff_or_reject(head: bytes) -> str:
+    ext = sniff_extension(head)
+    if ext is None:
+        raise ImageRejected("El contenido no es una imagen")
+    return ext
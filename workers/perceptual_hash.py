@@ -0,0 +1,272 @@
+"""
+Hash perceptual de imágenes y búsqueda de casi duplicados.
+
+Dos copias de la misma foto a distinta resolución, o recomprimidas, tienen
+bytes distintos pero casi el mismo hash perceptual: la distancia de Hamming
+entre sus hashes de 64 bits es pequeña. Se calculan sobre la imagen reducida
+a escala de grises (8x8, 9x8 o 32x32 según el tipo):
+
+- ahash: cada píxel frente a la media.
+- dhash: cada píxel frente a su vecino de la derecha (el que se usa por
+  defecto: barato y robusto frente a cambios de tamaño y de compresión).
+- phash: signo de las frecuencias bajas de la DCT frente a su mediana.
+
+Con NumPy instalado, hash_many() calcula los hashes de muchas imágenes a la
+vez con operaciones vectorizadas; sin él se calculan uno a uno en Python con
+el mismo resultado.
+
+folder_index() indexa las imágenes de una carpeta y guarda sus hashes en el
+índice de la galería (workers/gallery_index.py), así que solo se calculan
+una vez.
+
+Las búsquedas por distancia usan un índice multi-tabla (NearDuplicateIndex):
+encontrar los hashes a distancia <= d de uno dado solo mira unas pocas
+cubetas, así que sigue siendo rápido con cientos de miles de imágenes.
+"""
+import math
+import os
+from functools import lru_cache
+from itertools import combinations
+from typing import Generic, Iterable, Iterator, Optional, TypeVar
+
+from workers.cancellation import CancelToken
+from workers.gallery_index import get_gallery_index
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dependencia opcional
+    np = None
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - Pillow está en requirements.txt
+    Image = None
+
+DEFAULT_KIND = "dhash"
+NEAR_DISTANCE = 8       # bits distintos (de 64) para considerar dos imágenes iguales
+MIN_BITS = 4            # hashes con menos bits a 1 (o a 0) son de imágenes casi planas
+
+# Tamaño (ancho, alto) en grises que necesita cada tipo de hash
+INPUT_SIZES = {
+    "ahash": (8, 8),
+    "dhash": (9, 8),
+    "phash": (32, 32),
+}
+_DCT_SIZE = 32
+_DCT_KEEP = 8
+
+
+def input_size(kind: str = DEFAULT_KIND) -> tuple[int, int]:
+    return INPUT_SIZES[kind]
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def is_informative(value: int) -> bool:
+    """
+    Las imágenes casi planas (fondos lisos, logotipos) dan hashes casi todo
+    ceros o unos y coincidirían entre sí; no sirven para buscar duplicados.
+    """
+    ones = bin(value).count("1")
+    return MIN_BITS <= ones <= 64 - MIN_BITS
+
+
+# ── Hash de una imagen (Python puro) ─────────────────────────────────
+def _bits_to_int(bits: Iterable[bool]) -> int:
+    value = 0
+    for bit in bits:
+        value = (value << 1) | bool(bit)
+    return value
+
+
+def _dct_matrix() -> list[list[float]]:
+    n = _DCT_SIZE
+    return [
+        [
+            (math.sqrt(1 / n) if k == 0 else math.sqrt(2 / n))
+            * math.cos(math.pi * (2 * i + 1) * k / (2 * n))
+            for i in range(n)
+        ]
+        for k in range(n)
+    ]
+
+
+_DCT = _dct_matrix()
+
+
+def hash_pixels(pixels: bytes, kind: str = DEFAULT_KIND) -> int:
+    """
+    Hash de 64 bits de una imagen en grises, dada fila a fila (un byte por
+    píxel) al tamaño input_size(kind).
+    """
+    width, height = INPUT_SIZES[kind]
+    if len(pixels) != width * height:
+        raise ValueError(f"{kind} necesita {width}x{height} píxeles")
+
+    if kind == "ahash":
+        mean = sum(pixels) / len(pixels)
+        return _bits_to_int(p > mean for p in pixels)
+    if kind == "dhash":
+        return _bits_to_int(
+            pixels[y * width + x] > pixels[y * width + x + 1]
+            for y in range(height) for x in range(width - 1)
+        )
+
+    # phash: DCT 2D (D · X · Dᵀ) y solo las frecuencias bajas
+    rows = [pixels[y * width:(y + 1) * width] for y in range(height)]
+    dx = [[sum(d[i] * rows[i][x] for i in range(height)) for x in range(width)]
+          for d in _DCT[:_DCT_KEEP]]
+    low = [sum(row[x] * d[x] for x in range(width)) for row in dx for d in _DCT[:_DCT_KEEP]]
+    median = sorted(low[1:])[len(low[1:]) // 2]
+    return _bits_to_int(c > median for c in low)
+
+
+# ── Hash de muchas imágenes (NumPy) ──────────────────────────────────
+def hash_many(images: list[bytes], kind: str = DEFAULT_KIND) -> list[int]:
+    """Hashes de varias imágenes en grises (mismo formato que hash_pixels)."""
+    if np is None or len(images) < 2:
+        return [hash_pixels(pixels, kind) for pixels in images]
+
+    width, height = INPUT_SIZES[kind]
+    for pixels in images:
+        if len(pixels) != width * height:
+            raise ValueError(f"{kind} necesita {width}x{height} píxeles")
+    stack = np.frombuffer(b"".join(images), dtype=np.uint8).reshape(-1, height, width)
+
+    if kind == "ahash":
+        values = stack.reshape(len(images), -1).astype(np.float64)
+        bits = values > values.mean(axis=1, keepdims=True)
+    elif kind == "dhash":
+        bits = (stack[:, :, :-1] > stack[:, :, 1:]).reshape(len(images), -1)
+    else:
+        dct = np.array(_DCT)[:_DCT_KEEP]
+        low = (dct @ stack.astype(np.float64) @ dct.T).reshape(len(images), -1)
+        median = np.sort(low[:, 1:], axis=1)[:, (low.shape[1] - 1) // 2]
+        bits = low > median[:, None]
+
+    packed = np.packbits(bits, axis=1)  # 8 bytes por imagen, el primer bit es el más alto
+    return [int.from_bytes(row.tobytes(), "big") for row in packed]
+
+
+# ── Lectura de archivos ──────────────────────────────────────────────
+def file_pixels(path: str, kind: str = DEFAULT_KIND) -> bytes:
+    """
+    Píxeles en grises de un archivo al tamaño que necesita `kind`. Los JPEG
+    se decodifican ya reducidos (draft), sin cargar la imagen completa.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow no está instalado")
+    size = INPUT_SIZES[kind]
+    resample = getattr(Image, "Resampling", Image).BOX
+    with Image.open(path) as image:
+        image.draft("L", (size[0] * 8, size[1] * 8))
+        return image.convert("L").resize(size, resample).tobytes()
+
+
+# ── Índice multi-tabla ───────────────────────────────────────────────
+T = TypeVar("T")
+
+CHUNKS = 4          # el hash de 64 bits se parte en 4 trozos de 16 bits
+CHUNK_BITS = 16
+_CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+
+@lru_cache(maxsize=None)
+def _flip_masks(radius: int) -> tuple[int, ...]:
+    """Máscaras de CHUNK_BITS bits con como mucho `radius` bits a 1."""
+    return tuple(
+        sum(1 << bit for bit in bits)
+        for r in range(radius + 1)
+        for bits in combinations(range(CHUNK_BITS), r)
+    )
+
+
+class NearDuplicateIndex(Generic[T]):
+    """
+    Índice de hashes para buscar los que están a distancia de Hamming
+    pequeña (multi-index hashing): si dos hashes difieren en d bits o menos,
+    alguno de sus CHUNKS trozos difiere en d // CHUNKS bits o menos. Cada
+    trozo tiene su tabla, así que una búsqueda solo mira unas pocas cubetas.
+    """
+
+    def __init__(self):
+        self._tables: list[dict[int, list[int]]] = [{} for _ in range(CHUNKS)]
+        self._entries: list[tuple[int, T]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _chunks(value: int) -> Iterator[int]:
+        for c in range(CHUNKS):
+            yield (value >> (c * CHUNK_BITS)) & _CHUNK_MASK
+
+    def add(self, value: int, item: T):
+        position = len(self._entries)
+        self._entries.append((value, item))
+        for table, chunk in zip(self._tables, self._chunks(value)):
+            table.setdefault(chunk, []).append(position)
+
+    def find(self, value: int, max_distance: int = NEAR_DISTANCE) -> list[tuple[int, T]]:
+        """(distancia, valor) de los hashes a distancia <= max_distance, de menor a mayor."""
+        masks = _flip_masks(max_distance // CHUNKS)
+        candidates: set[int] = set()
+        for table, chunk in zip(self._tables, self._chunks(value)):
+            for mask in masks:
+                bucket = table.get(chunk ^ mask)
+                if bucket:
+                    candidates.update(bucket)
+
+        found = []
+        for position in candidates:
+            other, item = self._entries[position]
+            distance = hamming(value, other)
+            if distance <= max_distance:
+                found.append((distance, item))
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+    def nearest(self, value: int, max_distance: int = NEAR_DISTANCE) -> Optional[T]:
+        found = self.find(value, max_distance)
+        return found[0][1] if found else None
+
+
+# ── Imágenes de una carpeta ──────────────────────────────────────────
+GALLERY_BATCH = 256     # archivos por lote de hash_many()
+
+
+def folder_index(
+    folder: str,
+    kind: str = DEFAULT_KIND,
+    token: Optional[CancelToken] = None,
+) -> NearDuplicateIndex[str]:
+    """
+    Índice de casi duplicados con las imágenes de una carpeta (valor: ruta).
+    Los hashes se guardan en el índice de la galería: solo se calculan los
+    de archivos que aún no lo tienen. Usa los archivos que el índice conoce;
+    si la carpeta puede haber cambiado, antes hay que llamar a su sync().
+    Lanza Cancelled si se cancela el token.
+    """
+    gallery = get_gallery_index(folder)
+    missing = gallery.missing_perceptual(kind)
+    for start in range(0, len(missing), GALLERY_BATCH):
+        if token is not None:
+            token.raise_if_cancelled()
+        names, pixels, failed = [], [], []
+        for name in missing[start:start + GALLERY_BATCH]:
+            try:
+                pixels.append(file_pixels(os.path.join(gallery.folder, name), kind))
+                names.append(name)
+            except Exception:
+                failed.append((name, None))  # no se reintenta hasta que cambie
+        hashes = [(name, f"{value:016x}") for name, value in zip(names, hash_many(pixels, kind))]
+        gallery.set_perceptual(kind, hashes + failed)
+
+    index: NearDuplicateIndex[str] = NearDuplicateIndex()
+    for name, hex_value in gallery.perceptual(kind):
+        value = int(hex_value, 16) if hex_value else None
+        if value is not None and is_informative(value):
+            index.add(value, os.path.join(gallery.folder, name))
+    return index
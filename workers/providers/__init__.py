@@ -0,0 +1,107 @@
+"""
+Registro de proveedores de búsqueda.
+
+Los proveedores incluidos (Google, Bing, DuckDuckGo) se registran al
+importar el paquete. Otros paquetes instalados pueden añadir los suyos sin
+tocar este código declarando un entry point en el grupo ENTRY_POINT_GROUP
+que apunte a una subclase de SearchProvider:
+
+    [project.entry-points."visual_gallery.search_providers"]
+    flickr = "mi_paquete.flickr:FlickrProvider"
+
+select_providers() decide qué proveedores atienden una búsqueda según sus
+capacidades: en modo federado, todos los que aplican los filtros pedidos;
+en modo automático, el más barato (menos peticiones por resultado) que los
+aplica.
+"""
+import threading
+from typing import Optional
+
+from workers.providers.base import SearchProvider
+from workers.providers.bing import BingProvider
+from workers.providers.duckduckgo import DuckDuckGoProvider
+from workers.providers.google import GoogleProvider
+from workers.rate_limiter import get_rate_limiter
+
+ENTRY_POINT_GROUP = "visual_gallery.search_providers"
+FEDERATED = "all"    # todos los proveedores a la vez
+AUTO = "auto"        # el proveedor más barato que aplica los filtros
+
+_registry: dict[str, SearchProvider] = {}
+_lock = threading.Lock()
+_discovered = False
+
+
+def register(provider: SearchProvider, replace: bool = False):
+    """Añade un proveedor al registro (por su NAME) y limita el ritmo de sus hosts."""
+    if not provider.NAME or provider.NAME in (FEDERATED, AUTO):
+        raise ValueError(f"Nombre de proveedor no válido: {provider.NAME!r}")
+    with _lock:
+        if provider.NAME in _registry and not replace:
+            raise ValueError(f"Proveedor ya registrado: {provider.NAME}")
+        _registry[provider.NAME] = provider
+    for host in provider.HOSTS:
+        get_rate_limiter().configure(host, provider.RATE_LIMIT, provider.RATE_BURST)
+
+
+def providers() -> list[SearchProvider]:
+    """Proveedores registrados, en orden de registro."""
+    _discover()
+    with _lock:
+        return list(_registry.values())
+
+
+def get_provider(name: str) -> Optional[SearchProvider]:
+    _discover()
+    with _lock:
+        return _registry.get(name)
+
+
+def select_providers(engine: str, options: dict) -> list[SearchProvider]:
+    """
+    Proveedores que atienden una búsqueda. Si ninguno aplica todos los
+    filtros se usan igualmente (el federado, todos; el automático, el más
+    barato). KeyError si `engine` no es un proveedor conocido.
+    """
+    available = providers()
+    if engine in (FEDERATED, AUTO):
+        capable = [p for p in available if p.honours(options)] or available
+        if engine == FEDERATED:
+            return capable
+        return [min(capable, key=lambda p: p.cost_per_result)] if capable else []
+
+    provider = get_provider(engine)
+    if provider is None:
+        raise KeyError(engine)
+    return [provider]
+
+
+def _discover():
+    """Registra una sola vez los proveedores declarados como entry points."""
+    global _discovered
+    with _lock:
+        if _discovered:
+            return
+        _discovered = True
+
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return
+    found = entry_points()
+    if hasattr(found, "select"):
+        candidates = found.select(group=ENTRY_POINT_GROUP)
+    else:  # Python < 3.10: diccionario por grupo
+        candidates = found.get(ENTRY_POINT_GROUP, [])
+
+    for entry in candidates:
+        try:
+            provider_class = entry.load()
+            register(provider_class())
+        except Exception as e:
+            print(f"[Providers] No se pudo cargar «{entry.name}»: {e}")
+
+
+for _builtin in (GoogleProvider, BingProvider, DuckDuckGoProvider):
+    register(_builtin())
+
@@ -0,0 +1,87 @@
+"""
+Interfaz de los proveedores de búsqueda de imágenes.
+
+Un proveedor declara sus capacidades como atributos de clase (filtros que
+entiende, tamaño de página, plazo, hosts con su ritmo máximo de peticiones
+y coste) e implementa search(), que produce lotes de URLs página a página a
+través del ProviderRun que le pasa la SearchSession. Al registrarlo, el ritmo
+de sus hosts se configura en el limitador de workers/rate_limiter.py.
+"""
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Optional
+
+if TYPE_CHECKING:
+    from core.search import ProviderRun
+
+PARSE_BATCH = 10  # URLs por lote emitido mientras se analiza una página
+
+# Filtros que la interfaz puede pedir y el valor que significa «sin filtro»
+FILTER_DEFAULTS = {
+    "size": "Cualquier tamaño",
+    "color": "Cualquier color",
+}
+
+
+def requested_filters(options: dict) -> dict[str, Any]:
+    """Filtros activos de unas opciones de búsqueda (SafeSearch siempre cuenta)."""
+    filters: dict[str, Any] = {
+        name: options[name]
+        for name, default in FILTER_DEFAULTS.items()
+        if options.get(name, default) not in (default, "", None)
+    }
+    filters["safe"] = bool(options.get("safe", True))
+    return filters
+
+
+def batched(urls: Iterable[str], size: int = PARSE_BATCH) -> Iterator[list[str]]:
+    """Agrupa URLs en lotes para emitirlas según se analiza la página."""
+    batch: list[str] = []
+    for url in urls:
+        batch.append(url)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class SearchProvider:
+    """Base de los proveedores; las subclases rellenan las capacidades."""
+
+    NAME = ""             # identificador estable (clave de caché y de registro)
+    LABEL = ""            # nombre visible en la interfaz
+    PAGE_SIZE = 0         # resultados aproximados por página
+    DEADLINE = 12.0       # segundos que se espera a cada página
+    HOSTS: tuple[str, ...] = ()  # hosts a los que pide las páginas
+    RATE_LIMIT = 1.0      # peticiones por segundo a cada host como máximo
+    RATE_BURST = 1        # peticiones seguidas antes de espaciarlas
+    COST = 1.0            # peticiones HTTP por página
+
+    # filtro -> valor de la interfaz -> parámetro propio del motor
+    FILTERS: dict[str, dict[Any, str]] = {}
+
+    # ── Capacidades ──────────────────────────────────────────────────
+    @property
+    def cost_per_result(self) -> float:
+        return self.COST / max(1, self.PAGE_SIZE)
+
+    def unsupported(self, options: dict) -> list[str]:
+        """Filtros pedidos que este proveedor no puede aplicar."""
+        return [
+            name for name, value in requested_filters(options).items()
+            if value not in self.FILTERS.get(name, {})
+        ]
+
+    def honours(self, options: dict) -> bool:
+        return not self.unsupported(options)
+
+    def param(self, options: dict, name: str) -> Optional[str]:
+        """Parámetro del motor para el filtro `name`, o None si no se pide o no existe."""
+        value = requested_filters(options).get(name)
+        if value is None:
+            return None
+        return self.FILTERS.get(name, {}).get(value)
+
+    # ── Búsqueda ─────────────────────────────────────────────────────
+    def search(self, run: "ProviderRun") -> Iterator[list[str]]:
+        """Lotes de URLs; se pagina con run.pages() y se cachea con run.cached()."""
+        raise NotImplementedError
@@ -0,0 +1,57 @@
+"""Bing Images: página HTML con metadatos JSON en los enlaces de cada resultado."""
+from typing import Iterator
+from urllib.parse import quote_plus
+
+from workers import http_session
+from workers.cancellation import CancelToken
+from workers.html_extract import bing_image_urls
+from workers.providers.base import SearchProvider, batched
+
+
+class BingProvider(SearchProvider):
+    NAME = "bing"
+    LABEL = "Bing"
+    PAGE_SIZE = 35
+    DEADLINE = 12.0
+    HOSTS = ("www.bing.com",)
+    RATE_LIMIT = 1.0
+    RATE_BURST = 2
+    COST = 1.0
+
+    # Los filtros van juntos en qft=+filterui:...+filterui:...
+    FILTERS = {
+        "size": {
+            "Grande": "filterui:imagesize-large",
+            "Mediano": "filterui:imagesize-medium",
+            "Pequeño": "filterui:imagesize-small",
+        },
+        "color": {
+            "Blanco y negro": "filterui:color2-bw",
+            "Transparente": "filterui:photo-transparent",
+            "Rojo": "filterui:color2-FGcls_RED",
+            "Azul": "filterui:color2-FGcls_BLUE",
+            "Verde": "filterui:color2-FGcls_GREEN",
+        },
+        "safe": {True: "strict", False: "off"},
+    }
+
+    def search(self, run) -> Iterator[list[str]]:
+        base = f"https://www.bing.com/images/search?q={quote_plus(run.query)}"
+        qft = [
+            part for part in (self.param(run.options, "size"), self.param(run.options, "color"))
+            if part
+        ]
+        if qft:
+            base += "&qft=" + "".join(f"+{part}" for part in qft)
+        base += f"&adlt={self.param(run.options, 'safe')}"
+
+        def parse_page(url: str, token: CancelToken) -> Iterator[list[str]]:
+            response = http_session.get(url, timeout=15, token=token)
+            response.raise_for_status()
+            yield from batched(bing_image_urls(response.text))
+
+        for page, token in run.pages():
+            url = base
+            if page:
+                url += f"&first={1 + page * self.PAGE_SIZE}&count={self.PAGE_SIZE}"
+            yield from run.cached(page, token, lambda: parse_page(url, token))
@@ -0,0 +1,87 @@
+"""DuckDuckGo Images: API JSON paginada con cursor, protegida por un token VQD."""
+import re
+from typing import Iterator
+from urllib.parse import quote_plus
+
+from workers import http_session
+from workers.cancellation import CancelToken
+from workers.providers.base import SearchProvider
+from workers.search_cache import VQD_TTL, get_search_cache, normalize_query
+
+
+class DuckDuckGoProvider(SearchProvider):
+    NAME = "duckduckgo"
+    LABEL = "DuckDuckGo"
+    PAGE_SIZE = 100
+    DEADLINE = 15.0       # la primera página necesita dos peticiones (VQD + API)
+    HOSTS = ("duckduckgo.com",)
+    RATE_LIMIT = 1.0
+    RATE_BURST = 2        # la primera página pide el VQD y la API seguidos
+    COST = 2.0
+
+    # f= lleva los filtros por posición: tiempo, tamaño, color, tipo
+    FILTERS = {
+        "size": {"Grande": "size:Large", "Mediano": "size:Medium", "Pequeño": "size:Small"},
+        "color": {
+            "Blanco y negro": "color:Monochrome",
+            "Transparente": "type:transparent",
+            "Rojo": "color:Red",
+            "Azul": "color:Blue",
+            "Verde": "color:Green",
+        },
+        # p es el filtro SafeSearch (1 activo, -1 desactivado)
+        "safe": {True: "1", False: "-1"},
+    }
+
+    def search(self, run) -> Iterator[list[str]]:
+        headers = {"Referer": "https://duckduckgo.com/"}
+        slots = ["", self.param(run.options, "size") or "", "", ""]
+        color = self.param(run.options, "color") or ""
+        slots[3 if color.startswith("type:") else 2] = color
+        safe = self.param(run.options, "safe")
+        first_page = f"i.js?l=us-en&o=json&q={quote_plus(run.query)}&f={','.join(slots)}&p={safe}"
+        state = {"next": first_page}  # cursor de la página siguiente (sin VQD)
+
+        def fetch_page(cursor: str, token: CancelToken) -> Iterator[list[str]]:
+            vqd = self._vqd(run.query, token)
+            res = http_session.get(
+                f"https://duckduckgo.com/{cursor}&vqd={vqd}",
+                headers=headers, timeout=10, token=token,
+            )
+            res.raise_for_status()
+            data = res.json()
+            # El cursor «next» no incluye el token VQD
+            state["next"] = data.get("next") or ""
+            yield [img["image"] for img in data.get("results", []) if "image" in img]
+
+        for page, token in run.pages():
+            cursor = state["next"]
+            if not cursor:
+                return
+            yield from run.cached(
+                page, token, lambda: fetch_page(cursor, token), state,
+                is_last=lambda: not state["next"],
+            )
+
+    @staticmethod
+    def _vqd(query: str, token: CancelToken) -> str:
+        """Token VQD de la consulta (necesario para la API de imágenes), con caché."""
+        cache = get_search_cache()
+        key = cache.key("duckduckgo-vqd", normalize_query(query))
+        vqd = cache.get(key)
+        if vqd:
+            return vqd
+
+        res = http_session.post(
+            "https://duckduckgo.com/",
+            data={"q": query},
+            timeout=10,
+            token=token,
+        )
+        res.raise_for_status()
+        vqd_match = re.search(r"vqd=([^&]+)&", res.text)
+        if not vqd_match:
+            raise RuntimeError("DuckDuckGo no devolvió el token VQD")
+        vqd = vqd_match.group(1)
+        cache.put(key, vqd, ttl=VQD_TTL)
+        return vqd
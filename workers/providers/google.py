@@ -0,0 +1,52 @@
+"""Google Images: página HTML con miniaturas y URLs originales en scripts."""
+from typing import Iterator
+from urllib.parse import quote_plus
+
+from workers import http_session
+from workers.cancellation import CancelToken
+from workers.html_extract import google_image_urls
+from workers.providers.base import SearchProvider, batched
+
+
+class GoogleProvider(SearchProvider):
+    NAME = "google"
+    LABEL = "Google"
+    PAGE_SIZE = 100
+    DEADLINE = 12.0
+    HOSTS = ("www.google.com",)
+    RATE_LIMIT = 1.0
+    RATE_BURST = 2
+    COST = 1.0
+
+    FILTERS = {
+        "size": {"Grande": "isz:l", "Mediano": "isz:m", "Pequeño": "isz:i"},
+        "color": {
+            "Blanco y negro": "ic:gray",
+            "Transparente": "ic:trans",
+            "Rojo": "ic:specific,isc:red",
+            "Azul": "ic:specific,isc:blue",
+            "Verde": "ic:specific,isc:green",
+        },
+        "safe": {True: "&safe=active", False: ""},
+    }
+
+    def search(self, run) -> Iterator[list[str]]:
+        base = f"https://www.google.com/search?q={quote_plus(run.query)}&tbm=isch"
+        tbs_parts = [
+            part for part in (self.param(run.options, "size"), self.param(run.options, "color"))
+            if part
+        ]
+        if tbs_parts:
+            base += f"&tbs={','.join(tbs_parts)}"
+        base += self.param(run.options, "safe") or ""
+
+        def parse_page(url: str, token: CancelToken) -> Iterator[list[str]]:
+            response = http_session.get(url, timeout=15, token=token)
+            response.raise_for_status()
+            yield from batched(google_image_urls(response.text))
+
+        for page, token in run.pages():
+            url = base
+            if page:
+                url += f"&ijn={page}&start={page * self.PAGE_SIZE}"
+            yield from run.cached(page, token, lambda: parse_page(url, token))
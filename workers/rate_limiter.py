@@ -0,0 +1,275 @@
+"""
+Limitador de ritmo por host con backoff adaptativo.
+
+Cada host tiene un cubo de fichas (token bucket): se rellena a `rate` fichas
+por segundo hasta `burst`, y cada petición gasta una. Si no quedan, la
+petición espera su turno en lugar de salir y recibir un 429.
+
+El ritmo se adapta a lo que el host tolera:
+
+- Un 429/503 (o la página de CAPTCHA de Google) rebaja el ritmo un 30 %
+  y bloquea el host durante lo que indique Retry-After o, si no lo indica,
+  un backoff exponencial según los avisos seguidos.
+- Cada respuesta correcta sube el ritmo un poco (unas RECOVERY_RATE
+  peticiones/s por segundo de tráfico sin avisos), hasta el máximo
+  configurado para el host, así que se recupera en cuanto vuelve a atender.
+- La ráfaga permitida se reduce en la misma proporción que el ritmo.
+
+Las peticiones que esperaban turno cuando llega un aviso vuelven a la cola
+al acabar el bloqueo, en lugar de salir todas a la vez.
+
+Las esperas atienden un CancelToken; acquire_async() es la versión para
+corrutinas. snapshot() devuelve el estado de cada host para poder vigilarlo.
+"""
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from workers.cancellation import Cancelled, CancelToken
+
+DEFAULT_RATE = 20.0        # peticiones por segundo de un host sin configurar
+DEFAULT_BURST = 32         # peticiones seguidas antes de empezar a espaciar
+MIN_RATE = 0.2             # el ritmo nunca baja de aquí
+BACKOFF_FACTOR = 0.7       # el ritmo se multiplica por esto con cada aviso
+RECOVERY_RATE = 1.0        # peticiones/s que se recuperan por cada segundo sin avisos
+BACKOFF_BASE = 2.0         # segundos de bloqueo del primer aviso sin Retry-After
+MAX_BLOCK = 300.0          # bloqueo máximo, aunque Retry-After pida más
+
+THROTTLE_STATUS = (429, 503)
+CAPTCHA_PATHS = ("/sorry/",)   # Google redirige aquí cuando limita
+
+
+class RateLimited(requests.HTTPError):
+    """El host sigue limitando tras los reintentos."""
+
+    def __init__(self, host: str, status: int, retry_in: float):
+        super().__init__(
+            f"{host} limita las peticiones (HTTP {status}); reintenta en {retry_in:.0f} s"
+        )
+        self.host = host
+        self.status = status
+        self.retry_in = retry_in
+
+
+def host_of(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+def is_throttled(status: int, final_url: str) -> bool:
+    """La respuesta (estado y URL tras redirecciones) indica que el host nos limita."""
+    if status in THROTTLE_STATUS:
+        return True
+    path = urlsplit(final_url or "").path
+    return any(path.startswith(prefix) for prefix in CAPTCHA_PATHS)
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Segundos de la cabecera Retry-After (en segundos o como fecha HTTP)."""
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class HostBucket:
+    """Estado de un host. Se modifica siempre con el lock del RateLimiter."""
+
+    def __init__(self, host: str, rate: float, burst: int):
+        self.host = host
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.strikes = 0          # avisos seguidos sin una respuesta correcta
+        self.epoch = 0            # cambia con cada aviso: anula los turnos reservados
+
+        # Estadísticas
+        self.requests = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+    @property
+    def capacity(self) -> float:
+        """Ráfaga actual: se encoge mientras el ritmo está rebajado."""
+        return max(1.0, self.burst * self.rate / self.max_rate)
+
+    def reserve(self, now: float) -> float:
+        """Gasta una ficha y devuelve los segundos que hay que esperar a usarla."""
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+        self.tokens -= 1
+        # Con fichas negativas, la petición va detrás de las ya reservadas
+        ready_at = self.updated + (-self.tokens / self.rate if self.tokens < 0 else 0.0)
+        ready_at = max(ready_at, self.blocked_until)
+        wait = max(0.0, ready_at - now)
+        self.waited += wait
+        return wait
+
+    def throttle(self, now: float, delay: Optional[float]):
+        self.throttled += 1
+        # Las respuestas que ya estaban en vuelo al bloquear cuentan como un solo aviso
+        if now >= self.blocked_until:
+            self.strikes += 1
+            self.rate = max(MIN_RATE, self.rate * BACKOFF_FACTOR)
+        if delay is None:
+            delay = BACKOFF_BASE * 2 ** (self.strikes - 1)
+        self.blocked_until = max(self.blocked_until, now + min(delay, MAX_BLOCK))
+        # Los turnos reservados se anulan y las fichas empiezan de cero al
+        # acabar el bloqueo: las peticiones salen de nuevo al ritmo rebajado
+        self.epoch += 1
+        self.tokens = 0.0
+        self.updated = max(self.updated, self.blocked_until)
+
+    def recover(self):
+        self.strikes = 0
+        self.rate = min(self.max_rate, self.rate + RECOVERY_RATE / self.rate)
+
+    def state(self, now: float) -> dict:
+        return {
+            "host": self.host,
+            "rate": round(self.rate, 2),
+            "max_rate": self.max_rate,
+            "tokens": round(
+                min(self.capacity, self.tokens + max(0.0, now - self.updated) * self.rate), 2
+            ),
+            "blocked_for": round(max(0.0, self.blocked_until - now), 2),
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "waited": round(self.waited, 2),
+        }
+
+
+class RateLimiter:
+    """Cubos de fichas por host, compartidos por todos los hilos."""
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets: dict[str, HostBucket] = {}
+        self._limits: dict[str, tuple[float, int]] = {}
+
+    def configure(self, host: str, rate: float, burst: int = 1):
+        """Ritmo máximo propio de un host (por ejemplo, el de un motor de búsqueda)."""
+        host = host.lower()
+        with self._lock:
+            self._limits[host] = (rate, burst)
+            bucket = self._buckets.get(host)
+            if bucket is not None:
+                bucket.max_rate = rate
+                bucket.rate = min(bucket.rate, rate)
+                bucket.burst = burst
+                bucket.tokens = min(bucket.tokens, bucket.capacity)
+
+    def acquire(self, url: str, token: Optional[CancelToken] = None):
+        """
+        Espera el turno de una petición a `url`; Cancelled si se cancela.
+        La espera no cuenta para el plazo del token: una petición retenida
+        por el limitador no se da por caducada.
+        """
+        bucket, wait, epoch = self._reserve(url)
+        if wait <= 0:
+            return
+        if token is None:
+            while wait > 0:
+                time.sleep(wait)
+                wait, epoch = self._recheck(bucket, epoch)
+            return
+        with token.paused():
+            while wait > 0:
+                if token.wait(wait):
+                    raise Cancelled()
+                wait, epoch = self._recheck(bucket, epoch)
+
+    async def acquire_async(self, url: str):
+        """Como acquire(), para corrutinas: espera con asyncio.sleep()."""
+        bucket, wait, epoch = self._reserve(url)
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait, epoch = self._recheck(bucket, epoch)
+
+    def record(self, response: requests.Response) -> bool:
+        """Ajusta el ritmo según la respuesta; True si el host nos está limitando."""
+        # Tras una redirección, el host a ajustar es el de la petición original
+        url = response.history[0].url if response.history else response.url
+        return self.record_status(url, response.status_code, response.headers, response.url)
+
+    def record_status(
+        self,
+        url: str,
+        status: int,
+        headers: Mapping[str, str],
+        final_url: Optional[str] = None,
+    ) -> bool:
+        """Como record(), con los datos de la respuesta de cualquier cliente HTTP."""
+        throttled = is_throttled(status, final_url or url)
+        with self._lock:
+            bucket = self._bucket(host_of(url))
+            bucket.requests += 1
+            if throttled:
+                bucket.throttle(time.monotonic(), retry_after(headers))
+            elif status < 500:
+                bucket.recover()
+        return throttled
+
+    def blocked_for(self, url: str) -> float:
+        """Segundos que le quedan de bloqueo al host de `url`."""
+        with self._lock:
+            bucket = self._buckets.get(host_of(url))
+            if bucket is None:
+                return 0.0
+            return max(0.0, bucket.blocked_until - time.monotonic())
+
+    def snapshot(self) -> list[dict]:
+        """Estado de cada host conocido, los más limitados primero."""
+        now = time.monotonic()
+        with self._lock:
+            states = [bucket.state(now) for bucket in self._buckets.values()]
+        return sorted(states, key=lambda s: (-s["throttled"], s["host"]))
+
+    def _reserve(self, url: str) -> tuple[HostBucket, float, int]:
+        with self._lock:
+            bucket = self._bucket(host_of(url))
+            return bucket, bucket.reserve(time.monotonic()), bucket.epoch
+
+    def _recheck(self, bucket: HostBucket, epoch: int) -> tuple[float, int]:
+        """Tras esperar: si llegó un aviso entretanto, el turno ya no vale."""
+        with self._lock:
+            if bucket.epoch == epoch:
+                return 0.0, epoch
+            return bucket.reserve(time.monotonic()), bucket.epoch
+
+    def _bucket(self, host: str) -> HostBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            rate, burst = self._limits.get(host, (self.rate, self.burst))
+            bucket = HostBucket(host, rate, burst)
+            self._buckets[host] = bucket
+        return bucket
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Limitador compartido por todo el proceso."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
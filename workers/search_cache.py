@@ -0,0 +1,150 @@
+"""
+Caché persistente de resultados de búsqueda con caducidad (TTL).
+
+Cada página de resultados de un motor se guarda como JSON en disco con
+clave por motor, consulta normalizada, filtros (tamaño, color, SafeSearch)
+y número de página. Repetir una búsqueda, o volver a una anterior, no hace
+ninguna petición de red mientras la entrada no caduque. También se guarda
+el token VQD de DuckDuckGo de cada consulta, que de otro modo cuesta una
+petición extra por búsqueda.
+
+Las entradas caducadas se borran al leerlas y en una pasada de limpieza la
+primera vez que se usa la caché. Todas las operaciones son seguras entre hilos.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Optional
+
+CACHE_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".cache", "search")
+)
+SEARCH_TTL = 6 * 60 * 60   # segundos que vale una página de resultados
+VQD_TTL = 30 * 60          # los tokens VQD de DuckDuckGo caducan antes
+
+
+def normalize_query(query: str) -> str:
+    """Consulta en minúsculas y con los espacios colapsados."""
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """Caché clave -> valor JSON en disco, con caducidad por entrada."""
+
+    def __init__(self, folder: str = CACHE_DIR, ttl: float = SEARCH_TTL):
+        self.folder = folder
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._purged = False
+        self.hits = 0
+        self.misses = 0
+
+    # ── Claves ───────────────────────────────────────────────────────
+    @staticmethod
+    def key(*parts) -> str:
+        """Clave estable a partir de partes serializables en JSON."""
+        raw = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    # ── Lectura / escritura ──────────────────────────────────────────
+    def get(self, key: str) -> Optional[Any]:
+        """Valor guardado, o None si no existe o ha caducado."""
+        self._purge_once()
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count(hit=False)
+            return None
+
+        if entry.get("expires", 0) < time.time():
+            self._remove(path)
+            self._count(hit=False)
+            return None
+        self._count(hit=True)
+        return entry.get("value")
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None):
+        entry = {"expires": time.time() + (self.ttl if ttl is None else ttl), "value": value}
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[SearchCache] No se pudo guardar {key}: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        for path in self._entries():
+            self._remove(path)
+
+    # ── Internos ─────────────────────────────────────────────────────
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, key[:2], f"{key}.json")
+
+    def _entries(self) -> list[str]:
+        paths: list[str] = []
+        if os.path.isdir(self.folder):
+            for shard in os.scandir(self.folder):
+                if shard.is_dir():
+                    paths.extend(
+                        e.path for e in os.scandir(shard.path) if e.name.endswith(".json")
+                    )
+        return paths
+
+    def _purge_once(self):
+        """Borra las entradas caducadas la primera vez que se usa la caché."""
+        with self._lock:
+            if self._purged:
+                return
+            self._purged = True
+        now = time.time()
+        for path in self._entries():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    expired = json.load(f).get("expires", 0) < now
+            except (OSError, ValueError):
+                expired = True
+            if expired:
+                self._remove(path)
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_cache: Optional[SearchCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Caché compartida por todo el proceso."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SearchCache()
+        return _cache
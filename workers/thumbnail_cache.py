@@ -0,0 +1,317 @@
+"""
+Caché persistente de miniaturas en disco.
+
+Guarda miniaturas ya escaladas (PNG) al tamaño de las tarjetas, con clave
+por hash de la URL (resultados de búsqueda) o por ruta + fecha de
+modificación (galería local). Así las búsquedas repetidas y los reinicios
+de la aplicación no vuelven a descargar ni a decodificar los originales.
+
+El tamaño total está acotado: al superarlo se eliminan las entradas usadas
+hace más tiempo (LRU). Todas las operaciones son seguras entre hilos.
+
+Los originales locales se decodifican ya reducidos (read_local_image): una
+foto de 24 megapíxeles no llega a ocupar 96 MB en memoria solo para sacar
+de ella una miniatura.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, QSize, Qt
+from PyQt5.QtGui import QImage, QImageReader
+
+try:
+    from PIL import ExifTags, Image
+except ImportError:  # pragma: no cover - Pillow está en requirements.txt
+    ExifTags = Image = None
+
+CACHE_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", ".cache", "thumbnails")
+)
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+# Tamaños de las tarjetas de MainWindow
+RESULT_THUMB_SIZE = (236, 200)
+GALLERY_THUMB_SIZE = (216, 190)
+
+# Metadato PNG con el tamaño del original (se conserva en la caché de disco)
+ORIGINAL_SIZE_KEY = "original-size"
+
+# Decodificación reducida de archivos locales
+DECODE_OVERSAMPLE = 2       # se decodifica al menos al doble del destino y se suaviza al escalar
+MAX_DECODE_DIVISOR = 8      # libjpeg reduce a 1/2, 1/4 u 1/8 al decodificar
+EXIF_ASPECT_TOLERANCE = 0.02
+_REDUCIBLE_FORMATS = (b"jpeg",)
+_EXIF_THUMB_OFFSET = 0x0201  # JPEGInterchangeFormat (IFD1)
+_EXIF_THUMB_LENGTH = 0x0202  # JPEGInterchangeFormatLength
+
+
+def is_remote(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+def scale_image(image: QImage, size: tuple[int, int]) -> QImage:
+    """
+    Escala conservando la proporción. Seguro fuera del hilo principal.
+    El tamaño original queda anotado en el propio QImage.
+    """
+    original = original_size(image)
+    scaled = image.scaled(size[0], size[1], Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    scaled.setText(ORIGINAL_SIZE_KEY, f"{original.width()}x{original.height()}")
+    return scaled
+
+
+def read_local_image(path: str, size: Optional[tuple[int, int]] = None) -> QImage:
+    """
+    Archivo local listo para escalarlo a `size` (conservando la proporción)
+    sin decodificarlo a resolución completa cuando no hace falta:
+
+    - Si el JPEG trae una miniatura EXIF que ya cubre ese tamaño, se usa.
+    - Si no, el propio libjpeg lo decodifica a 1/2, 1/4 u 1/8
+      (QImageReader.setScaledSize), dejando margen para escalar con suavizado.
+
+    El tamaño del original queda anotado (ver original_size). Devuelve un
+    QImage nulo si no se puede leer. Seguro fuera del hilo principal.
+    """
+    reader = QImageReader(path)
+    original = reader.size()
+    if size is None or not original.isValid() or reader.format() not in _REDUCIBLE_FORMATS:
+        return reader.read()
+    scale = min(size[0] / original.width(), size[1] / original.height())
+    if scale >= 1:
+        return reader.read()
+
+    image = _exif_thumbnail(path, original, scale)
+    if image is None:
+        divisor = 1
+        while divisor < MAX_DECODE_DIVISOR and divisor * 2 * DECODE_OVERSAMPLE * scale <= 1:
+            divisor *= 2
+        if divisor > 1:
+            reader.setScaledSize(QSize(
+                -(-original.width() // divisor), -(-original.height() // divisor)
+            ))
+        image = reader.read()
+    if not image.isNull():
+        image.setText(ORIGINAL_SIZE_KEY, f"{original.width()}x{original.height()}")
+    return image
+
+
+def _exif_thumbnail(path: str, original: QSize, scale: float) -> Optional[QImage]:
+    """
+    Miniatura EXIF de un JPEG si cubre el destino (original × scale) y tiene
+    su misma proporción; muchas cámaras las guardan con bandas negras.
+    """
+    if Image is None or not hasattr(ExifTags, "IFD"):  # IFD1 accesible desde Pillow 9.3
+        return None
+    try:
+        with Image.open(path) as source:
+            raw = source.info.get("exif") or b""
+            ifd1 = source.getexif().get_ifd(ExifTags.IFD.IFD1)
+    except Exception:
+        return None
+    offset, length = ifd1.get(_EXIF_THUMB_OFFSET), ifd1.get(_EXIF_THUMB_LENGTH)
+    if not offset or not length or not raw.startswith(b"Exif\0\0"):
+        return None
+
+    # Los desplazamientos cuentan desde la cabecera TIFF, tras «Exif\0\0»
+    thumb = QImage.fromData(raw[6 + offset:6 + offset + length])
+    if thumb.isNull():
+        return None
+    covers = (
+        thumb.width() >= original.width() * scale
+        and thumb.height() >= original.height() * scale
+    )
+    aspect = (thumb.width() * original.height()) / (thumb.height() * original.width())
+    return thumb if covers and abs(aspect - 1) <= EXIF_ASPECT_TOLERANCE else None
+
+
+def original_size(image: QImage) -> QSize:
+    """Tamaño del original anotado por scale_image (o el del propio QImage)."""
+    try:
+        width, height = image.text(ORIGINAL_SIZE_KEY).split("x")
+        return QSize(int(width), int(height))
+    except ValueError:
+        return image.size()
+
+
+def gray_pixels(image: QImage, size: tuple[int, int]) -> bytes:
+    """
+    Píxeles en grises de la imagen reducida a `size` (sin conservar la
+    proporción), fila a fila; es la entrada del hash perceptual.
+    """
+    width, height = size
+    small = image.scaled(width, height, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+    small = small.convertToFormat(QImage.Format_Grayscale8)
+    stride = small.bytesPerLine()
+    bits = small.constBits()
+    bits.setsize(stride * height)
+    data = bytes(bits)
+    return b"".join(data[y * stride:y * stride + width] for y in range(height))
+
+
+def encode_png(image: QImage) -> bytes:
+    """Codifica un QImage como PNG en memoria."""
+    array = QByteArray()
+    buffer = QBuffer(array)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "PNG")
+    buffer.close()
+    return bytes(array)
+
+
+class ThumbnailCache:
+    """Caché LRU de miniaturas en disco, acotada por tamaño total."""
+
+    def __init__(self, folder: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: Optional[OrderedDict[str, int]] = None  # clave -> bytes
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ── Claves ───────────────────────────────────────────────────────
+    @staticmethod
+    def url_key(url: str, size: tuple[int, int]) -> str:
+        digest = hashlib.sha1(f"url:{url}".encode("utf-8")).hexdigest()
+        return f"{digest}_{size[0]}x{size[1]}"
+
+    @staticmethod
+    def file_key(path: str, size: tuple[int, int]) -> str:
+        """Clave de un archivo local; cambia si el archivo se modifica."""
+        st = os.stat(path)
+        ident = f"file:{os.path.abspath(path)}:{st.st_mtime_ns}:{st.st_size}"
+        digest = hashlib.sha1(ident.encode("utf-8")).hexdigest()
+        return f"{digest}_{size[0]}x{size[1]}"
+
+    # ── Lectura / escritura ──────────────────────────────────────────
+    def get(self, key: str) -> Optional[bytes]:
+        """Devuelve el PNG de la miniatura o None si no está en caché."""
+        with self._lock:
+            entries = self._load_index()
+            if key not in entries:
+                self.misses += 1
+                return None
+            entries.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # la fecha de modificación marca el último uso
+        except OSError:
+            with self._lock:
+                self._forget(key)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        """Guarda una miniatura y expulsa las más antiguas si hace falta."""
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[ThumbCache] No se pudo guardar {key}: {e}")
+            return
+
+        with self._lock:
+            entries = self._load_index()
+            self._forget(key)
+            entries[key] = len(data)
+            self._total += len(data)
+            self._evict()
+
+    def stats(self) -> dict:
+        """Estadísticas de uso de la caché."""
+        with self._lock:
+            entries = self._load_index()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(entries),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            entries = self._load_index()
+            for key in list(entries):
+                self._remove_file(key)
+            entries.clear()
+            self._total = 0
+
+    # ── Internos (llamar con el lock adquirido) ──────────────────────
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, key[:2], f"{key}.png")
+
+    def _load_index(self) -> OrderedDict:
+        """Reconstruye el índice LRU desde disco la primera vez."""
+        if self._entries is not None:
+            return self._entries
+
+        found: list[tuple[float, str, int]] = []
+        if os.path.isdir(self.folder):
+            for shard in os.scandir(self.folder):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if not entry.name.endswith(".png"):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    found.append((st.st_mtime, entry.name[:-4], st.st_size))
+
+        found.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in found)
+        self._total = sum(size for _, _, size in found)
+        self._evict()
+        return self._entries
+
+    def _forget(self, key: str):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total -= size
+
+    def _evict(self):
+        while self._total > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total -= size
+            self.evictions += 1
+            self._remove_file(key)
+
+    def _remove_file(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+_cache: Optional[ThumbnailCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """Caché compartida por todo el proceso."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ThumbnailCache()
+        return _cache
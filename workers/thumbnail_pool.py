@@ -0,0 +1,287 @@
+"""
+Pool compartido para la carga de miniaturas.
+
+En lugar de lanzar un QThread por cada resultado, un número fijo de hilos
+consume una cola con prioridad. Las peticiones se pueden cancelar una a una
+o todas a la vez (por ejemplo, al lanzar una nueva búsqueda). Cancelar una
+petición que ya está en curso corta también su descarga (CancelToken).
+
+Si la petición indica un tamaño, la decodificación y el escalado se hacen
+en los hilos del pool y se emite el QImage final con image_loaded(QImage, int);
+el hilo principal solo lo convierte en QPixmap. Esas miniaturas se guardan
+en la caché de disco (workers/thumbnail_cache.py), salvo en los pools creados
+con disk_cache=False (las imágenes a pantalla completa del slideshow). Sin tamaño, el pool emite
+los bytes del original mediante loaded(bytes, int).
+
+Un pool creado con hash_kind calcula además, en sus hilos, el hash
+perceptual de cada miniatura (ver workers/perceptual_hash.py) y lo emite con
+hashed(object, int) justo antes de la imagen.
+
+El origen puede ser una URL o la ruta de un archivo local.
+"""
+import itertools
+import queue
+import threading
+from typing import Optional
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from workers import http_session
+from workers.cancellation import CancelToken, Cancelled
+from workers.image_stream import read_limited
+from workers.perceptual_hash import hash_pixels, input_size
+from workers.thumbnail_cache import (
+    encode_png, get_thumbnail_cache, gray_pixels, is_remote, read_local_image, scale_image,
+)
+
+# Las miniaturas se generan desde el original; por encima de este tamaño
+# no compensa descargarlo solo para una vista previa.
+MAX_THUMBNAIL_BYTES = 8 * 1024 * 1024
+
+# Prioridad reservada para detener los hilos (se atiende antes que nada)
+_STOP_PRIORITY = float("-inf")
+
+
+def fetch_thumbnail(url: str, token: Optional[CancelToken] = None) -> Optional[bytes]:
+    """
+    Descarga la imagen de una URL. Devuelve None si no es válida.
+    Lanza Cancelled si se cancela el token durante la descarga.
+    """
+    token = token or CancelToken()
+    try:
+        response = http_session.get(url, timeout=8, stream=True, token=token)
+        with token.track(response):
+            data = read_limited(response, MAX_THUMBNAIL_BYTES, token)
+        if len(data) > 100:
+            return data
+    except Cancelled:
+        raise
+    except Exception:
+        pass
+    return None
+
+
+def load_thumbnail(
+    source: str,
+    size: tuple[int, int],
+    token: Optional[CancelToken] = None,
+    use_cache: bool = True,
+) -> Optional[QImage]:
+    """
+    Miniatura de una URL o archivo local escalada a `size`.
+    Usa la caché de disco si está; si no, decodifica el original y la guarda
+    (con use_cache=False no se consulta ni se guarda).
+    No crea QPixmap, así que se puede llamar desde cualquier hilo.
+    """
+    cache = get_thumbnail_cache() if use_cache else None
+    remote = is_remote(source)
+    key = None
+    if cache is not None:
+        try:
+            key = cache.url_key(source, size) if remote else cache.file_key(source, size)
+        except OSError:
+            return None
+
+        data = cache.get(key)
+        if data is not None:
+            image = QImage.fromData(data)
+            if not image.isNull():
+                return image
+
+    if remote:
+        raw = fetch_thumbnail(source, token)
+        image = QImage.fromData(raw) if raw is not None else QImage()
+    else:
+        image = read_local_image(source, size)
+    if image.isNull():
+        return None
+    if token is not None:
+        token.raise_if_cancelled()
+
+    scaled = scale_image(image, size)
+    if cache is not None:
+        cache.put(key, encode_png(scaled))
+    return scaled
+
+
+class _FetchThread(QThread):
+    """Hilo del pool: atiende peticiones hasta que se detiene el pool."""
+
+    def __init__(self, pool: "ThumbnailPool"):
+        super().__init__()
+        self._pool = pool
+
+    def run(self):
+        self._pool._work_loop()
+
+
+class ThumbnailPool(QObject):
+    """
+    Servicio de carga de miniaturas con un número acotado de hilos.
+
+    Las peticiones con menor valor de prioridad se atienden antes.
+    cancel_all() invalida todo lo pendiente y corta lo que esté en curso:
+    los resultados que lleguen tarde de una generación anterior se
+    descartan en el hilo principal.
+    """
+
+    loaded = pyqtSignal(bytes, int)          # (original, índice) sin tamaño
+    image_loaded = pyqtSignal(QImage, int)   # (miniatura escalada, índice)
+    hashed = pyqtSignal(object, int)         # (hash perceptual, índice), antes de image_loaded
+    failed = pyqtSignal(int)                 # índice que falló
+
+    # Señales internas: (generación, ...) emitidas desde los hilos del pool
+    _delivered = pyqtSignal(int, bytes, int)
+    _delivered_image = pyqtSignal(int, QImage, int)
+    _delivered_hash = pyqtSignal(int, object, int)
+    _rejected = pyqtSignal(int, int)
+
+    def __init__(
+        self,
+        max_workers: int = 6,
+        parent: Optional[QObject] = None,
+        disk_cache: bool = True,
+        hash_kind: Optional[str] = None,
+    ):
+        super().__init__(parent)
+        self._disk_cache = disk_cache
+        self._hash_kind = hash_kind
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._cancelled: set[tuple[int, int]] = set()
+        self._active: dict[tuple[int, int], CancelToken] = {}  # en curso
+
+        self._delivered.connect(self._on_delivered)
+        self._delivered_image.connect(self._on_delivered_image)
+        self._delivered_hash.connect(self._on_delivered_hash)
+        self._rejected.connect(self._on_rejected)
+
+        self._threads = [_FetchThread(self) for _ in range(max(1, max_workers))]
+        for thread in self._threads:
+            thread.start()
+
+    # ── API pública ──────────────────────────────────────────────────
+    def request(
+        self,
+        source: str,
+        index: int,
+        priority: int = 0,
+        size: Optional[tuple[int, int]] = None,
+    ):
+        """Encola la carga de una miniatura (o del original si no hay tamaño)."""
+        with self._lock:
+            generation = self._generation
+            self._cancelled.discard((generation, index))
+        self._queue.put((priority, next(self._seq), generation, index, source, size))
+
+    def cancel(self, index: int):
+        """Cancela la petición de un índice de la generación actual."""
+        with self._lock:
+            key = (self._generation, index)
+            self._cancelled.add(key)
+            token = self._active.get(key)
+        if token is not None:
+            token.cancel()
+
+    def cancel_all(self):
+        """Descarta todas las peticiones pendientes y las que estén en curso."""
+        with self._lock:
+            self._generation += 1
+            self._cancelled.clear()
+            tokens = list(self._active.values())
+        for token in tokens:
+            token.cancel()
+        self._drain()
+
+    def shutdown(self, timeout_ms: int = 2000):
+        """Detiene los hilos del pool. Llamar al cerrar la ventana."""
+        self.cancel_all()
+        for _ in self._threads:
+            self._queue.put((_STOP_PRIORITY, next(self._seq), -1, -1, None, None))
+        for thread in self._threads:
+            thread.wait(timeout_ms)
+
+    # ── Hilos del pool ───────────────────────────────────────────────
+    def _work_loop(self):
+        while True:
+            _, _, generation, index, source, size = self._queue.get()
+            if source is None:
+                return
+            token = self._start(generation, index)
+            if token is None:
+                continue
+
+            try:
+                if size is None:
+                    data = fetch_thumbnail(source, token)
+                    if data is not None:
+                        self._delivered.emit(generation, data, index)
+                        continue
+                else:
+                    image = load_thumbnail(source, size, token, self._disk_cache)
+                    if image is not None:
+                        if self._hash_kind is not None:
+                            pixels = gray_pixels(image, input_size(self._hash_kind))
+                            value = hash_pixels(pixels, self._hash_kind)
+                            self._delivered_hash.emit(generation, value, index)
+                        self._delivered_image.emit(generation, image, index)
+                        continue
+            except Cancelled:
+                continue
+            except Exception as e:
+                # Un fallo inesperado no puede matar el hilo: la celda se da por perdida
+                print(f"[ThumbPool] Error con la miniatura {index}: {e}")
+            finally:
+                self._finish(generation, index, token)
+            self._rejected.emit(generation, index)
+
+    def _start(self, generation: int, index: int) -> Optional[CancelToken]:
+        """Registra una petición en curso; None si ya está cancelada."""
+        with self._lock:
+            if self._is_stale_locked(generation, index):
+                return None
+            token = CancelToken()
+            self._active[(generation, index)] = token
+            return token
+
+    def _finish(self, generation: int, index: int, token: CancelToken):
+        with self._lock:
+            if self._active.get((generation, index)) is token:
+                del self._active[(generation, index)]
+
+    def _is_stale(self, generation: int, index: int) -> bool:
+        with self._lock:
+            return self._is_stale_locked(generation, index)
+
+    def _is_stale_locked(self, generation: int, index: int) -> bool:
+        return (
+            generation != self._generation
+            or (generation, index) in self._cancelled
+        )
+
+    def _drain(self):
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    # ── Slots (hilo principal) ───────────────────────────────────────
+    def _on_delivered(self, generation: int, data: bytes, index: int):
+        if not self._is_stale(generation, index):
+            self.loaded.emit(data, index)
+
+    def _on_delivered_image(self, generation: int, image: QImage, index: int):
+        if not self._is_stale(generation, index):
+            self.image_loaded.emit(image, index)
+
+    def _on_delivered_hash(self, generation: int, value: int, index: int):
+        if not self._is_stale(generation, index):
+            self.hashed.emit(value, index)
+
+    def _on_rejected(self, generation: int, index: int):
+        if not self._is_stale(generation, index):
+            self.failed.emit(index)